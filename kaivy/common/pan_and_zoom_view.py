@@ -10,28 +10,68 @@ import time
 from kivy.uix.stencilview import StencilView
 from kivy.uix.floatlayout import FloatLayout
 from kivy.graphics.instructions import InstructionGroup
-from kivy.graphics import Rectangle, Color, Line, SmoothLine
+from kivy.graphics import Color, Line, SmoothLine, PushMatrix, PopMatrix, MatrixInstruction
+from kivy.graphics.transformation import Matrix
 from kivy.graphics.scissor_instructions import ScissorPush, ScissorPop
 from kivy.clock import Clock
 from kaivy.geometry.geometry_provider import GeometryProvider
 from kaivy.geometry.geometry2d import Geometry2D, Transformation2D
 from kaivy.geometry.line2d import Line2D
+from kaivy.geometry.polygon2d import Polygon2D
+from kaivy.geometry.point_grid2d import PointGrid2D
+from kaivy.graphics.mesh_builder import MeshBuilder
 import numpy as np
 
 
+class GeometryRenderRecord:
+    """
+    Holds the retained instructions and the hit test data of a single geometry rendered by a PanAndZoomView
+    """
+
+    def __init__(self, geometry: Geometry2D):
+        """
+        Initializer
+        :param geometry: The geometry
+        """
+        self.geometry = geometry  # The geometry rendered
+        self.version = None  # The geometry's version the instructions were created for
+        self.render_key = None  # The view state (scaling, node visibility) the instructions were created for
+        self.instructions = InstructionGroup()  # The geometry's instructions
+        self.geometry_out = {}  # The geometry's silhouette, see Geometry2D.get_silhouette
+        self.editable_nodes = []  # The geometry's editable nodes
+        # The ranges of the geometry's data within the view's hit test arrays as (start, count). None = not included
+        self.node_range = None  # The range within editable_nodes and node_coords
+        self.segment_range = None  # The range within segment_coords and segment_owners
+        self.line_list_ranges = None  # Dictionary of geometry out tag -> range within geometry_line_list
+
+    def is_valid(self, render_key):
+        """
+        Returns if the instructions are up to date
+        :param render_key: The current view state
+        :return: True if the geometry does not need to be rendered again
+        """
+        return self.version == self.geometry.version and self.render_key == render_key
+
+
 class PanAndZoomView(StencilView, FloatLayout):
     """
     The pan and zoom view is able to store another Widget such as an Image and make it pannable and zoomable.
     The embedded view has to provide a function named get_original_image_size which returns it's origin size in pixels.
 
     Events:
-        - on_geometry_moved(geometry) - When ever a geometry was moved
+        - on_geometry_moved(geometry) - When ever a geometry was moved. Dispatched at most every
+          geometry_moved_interval seconds while dragging and once more when the drag ends.
     """
 
     DRAGGING_MODE_OFF = 0  # No panning active
     DRAGGING_MODE_PAN = 1  # Moving view
     DRAGGING_MODE_NODE = 2  # Moving a node
     DRAGGING_MODE_OBJECT = 3  # Moving an object
+    DRAGGING_MODE_SELECT = 4  # Drawing a selection rectangle or lasso
+    DRAGGING_MODE_SELECTION = 5  # Moving the selected nodes
+
+    SELECTION_RECTANGLE = 'rectangle'  # Select the nodes within a rectangle
+    SELECTION_LASSO = 'lasso'  # Select the nodes within a free hand polygon
 
     EDIT_GEOMETRY_NODES = 1  # May edit nodes?
     EDIT_GEOMETRY_OBJECTS = 2  # May edit objects?
@@ -62,12 +102,44 @@ class PanAndZoomView(StencilView, FloatLayout):
         self.drag_time_unblock = 0.5  # Unblock dragging after given amount of seconds
         self.drag_start_time = 0  # Time when dragging started
         self.dragging_mode = self.DRAGGING_MODE_OFF  # Current dragging mode
+        self.pending_drag_movement = np.zeros(2)  # The node or object movement not applied yet
+        self.drag_movement_trigger = Clock.create_trigger(self.apply_drag_movement)  # Applies it once per frame
+        self.geometry_moved_interval = 0.1  # The minimum time between two on_geometry_moved events while dragging
+        self.last_geometry_moved_time = 0.0  # The time on_geometry_moved was dispatched the last time
+        self.moved_geometries = set()  # The geometries moved since their last on_geometry_moved event
 
         # Custom rendering
         self.geometry_instructions = InstructionGroup()
         self.canvas.after.add(self.geometry_instructions)
         self.pre_widget_instructions = InstructionGroup()
         self.canvas.add(self.pre_widget_instructions)
+        self.scissor_instructions = InstructionGroup()  # Holds the ScissorPush for the current size
+        self.pre_geometry_instructions = InstructionGroup()  # Receives on_pre_geometry_rendering's instructions
+        self.element_instructions = InstructionGroup()  # Holds the retained instruction group of each geometry
+        self.node_instructions = InstructionGroup()  # Holds the handles of all editable nodes, see update_node_handles
+        self.highlight_instructions = InstructionGroup()  # Holds the handles of the selected and the hovered node
+        self.post_geometry_instructions = InstructionGroup()  # Receives on_post_geometry_rendering's instructions
+        self.selection_instructions = InstructionGroup()  # Holds the selection rectangle or lasso
+        # The geometry is rendered in geometry coordinates, panning and zooming only update the matrix
+        self.geometry_transformation = Transformation2D()  # Maps geometry coordinates to image coordinates
+        self.geometry_matrix = MatrixInstruction()  # Maps geometry coordinates to screen coordinates
+        for instruction in [self.scissor_instructions, self.pre_geometry_instructions, PushMatrix(),
+                            self.geometry_matrix, self.element_instructions,
+                            self.node_instructions, self.highlight_instructions, PopMatrix(),
+                            self.post_geometry_instructions, self.selection_instructions]:
+            self.geometry_instructions.add(instruction)
+        self.geometry_instructions.add(ScissorPop())
+        self.geometry_records = {}  # Dictionary of geometry -> GeometryRenderRecord
+        self.rendered_geometry = []  # The geometries held by element_instructions in rendering order
+        self.render_scaling_steps = 2  # The count of render scaling levels per doubling of the zoom, see
+        # get_render_key. Line widths and node handles deviate at most half a level from their size in pixels
+        self.viewport_culling = True  # Defines if only the geometry near the visible area shall be requested
+        self.culling_margin = 0.5  # The margin around the visible area requested, relative to the area's size
+        self.geometry_region = None  # The image space region the geometry was requested for. None = request again
+        self.geometry_region_zoom = None  # The zoom level at the time the geometry was requested
+        self.visible_geometry = []  # The geometry returned by the provider for geometry_region
+        self.provider_version = 0  # The provider version the rendered geometry is up to date with
+        self.provider_changes_trigger = Clock.create_trigger(self.handle_provider_changes)  # Coalesces changes
 
         # Hook geometry instructions
         self.editing_modes = {self.EDIT_GEOMETRY_NODES, self.EDIT_GEOMETRY_OBJECTS}  # Geometry editing enabled?
@@ -78,7 +150,30 @@ class PanAndZoomView(StencilView, FloatLayout):
         self.editable_nodes = []  # List of editable nodes
         self.geometry_catch_radius = 12  # The radius in which the geometry shall be catchable
         self.node_catch_radius_sqr = 12 ** 2  # The radius in which the node shall be catchable
-        self.geometry_line_list = []  # A list of tuples containing object's and their lines
+        self.node_size = 10  # The edge length of node handles in pixels
+        self.node_inner_size = 6  # The edge length of the inner area of node handles in pixels
+        self.node_color = (1.0, 0.0, 0.0, 1.0)  # The node handle color
+        self.node_inner_color = (0.0, 0.0, 0.0, 1.0)  # The color of the node handles' inner area
+        self.node_highlight_color = (1.0, 1.0, 0.0, 1.0)  # The color of the selected and the hovered node
+        self.hovered_node = None  # The tuple of the node below the mouse cursor, see handle_hovering
+        self.node_grid = PointGrid2D()  # Grid over node_coords for nearest node and region queries
+        self.selection_tool = None  # The tool used when dragging outside of nodes, see SELECTION_. None = pan
+        self.selection_path = []  # The screen coordinates of the selection rectangle's corners or the lasso
+        self.selection_color = (1.0, 1.0, 0.0, 1.0)  # The color of the selection rectangle or lasso
+        self.selected_nodes = {}  # Dictionary of geometry -> array of the selected nodes' indices
+        self.selected_node_indices = np.zeros(0, dtype=np.int64)  # The indices of the selected nodes in node_coords
+        self.snap_to_nodes = False  # Defines if a dragged node shall snap to other nodes
+        self.snap_radius = 8  # The radius in pixels in which a dragged node snaps to other nodes
+        self.drag_node_position = None  # The position of the dragged node without snapping
+        self.drag_node_index = None  # The index of the dragged node in node_coords
+        self.geometry_line_list = {}  # A dictionary of line lists and triangles of all geometries, see
+        # Geometry2D.render_to_kivy. Collected from the render records by update_hit_test_arrays
+        self.hit_test_dirty = True  # Defines if the hit test arrays have to be rebuilt
+        self.node_handles_dirty = True  # Defines if the node handles have to be rebuilt as the nodes moved
+        self.node_handles_key = None  # The render key the node handles were built for
+        self.node_coords: np.ndarray = np.zeros((0, 2))  # The coordinates of all editable nodes as (N, 2) array
+        self.segment_coords: np.ndarray = np.zeros((0, 2, 2))  # All line segments of all geometries as (M, 2, 2) array
+        self.segment_owners = []  # The owning geometry of each line segment
 
         # Custom geometry rendering - all receive the parameters: panview, instruction group, offset, scaling
         self.on_pre_widget_rendering = None  # Called before the widget is rendered
@@ -94,17 +189,80 @@ class PanAndZoomView(StencilView, FloatLayout):
         :param points: A list of 2D coordinates
         :return: The transformed list of 2D coordinates
         """
-        org_points = np.array(points)
-        return org_points * self.pan_zoom + self.dynamic_widget.pos
+        return self.get_screen_transformation().transform(np.array(points))
+
+    def get_screen_transformation(self) -> Transformation2D:
+        """
+        Returns the transformation from geometry coordinates to screen coordinates
+        :return: The transformation
+        """
+        image_to_screen = Transformation2D(offset=tuple(self.dynamic_widget.pos), scaling=self.pan_zoom)
+        return image_to_screen.compose(self.geometry_transformation)
+
+    def set_geometry_transformation(self, transformation: Transformation2D):
+        """
+        Defines the transformation from geometry coordinates to image coordinates, e.g. a rotation around the image's
+        center for rotated camera mounts. The geometry is not rendered again unless its scaling changes.
+        :param transformation: The transformation
+        """
+        self.geometry_transformation = transformation
+        self.geometry_region = None
+        self.update_geometry_instructions()
 
     def set_geometry_provider(self, provider):
         """
         Assigns a geometry provider
         :param provider: The new provider
         """
+        if self.geometry_provider is not None:
+            self.geometry_provider.remove_change_listener(self.on_provider_changed)
         self.geometry_provider = provider
+        if provider is not None:
+            provider.add_change_listener(self.on_provider_changed)
+            self.provider_version = provider.version
+        self.geometry_region = None
         self.update_geometry_instructions()
 
+    def on_provider_changed(self, provider, change_type, geometry):
+        """
+        Is called by the geometry provider on every change. The changes are processed once per frame.
+        :param provider: The provider
+        :param change_type: The change type, see GeometryProvider.CHANGE_
+        :param geometry: The affected geometry
+        """
+        self.provider_changes_trigger()
+
+    def handle_provider_changes(self, _=None):
+        """
+        Applies the changes of the geometry provider since the last call. Only added, removed and modified
+        geometries are processed, all other geometries keep their instructions.
+        """
+        if self.geometry_provider is None:
+            return
+        changes = self.geometry_provider.get_changes(self.provider_version)
+        self.provider_version = self.geometry_provider.version
+        if changes is None:  # Change log exceeded or content replaced
+            self.handle_geometry_changed()
+            return
+        added, removed, modified = changes
+        region = self.geometry_region
+        for geometry in modified:  # Geometry not rendered yet moved into the requested region?
+            if region is None or geometry in self.geometry_records:  # Rendered geometries are just re-rendered
+                continue
+            bounds = geometry.get_bounding_box()
+            if bounds is not None and bounds[0] <= region[2] and bounds[1] <= region[3] and \
+                    bounds[2] >= region[0] and bounds[3] >= region[1]:
+                self.geometry_region = None
+        if len(added) > 0 or len(removed) > 0:
+            self.geometry_region = None
+        if self.geometry_region is None:
+            self.update_geometry_instructions()
+            return
+        for geometry in modified:
+            record = self.geometry_records.get(geometry, None)
+            if record is not None and not record.is_valid(self.get_render_key()):
+                self.update_geometry_element(geometry)
+
     def set_editing_modes(self, modes):
         """
         Sets the list of valid editing modes
@@ -122,6 +280,7 @@ class PanAndZoomView(StencilView, FloatLayout):
             return
 
         self.show_geometry = state
+        self.geometry_region = None
         self.update_geometry_instructions()
 
     def clip_position(self):
@@ -148,6 +307,53 @@ class PanAndZoomView(StencilView, FloatLayout):
         """
         pass
 
+    def notify_geometry_moved(self, geometry=None, force=False):
+        """
+        Remembers a moved geometry and dispatches on_geometry_moved for all geometries moved since the last event
+        unless it was dispatched less than geometry_moved_interval seconds ago
+        :param geometry: Optional. The moved geometry. None = just dispatch the events pending
+        :param force: Defines if the events shall be dispatched in any case
+        """
+        if geometry is not None:
+            self.moved_geometries.add(geometry)
+        now = time.time()
+        if len(self.moved_geometries) == 0 or \
+                (not force and now - self.last_geometry_moved_time < self.geometry_moved_interval):
+            return
+        self.last_geometry_moved_time = now
+        moved_geometries = self.moved_geometries
+        self.moved_geometries = set()
+        for moved_geometry in moved_geometries:
+            self.dispatch('on_geometry_moved', moved_geometry)
+
+    def apply_drag_movement(self, _=None):
+        """
+        Applies the node or object movement accumulated since the last frame
+        """
+        movement = self.pending_drag_movement
+        if movement[0] == 0.0 and movement[1] == 0.0:
+            return
+        self.pending_drag_movement = np.zeros(2)
+        if self.dragging_mode == self.DRAGGING_MODE_OBJECT:
+            self.handle_geometry_movement(movement)
+        elif self.dragging_mode == self.DRAGGING_MODE_SELECTION:
+            self.handle_selection_movement(movement)
+        elif self.dragging_mode == self.DRAGGING_MODE_NODE:
+            self.handle_node_movement(movement)
+
+    def finish_dragging(self):
+        """
+        Applies the remaining movement and sends the final on_geometry_moved event of a drag
+        """
+        self.drag_movement_trigger.cancel()
+        self.apply_drag_movement()
+        self.notify_geometry_moved(force=True)
+        if self.dragging_mode == self.DRAGGING_MODE_SELECT:
+            self.select_nodes_in_polygon(self.get_selection_polygon())
+            self.selection_instructions.clear()
+            self.selection_path = []
+        self.dragging_mode = self.DRAGGING_MODE_OFF
+
     def handle_zooming(self, touch):
         """
         Handles the zoom process using the mouse wheel
@@ -187,12 +393,89 @@ class PanAndZoomView(StencilView, FloatLayout):
         :return:
         """
         geometry: Geometry2D = self.selected_node[0]
-        array_data = self.selected_node[2]
-        array_data += np.array(movement) / self.pan_zoom
+        screen_transformation = self.get_screen_transformation()
+        self.drag_node_position += screen_transformation.inverse().apply(np.array(movement, dtype=float),
+                                                                         translate=False)
+        position = self.drag_node_position
+        if self.snap_to_nodes and self.drag_node_index is not None:
+            snap_index = self.node_grid.query_nearest(
+                position, self.snap_radius / screen_transformation.get_line_width_scaling(),
+                exclude=[self.drag_node_index])
+            if snap_index is not None:
+                position = self.node_grid.points[snap_index]
         index = self.selected_node[1]
-        geometry.update_node(index, self.selected_node[2])
-        self.update_geometry_instructions()
-        self.dispatch('on_geometry_moved', geometry)
+        geometry.update_node(index, position)
+        self.geometry_provider.update_geometry(geometry)
+        self.update_geometry_element(geometry)
+        self.notify_geometry_moved(geometry)
+
+    def handle_selection_movement(self, movement):
+        """
+        Handles the movement of all selected nodes
+        :param movement: The movement
+        """
+        distance = self.get_screen_transformation().inverse().apply(np.array(movement, dtype=float),
+                                                                    translate=False)
+        for geometry, indices in self.selected_nodes.items():
+            geometry.move_nodes(indices, distance)
+            self.geometry_provider.update_geometry(geometry)
+            self.update_geometry_element(geometry)
+            self.moved_geometries.add(geometry)
+        self.notify_geometry_moved()
+
+    def handle_selection_dragging(self, touch):
+        """
+        Extends the selection rectangle or lasso
+        :param touch: The kivy touch event
+        """
+        if self.selection_tool == self.SELECTION_RECTANGLE:
+            self.selection_path = [self.selection_path[0], tuple(touch.pos)]
+        else:
+            self.selection_path.append(tuple(touch.pos))
+        self.selection_instructions.clear()
+        path = self.get_selection_polygon()
+        if len(path) < 2:
+            return
+        self.selection_instructions.add(Color(*self.selection_color))
+        self.selection_instructions.add(Line(points=path.reshape(-1).tolist(), close=True))
+
+    def get_selection_polygon(self):
+        """
+        Returns the outline of the current selection rectangle or lasso
+        :return: The screen coordinates as array of the shape (N, 2)
+        """
+        path = np.array(self.selection_path, dtype=float).reshape(-1, 2)
+        if self.selection_tool == self.SELECTION_RECTANGLE and len(path) == 2:
+            path = np.array([path[0], (path[1][0], path[0][1]), path[1], (path[0][0], path[1][1])])
+        return path
+
+    def select_nodes_in_polygon(self, polygon):
+        """
+        Selects all editable nodes within a polygon, e.g. a rectangle or a lasso
+        :param polygon: The polygon's corners in screen coordinates as array of the shape (N, 2)
+        """
+        self.update_hit_test_arrays()
+        polygon = self.get_screen_transformation().inverse().apply(np.array(polygon, dtype=float).reshape(-1, 2))
+        if len(polygon) < 3:
+            self.select_nodes([])
+            return
+        region = (*polygon.min(axis=0), *polygon.max(axis=0))
+        candidates = self.node_grid.query_region(region)
+        inside = Polygon2D(polygon).contains_points(self.node_coords[candidates])
+        self.select_nodes(candidates[inside])
+
+    def select_nodes(self, indices):
+        """
+        Selects a set of editable nodes
+        :param indices: The indices within editable_nodes
+        """
+        self.selected_node_indices = np.array(indices, dtype=np.int64).reshape(-1)
+        selection = {}
+        for index in self.selected_node_indices:
+            node_tuple = self.editable_nodes[index]
+            selection.setdefault(node_tuple[0], []).append(node_tuple[1])
+        self.selected_nodes = {geometry: np.array(indices, dtype=np.int64) for geometry, indices in selection.items()}
+        self.update_node_highlight()
 
     def handle_geometry_movement(self, movement):
         """
@@ -202,9 +485,11 @@ class PanAndZoomView(StencilView, FloatLayout):
         """
         if self.selected_geometry is None:
             return
-        self.selected_geometry.move_by(np.array(movement) / self.pan_zoom)
-        self.update_geometry_instructions()
-        self.dispatch('on_geometry_moved', self.selected_geometry)
+        self.selected_geometry.move_by(self.get_screen_transformation().inverse().apply(
+            np.array(movement, dtype=float), translate=False))
+        self.geometry_provider.update_geometry(self.selected_geometry)
+        self.update_geometry_element(self.selected_geometry)
+        self.notify_geometry_moved(self.selected_geometry)
 
     def handle_dragging(self, touch):
         """
@@ -224,10 +509,11 @@ class PanAndZoomView(StencilView, FloatLayout):
 
         if self.dragging_mode == self.DRAGGING_MODE_PAN:  # Dragging node?
             self.handle_panning(drag_diff)
-        elif self.dragging_mode == self.DRAGGING_MODE_OBJECT:  # Dragging object?
-            self.handle_geometry_movement(drag_diff)
-        elif self.dragging_mode == self.DRAGGING_MODE_NODE:  # Dragging?
-            self.handle_node_movement(drag_diff)
+        elif self.dragging_mode == self.DRAGGING_MODE_SELECT:  # Selecting?
+            self.handle_selection_dragging(touch)
+        else:  # Dragging a node or an object? Accumulate the movement til the next frame
+            self.pending_drag_movement += drag_diff
+            self.drag_movement_trigger()
 
         self.last_drag_pos = touch.pos
 
@@ -237,42 +523,136 @@ class PanAndZoomView(StencilView, FloatLayout):
         :param touch: The kivy touch event
         """
         self.last_drag_pos = touch.pos
+        self.pending_drag_movement = np.zeros(2)
         self.drag_blocked = True
         self.selected_node = None
         self.selected_geometry = True
         self.drag_start_time = time.time()
 
+        self.update_hit_test_arrays()
+        touch_pos = np.array(touch.pos, dtype=float)
+        screen_transformation = self.get_screen_transformation()
+
         # Check if a node was clicked
-        if self.EDIT_GEOMETRY_NODES in self.editing_modes:
-            offset = np.array(self.dynamic_widget.pos)
-            scaling = self.pan_zoom
-            # for all nodes
-            for node_tuple in self.editable_nodes:
-                local_coord = node_tuple[2] * scaling + offset
-                if ((np.array(touch.pos) - local_coord) ** 2).sum() < self.node_catch_radius_sqr:
-                    self.dragging_mode = self.DRAGGING_MODE_NODE
-                    self.selected_node = node_tuple
-                    return
-
-        # Check if a line was clicked
-        if self.EDIT_GEOMETRY_OBJECTS in self.editing_modes:
-            offset = np.array(self.dynamic_widget.pos)
-            scaling = self.pan_zoom
-            # for all geometries...
-            for cur_line_list in self.geometry_line_list.get(Geometry2D.GO_TAG_LINE_LIST, []):  # for all lineLists stored
-                owner = cur_line_list[Geometry2D.GO_TAG_OWNER]
-                line_list = cur_line_list[Geometry2D.GO_TAG_LINE_LIST_LINES]
-                # for all lines...
-                for cur_line_index in range(len(line_list) - 1):
-                    line_dist, coord = Line2D.line_distance_to_point(line_list[cur_line_index:cur_line_index + 2, :],
-                                                                     touch.pos)
-                    if line_dist is not None and line_dist < self.geometry_catch_radius:
-                        self.dragging_mode = self.DRAGGING_MODE_OBJECT
-                        self.selected_geometry = owner
-                        return
+        node_index = self.find_node(touch_pos)
+        if node_index is not None and node_index in self.selected_node_indices:  # Move the whole selection
+            self.dragging_mode = self.DRAGGING_MODE_SELECTION
+            return
+        if node_index is not None:
+            self.dragging_mode = self.DRAGGING_MODE_NODE
+            self.selected_node = self.editable_nodes[node_index]
+            self.drag_node_index = node_index
+            self.drag_node_position = np.array(self.selected_node[2], dtype=float)
+            self.select_nodes([])
+            return
+        self.select_nodes([])
+
+        if self.selection_tool is not None and self.EDIT_GEOMETRY_NODES in self.editing_modes:
+            self.dragging_mode = self.DRAGGING_MODE_SELECT
+            self.selection_path = [tuple(touch.pos)]
+            return
+
+        # Check if a line was clicked, the segments are stored in geometry coordinates
+        if self.EDIT_GEOMETRY_OBJECTS in self.editing_modes and len(self.segment_coords) > 0:
+            geometry_pos = screen_transformation.inverse().apply(touch_pos)
+            distances, _ = Line2D.segments_distance_to_point(self.segment_coords, geometry_pos)
+            nearest_index = int(np.argmin(distances))
+            if distances[nearest_index] < self.geometry_catch_radius / screen_transformation.get_line_width_scaling():
+                self.dragging_mode = self.DRAGGING_MODE_OBJECT
+                self.selected_geometry = self.segment_owners[nearest_index]
+                return
 
         self.dragging_mode = self.DRAGGING_MODE_PAN
 
+    def update_hit_test_arrays(self):
+        """
+        Rebuilds the contiguous node and segment arrays used for hit testing if the geometry changed
+        """
+        if not self.hit_test_dirty:
+            return
+        self.hit_test_dirty = False
+        self.editable_nodes = []
+        self.geometry_line_list = {}
+        segment_list = []
+        self.segment_owners = []
+        for geometry in self.rendered_geometry:
+            record = self.geometry_records[geometry]
+            record.node_range = (len(self.editable_nodes), len(record.editable_nodes))
+            self.editable_nodes += record.editable_nodes
+            record.line_list_ranges = {}
+            for tag, entries in record.geometry_out.items():
+                target = self.geometry_line_list.setdefault(tag, [])
+                record.line_list_ranges[tag] = (len(target), len(entries))
+                target.extend(entries)
+            segments, owners = self.get_silhouette_segments(record.geometry_out)
+            record.segment_range = (len(self.segment_owners), len(owners))
+            segment_list.append(segments)
+            self.segment_owners += owners
+        self.segment_coords = np.concatenate(segment_list) if len(segment_list) > 0 else np.zeros((0, 2, 2))
+        if len(self.editable_nodes) > 0:
+            self.node_coords = np.array([node_tuple[2] for node_tuple in self.editable_nodes], dtype=float)
+        else:
+            self.node_coords = np.zeros((0, 2))
+        self.node_grid.build(self.node_coords)
+        self.node_handles_dirty = True
+        self.selected_node_indices = np.zeros(0, dtype=np.int64)
+        if len(self.selected_nodes) > 0:  # Map the selection to the new node order
+            positions = {(id(node_tuple[0]), node_tuple[1]): index
+                         for index, node_tuple in enumerate(self.editable_nodes)}
+            self.selected_node_indices = np.array(
+                [positions[(id(geometry), index)] for geometry, indices in self.selected_nodes.items()
+                 for index in indices.tolist() if (id(geometry), index) in positions], dtype=np.int64)
+
+    @staticmethod
+    def get_silhouette_segments(geometry_out):
+        """
+        Returns the line segments of a geometry's silhouette
+        :param geometry_out: The silhouette, see Geometry2D.get_silhouette
+        :return: The segments as array of the shape (M, 2, 2) and the owning geometry of each segment
+        """
+        segment_list = []
+        owners = []
+        for cur_line_list in geometry_out.get(Geometry2D.GO_TAG_LINE_LIST, []):  # for all lineLists stored
+            lines = np.asarray(cur_line_list[Geometry2D.GO_TAG_LINE_LIST_LINES], dtype=float).reshape(-1, 2)
+            if len(lines) == 0:
+                continue
+            if len(lines) == 1:  # Geometry rendered as a single dot
+                lines = np.repeat(lines, 2, axis=0)
+            segment_list.append(np.stack([lines[:-1], lines[1:]], axis=1))
+            owners += [cur_line_list[Geometry2D.GO_TAG_OWNER]] * (len(lines) - 1)
+        segments = np.concatenate(segment_list) if len(segment_list) > 0 else np.zeros((0, 2, 2))
+        return segments, owners
+
+    def update_record_hit_test(self, record: GeometryRenderRecord):
+        """
+        Updates the hit test data of a single re-rendered geometry in place, e.g. while dragging its nodes. Only
+        possible if the count of its nodes, segments and silhouette entries did not change.
+        :param record: The geometry's render record
+        :return: True if the hit test arrays were updated, False if they have to be rebuilt
+        """
+        if self.hit_test_dirty or record.node_range is None:
+            return False
+        node_start, node_count = record.node_range
+        segment_start, segment_count = record.segment_range
+        if len(record.editable_nodes) != node_count or \
+                {tag: len(entries) for tag, entries in record.geometry_out.items()} != \
+                {tag: entry_range[1] for tag, entry_range in record.line_list_ranges.items()}:
+            return False
+        segments, _ = self.get_silhouette_segments(record.geometry_out)
+        if len(segments) != segment_count:
+            return False
+        self.editable_nodes[node_start:node_start + node_count] = record.editable_nodes
+        if node_count > 0:
+            coords = np.array([node_tuple[2] for node_tuple in record.editable_nodes], dtype=float)
+            self.node_coords[node_start:node_start + node_count] = coords
+            self.node_grid.update_points(np.arange(node_start, node_start + node_count), coords)
+            self.node_handles_dirty = True
+        for tag, entries in record.geometry_out.items():
+            entry_start, entry_count = record.line_list_ranges[tag]
+            self.geometry_line_list[tag][entry_start:entry_start + entry_count] = entries
+        self.segment_coords[segment_start:segment_start + segment_count] = segments
+        return True
+
     def set_dynamic_widget(self, widget):
         """
         Assigns the main widget which shall be zoomable and pannable
@@ -307,76 +687,233 @@ class PanAndZoomView(StencilView, FloatLayout):
         """
         Call this when the geometric data changed
         """
+        self.geometry_records.clear()
+        self.rendered_geometry = []
+        self.hovered_node = None
+        self.selected_nodes = {}
+        if self.geometry_provider is not None:
+            self.provider_version = self.geometry_provider.version
+        self.geometry_region = None
         self.editable_nodes.clear()
         self.geometry_line_list = {}
+        self.hit_test_dirty = True
         self.update_geometry_instructions()
 
-    def update_geometry_instructions(self):
+    def get_visible_region(self):
+        """
+        Returns the bounding box of the currently visible area
+        :return: The region in geometry coordinates in the form minX, minY, maxX, maxY
+        """
+        corners = np.array([[0.0, 0.0], [self.width, 0.0], [self.width, self.height], [0.0, self.height]])
+        corners = self.get_screen_transformation().inverse().apply(corners)
+        min_coord, max_coord = corners.min(axis=0), corners.max(axis=0)
+        return float(min_coord[0]), float(min_coord[1]), float(max_coord[0]), float(max_coord[1])
+
+    def query_geometry(self):
+        """
+        Returns the geometry to render. If viewport culling is enabled only the geometry intersecting the visible area
+        plus a margin is requested from the provider. The result is reused until the visible area leaves the
+        requested region or the zoom level changes.
+        :return: The list of geometries
+        """
+        if self.geometry_provider is None or not self.show_geometry:
+            return []
+        if not self.viewport_culling:
+            return self.geometry_provider.get_geometry()
+        visible = self.get_visible_region()
+        region = self.geometry_region
+        zoom = self.get_screen_transformation().get_line_width_scaling()
+        if region is not None and self.geometry_region_zoom == zoom and region[0] <= visible[0] and \
+                region[1] <= visible[1] and visible[2] <= region[2] and visible[3] <= region[3]:
+            return self.visible_geometry
+        margin_x = (visible[2] - visible[0]) * self.culling_margin
+        margin_y = (visible[3] - visible[1]) * self.culling_margin
+        self.geometry_region = (visible[0] - margin_x, visible[1] - margin_y,
+                                visible[2] + margin_x, visible[3] + margin_y)
+        self.geometry_region_zoom = zoom
+        self.visible_geometry = self.geometry_provider.get_geometry(self.geometry_region)
+        return self.visible_geometry
+
+    def get_render_key(self):
+        """
+        Returns the view state the geometry instructions depend on. Offset and rotation are not part of it as they
+        only modify the geometry matrix. The scaling is quantized to render_scaling_steps levels per doubling, so a
+        continuous zoom only renders the geometry again when it crosses a level.
+        :return: A tuple of the quantized screen pixels per geometry unit and the node handle visibility
+        """
+        scaling = self.get_screen_transformation().get_line_width_scaling()
+        if self.render_scaling_steps > 0 and scaling > 0.0:
+            steps = self.render_scaling_steps
+            scaling = 2.0 ** (round(np.log2(scaling) * steps) / steps)
+        return float(scaling), self.EDIT_GEOMETRY_NODES in self.editing_modes
+
+    def render_geometry_record(self, record: GeometryRenderRecord, render_key):
+        """
+        Renders a single geometry into its retained instruction groups. The hit test data is taken from the
+        geometry's cached silhouette, so it only changes when the geometry was modified.
+        :param record: The geometry's render record
+        :param render_key: The current view state, see get_render_key
+        :return: True if the hit test data of the geometry changed
+        """
+        scaling = render_key[0]
+        geometry = record.geometry
+        hit_test_changed = record.version != geometry.version or record.render_key is None or \
+            record.render_key[1] != render_key[1]
+        record.instructions.clear()
+        record.geometry_out = geometry.get_silhouette()
+        # Render in geometry coordinates, sizes defined in pixels are compensated via the screen scaling
+        geometry.render_to_kivy(record.instructions, transformation=Transformation2D(screen_scaling=scaling))
+
+        record.editable_nodes = []
+        if render_key[1]:  # The handles are built for all geometries at once, see update_node_handles
+            editable_nodes = geometry.get_editable_nodes()
+            if editable_nodes is not None:
+                record.editable_nodes = editable_nodes
+
+        record.version = geometry.version
+        record.render_key = render_key
+        return hit_test_changed
+
+    def update_node_handles(self):
+        """
+        Rebuilds the handles of all editable nodes as one outer and one inner mesh over node_coords. They are only
+        rebuilt when the nodes moved or the render scaling changed.
+        """
+        self.update_hit_test_arrays()
+        render_key = self.get_render_key()
+        if not self.node_handles_dirty and self.node_handles_key == render_key:
+            return
+        self.node_handles_dirty = False
+        self.node_handles_key = render_key
+        self.node_instructions.clear()
+        if render_key[1] and len(self.node_coords) > 0:
+            self.add_node_handles(self.node_instructions, self.node_coords, render_key[0], self.node_color)
+
+    def add_node_handles(self, target, node_coords, scaling, color):
+        """
+        Adds the handles of a set of nodes as one outer and one inner mesh
+        :param target: The target instruction group
+        :param node_coords: The node coordinates as array of the shape (N, 2)
+        :param scaling: The screen pixels per geometry unit
+        :param color: The color of the outer area
+        """
+        for size, handle_color in ((self.node_size, color), (self.node_inner_size, self.node_inner_color)):
+            builder = MeshBuilder()
+            builder.add_points(node_coords, size / scaling)
+            builder.build(target, handle_color)
+
+    def update_node_highlight(self):
+        """
+        Updates the handles of the selected and the hovered node. Only these handles are rendered again.
+        """
+        self.highlight_instructions.clear()
+        highlighted = [node_tuple[2] for node_tuple in (self.selected_node, self.hovered_node)
+                       if node_tuple is not None]
+        highlighted += [geometry.nodes[indices] for geometry, indices in self.selected_nodes.items()]
+        if len(highlighted) == 0 or self.EDIT_GEOMETRY_NODES not in self.editing_modes:
+            return
+        node_coords = np.concatenate([np.asarray(coords, dtype=float).reshape(-1, 2) for coords in highlighted])
+        self.add_node_handles(self.highlight_instructions, node_coords, self.get_render_key()[0],
+                              self.node_highlight_color)
+
+    def find_node(self, pos):
+        """
+        Returns the editable node next to a screen position
+        :param pos: The screen position
+        :return: The index within editable_nodes. None if no node is within the catch radius.
+        """
+        self.update_hit_test_arrays()
+        if self.EDIT_GEOMETRY_NODES not in self.editing_modes or len(self.node_coords) == 0:
+            return None
+        screen_transformation = self.get_screen_transformation()
+        geometry_pos = screen_transformation.inverse().apply(np.array(pos, dtype=float))
+        return self.node_grid.query_nearest(geometry_pos, self.node_catch_radius_sqr ** 0.5 /
+                                            screen_transformation.get_line_width_scaling())
+
+    def handle_hovering(self, pos):
         """
-        Is called to update geometrical overlay views
+        Highlights the node below the mouse cursor. Forward the mouse position to this function to enable hover
+        highlighting, e.g. via Window.bind(mouse_pos=...).
+        :param pos: The mouse position in screen coordinates
         """
+        index = self.find_node(pos) if self.dragging_mode == self.DRAGGING_MODE_OFF else None
+        node_tuple = self.editable_nodes[index] if index is not None else None
+        if node_tuple is not self.hovered_node:
+            self.hovered_node = node_tuple
+            self.update_node_highlight()
 
+    def update_overlay_instructions(self):
+        """
+        Updates the custom rendering passes, see on_pre_widget_rendering, on_pre_geometry_rendering and
+        on_post_geometry_rendering
+        """
         offset = np.array(self.dynamic_widget.pos)
         scaling = self.pan_zoom
 
-        # ---------- Pre pass (below widget) ----------
-
         self.pre_widget_instructions.clear()
-
         if self.on_pre_widget_rendering is not None:
             self.pre_widget_instructions.add(ScissorPush(x=0, y=0, width=self.width, height=self.height))
             self.on_pre_widget_rendering(self, self.pre_widget_instructions, offset, scaling)
             self.pre_widget_instructions.add(ScissorPop())
 
-        self.geometry_instructions.clear()
-        self.geometry_instructions.add(ScissorPush(x=0, y=0, width=self.width, height=self.height))
-
-        # ---------- Main pass - underlay ----------
-
+        self.pre_geometry_instructions.clear()
         if self.on_pre_geometry_rendering is not None:
-            self.on_pre_geometry_rendering(self, self.geometry_instructions, offset, scaling)
-
-        # ---------- Main pass - geometry ----------
-
-        self.geometry_line_list = {}
-        self.editable_nodes.clear()
-
-        if self.geometry_provider is not None and self.show_geometry:  # Editable objects provided?
-            # fetch all elements
-            geometry_data = self.geometry_provider.get_geometry()
+            self.on_pre_geometry_rendering(self, self.pre_geometry_instructions, offset, scaling)
 
-            transformation = Transformation2D(offset, scaling)
+        self.post_geometry_instructions.clear()
+        if self.on_post_geometry_rendering is not None:
+            self.on_post_geometry_rendering(self, self.post_geometry_instructions, offset, scaling)
 
-            # render elements
-            for element in geometry_data:
-                element.render_to_kivy(self.geometry_instructions,  transformation=transformation,
-                                       geometry_out=self.geometry_line_list)
+    def update_geometry_element(self, geometry: Geometry2D):
+        """
+        Re-renders a single modified geometry without touching the instructions of all other geometries
+        :param geometry: The modified geometry
+        """
+        record = self.geometry_records.get(geometry, None)
+        if record is None or geometry not in self.rendered_geometry:
+            self.update_geometry_instructions()
+            return
+        if self.render_geometry_record(record, self.get_render_key()) and not self.update_record_hit_test(record):
+            self.hit_test_dirty = True
+        self.update_node_handles()
+        self.update_node_highlight()
+        self.update_overlay_instructions()
 
+    def update_geometry_instructions(self):
+        """
+        Is called to update geometrical overlay views. Only geometries which were modified since they were rendered
+        the last time or which were rendered at another zoom level are rendered again.
+        """
+        self.scissor_instructions.clear()
+        self.scissor_instructions.add(ScissorPush(x=0, y=0, width=self.width, height=self.height))
+        matrix = Matrix()
+        matrix.set(flat=self.get_screen_transformation().get_gl_matrix())
+        self.geometry_matrix.matrix = matrix
+
+        geometry_data = self.query_geometry()
+
+        render_key = self.get_render_key()
+        records = {}
+        for element in geometry_data:
+            record = self.geometry_records.get(element, None)
+            if record is None:
+                record = GeometryRenderRecord(element)
+            if not record.is_valid(render_key) and self.render_geometry_record(record, render_key):
+                self.hit_test_dirty = True
+            records[element] = record
+        self.geometry_records = records
+
+        if len(geometry_data) != len(self.rendered_geometry) or \
+                any(a is not b for a, b in zip(geometry_data, self.rendered_geometry)):  # Order or content changed?
+            self.element_instructions.clear()
             for element in geometry_data:
-                if self.EDIT_GEOMETRY_NODES in self.editing_modes:
-                    editable_nodes = element.get_editable_nodes()
-                    if editable_nodes is None:
-                        continue
-                    for node_tuple in editable_nodes:
-                        local_coord = (node_tuple[2] * scaling + offset).astype(np.int)
-                        outer_box_size = 10
-                        outer_coord = (local_coord - (outer_box_size // 2, outer_box_size // 2))
-                        inner_box_size = 6
-                        inner_coord = (local_coord - (inner_box_size // 2, inner_box_size // 2))
-                        self.geometry_instructions.add(Color(1.0, 0.0, 0.0, 1.0))
-                        self.geometry_instructions.add(
-                            Rectangle(pos=outer_coord, size=(outer_box_size, outer_box_size)))
-                        self.geometry_instructions.add(Color(0.0, 0.0, 0.0, 1.0))
-                        self.geometry_instructions.add(
-                            Rectangle(pos=inner_coord, size=(inner_box_size, inner_box_size)))
-
-                    self.editable_nodes += editable_nodes
-
-        # ---------- Main pass - overlay ----------
-        if self.on_post_geometry_rendering is not None:
-            self.on_post_geometry_rendering(self, self.geometry_instructions, offset, scaling)
+                self.element_instructions.add(records[element].instructions)
+            self.rendered_geometry = list(geometry_data)
+            self.hit_test_dirty = True
 
-        self.geometry_instructions.add(ScissorPop())
+        self.update_node_handles()
+        self.update_node_highlight()
+        self.update_overlay_instructions()
 
     def reposition_view(self):
         """
@@ -434,7 +971,7 @@ class PanAndZoomView(StencilView, FloatLayout):
         :return:
         """
         if touch.button == 'left':
-            self.dragging_mode = self.DRAGGING_MODE_OFF
+            self.finish_dragging()
         super().on_touch_up(touch)
 
     def on_touch_move(self, touch):
@@ -8,17 +8,36 @@
 
 import numpy as np
 import math
+from collections import OrderedDict
+from unittest import TestCase
 from kivy.graphics import Line, SmoothLine, Color
-from kivy.graphics.tesselator import Tesselator
-from kivy.graphics import Mesh
 from kaivy.geometry.geometry2d import Geometry2D, Transformation2D
+from kaivy.graphics.mesh_builder import MeshBuilder
 
 
 class Arc2D(Geometry2D):
     """
     Defines a two dimensional arc, so a partial ellipse with a defined inner radius, outer radius, start and end angle.
+
+    The arc's outline and filling triangles are computed in geometry coordinates and cached by the shape parameters
+    in a cache shared by all arcs, so rendering the same arc again, also through a new instance such as the ones
+    created by KaivyCanvas.draw_arc, only requires transforming the cached vertices.
+
+    The arc has no nodes. Assigning the center, a radius or an angle marks the arc as modified, call mark_modified
+    after modifying the center array in place.
     """
 
+    SHAPE_ATTRIBUTES = frozenset(('center', 'inner_radius', 'outer_radius', 'start_angle', 'end_angle'))  # The
+    # attributes defining the arc's shape, assigning them increases the version
+
+    MAX_UNIT_ARC_CACHE_SIZE = 256  # The maximum count of cached unit arc tables
+    _unit_arc_cache = OrderedDict()  # Cached cos/sin tables, (segments, overall degree) -> (cos array, sin array)
+    MAX_SHAPE_CACHE_SIZE = 512  # The maximum count of cached arc shapes
+    _shape_cache = OrderedDict()  # Cached shapes, (center, radii, angles, segments) -> (outline, vertices, indices)
+
+    __slots__ = ('center', 'inner_radius', 'outer_radius', 'start_angle', 'end_angle', 'border_color', 'border_size',
+                 'max_segments', 'perimeter_segment_relation')
+
     def __init__(self, center, inner_radius, outer_radius, start_angle, end_angle):
         """
         Initializer
@@ -30,7 +49,7 @@ class Arc2D(Geometry2D):
         """
         super().__init__()
         self.geometry_class_name = 'Arc2D'
-        self.center = np.array(center, dtype=np.float)  # The center coordinate
+        self.center = np.array(center, dtype=float)  # The center coordinate
         self.inner_radius = inner_radius  # The inner radius (single value or tuple for X/Y)
         self.outer_radius = outer_radius  # The outer radius (single value or tuple for X/Y)
         self.start_angle = start_angle  # The start angle in degree
@@ -40,8 +59,38 @@ class Arc2D(Geometry2D):
         self.max_segments = 128  # The maximum number of segments
         self.perimeter_segment_relation = 0.125  # The relation between circle perimeter and segments
 
-    @staticmethod
-    def get_arc_points(rad, start_degree, end_degree, center, segments=None, backwards=True):
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.SHAPE_ATTRIBUTES:  # Invalidate the cached bounds, silhouette and rendering
+            self.mark_modified()
+
+    def move_by(self, distance):  # Overrides Geometry2D.move_by
+        self.center = self.center + distance
+
+    def get_editable_nodes(self):  # Overrides Geometry2D.get_editable_nodes
+        return []
+
+    @classmethod
+    def get_unit_arc(cls, segments, overall_degree):
+        """
+        Returns the cached cos and sin values of the angles of an arc starting at 0 degree
+        :param segments: The count of segments
+        :param overall_degree: The arc's angle in degree
+        :return: The cos and the sin values as arrays of the shape (segments + 1,)
+        """
+        key = (segments, overall_degree)
+        table = cls._unit_arc_cache.get(key, None)
+        if table is not None:
+            cls._unit_arc_cache.move_to_end(key)
+            return table
+        angles = np.radians(np.arange(segments + 1) * (overall_degree / segments))
+        table = cls._unit_arc_cache[key] = (np.cos(angles), np.sin(angles))
+        if len(cls._unit_arc_cache) > cls.MAX_UNIT_ARC_CACHE_SIZE:
+            cls._unit_arc_cache.popitem(last=False)
+        return table
+
+    @classmethod
+    def get_arc_point_array(cls, rad, start_degree, end_degree, center, segments, backwards=True):
         """
         Returns the points for a partial circle
         :param rad: The radius (single value or xy tuple)
@@ -50,42 +99,41 @@ class Arc2D(Geometry2D):
         :param center: The center coordinate
         :param segments: The count of segments
         :param backwards: Defines if the points shall be added back to front (starting at end_degree)
-        :return: A 1-dimensional list of points
+        :return: The points as array of the shape (segments + 1, 2)
         """
-
-        def add_point(step: int):
-            """
-            Helper function, adds a point for given iteration step along the arc's curve
-            :param step: The step (from 0 to segmentation count)
-            :return:
-            """
-            rad_v = deg_per_seg_rad * step + start_degree
-            cv = math.cos(rad_v)
-            sv = math.sin(rad_v)
-            point_list.append(center[0] + cv * rad[0])
-            point_list.append(center[1] + sv * rad[1])
-
         if not isinstance(rad, tuple) and not isinstance(rad, np.ndarray):
             rad = (rad, rad)
-        overall_degree = end_degree - start_degree
-        start_degree = math.radians(start_degree - 90.0)
-        deg_per_seg_rad = math.radians(overall_degree / segments)
-        point_list = []
-        if not backwards:
-            for index in range(segments + 1):
-                add_point(index)
-        else:
-            for index in range(segments, -1, -1):
-                add_point(index)
-        return point_list
-
-    def get_optimal_segments(self):
+        unit_cos, unit_sin = cls.get_unit_arc(segments, end_degree - start_degree)
+        start_radians = math.radians(start_degree - 90.0)
+        start_cos, start_sin = math.cos(start_radians), math.sin(start_radians)
+        points = np.empty((segments + 1, 2))
+        points[:, 0] = center[0] + (unit_cos * start_cos - unit_sin * start_sin) * rad[0]  # rotate by start angle
+        points[:, 1] = center[1] + (unit_sin * start_cos + unit_cos * start_sin) * rad[1]
+        return points[::-1] if backwards else points
+
+    @classmethod
+    def get_arc_points(cls, rad, start_degree, end_degree, center, segments=None, backwards=True):
+        """
+        Returns the points for a partial circle
+        :param rad: The radius (single value or xy tuple)
+        :param start_degree: The start angle in degree
+        :param end_degree: The end angle in degree
+        :param center: The center coordinate
+        :param segments: The count of segments
+        :param backwards: Defines if the points shall be added back to front (starting at end_degree)
+        :return: A 1-dimensional list of points
+        """
+        return cls.get_arc_point_array(rad, start_degree, end_degree, center, segments, backwards).reshape(
+            -1).tolist()
+
+    def get_optimal_segments(self, pixels_per_unit=1.0):
         """
         Returns the optimal count of segments for given arc size
-        :return: The count of segments for a given circle perimeter
+        :param pixels_per_unit: The count of screen pixels per unit, see Transformation2D.get_pixels_per_unit
+        :return: The count of segments for a given circle perimeter on screen
         """
         segments = int(
-            self.outer_radius * math.pi * 2.0 * (
+            self.outer_radius * pixels_per_unit * math.pi * 2.0 * (
                         self.end_angle - self.start_angle) / 360.0 * self.perimeter_segment_relation + 0.5)
         if segments < 8:
             segments = 8
@@ -93,60 +141,85 @@ class Arc2D(Geometry2D):
             segments = self.max_segments
         return segments
 
-    def render_to_kivy(self, target, transformation: Transformation2D, parameters={}, geometry_out=None):
+    def compute_bounding_box(self):  # Overrides Geometry2D.compute_bounding_box
+        rad_x, rad_y = (self.outer_radius, self.outer_radius) if np.isscalar(self.outer_radius) else self.outer_radius
+        return (float(self.center[0] - rad_x), float(self.center[1] - rad_y),
+                float(self.center[0] + rad_x), float(self.center[1] + rad_y))
+
+    def get_shape(self, segments):
+        """
+        Returns the arc's outline and filling triangles in geometry coordinates. The result is cached by the shape
+        parameters and shared by all arcs, so the returned arrays are read-only.
+        :param segments: The count of segments
+        :return: The closed outline of the shape (K, 2), the filling vertices (V, 2) and the triangle indices (T * 3)
+        """
+        key = (float(self.center[0]), float(self.center[1]), np.asarray(self.inner_radius, dtype=float).tobytes(),
+               np.asarray(self.outer_radius, dtype=float).tobytes(), self.start_angle, self.end_angle, segments)
+        shape = self._shape_cache.get(key, None)
+        if shape is not None:
+            self._shape_cache.move_to_end(key)
+            return shape
+
+        outer_points = self.get_arc_point_array(rad=(self.outer_radius, self.outer_radius),
+                                                start_degree=self.start_angle, end_degree=self.end_angle,
+                                                center=self.center, segments=segments, backwards=False)
+        steps = np.arange(segments)
+        if self.inner_radius != 0.0:  # Ring: the outer points are followed by the inner points in the same order
+            inner_points = self.get_arc_point_array(rad=(self.inner_radius, self.inner_radius),
+                                                    start_degree=self.start_angle, end_degree=self.end_angle,
+                                                    center=self.center, segments=segments, backwards=False)
+            outline = np.concatenate([outer_points, inner_points[::-1], outer_points[:1]])
+            vertices = np.concatenate([outer_points, inner_points])
+            inner_steps = steps + segments + 1
+            indices = np.stack([steps, steps + 1, inner_steps + 1, inner_steps + 1, inner_steps, steps], axis=1)
+        else:  # Sector: a fan around the center
+            outline = np.concatenate([outer_points, self.center.reshape(1, 2), outer_points[:1]])
+            vertices = np.concatenate([self.center.reshape(1, 2), outer_points])
+            indices = np.stack([np.zeros(segments, dtype=np.int64), steps + 1, steps + 2], axis=1)
+
+        shape = (outline, vertices, indices.reshape(-1))
+        for array in shape:
+            array.flags.writeable = False
+        self._shape_cache[key] = shape
+        if len(self._shape_cache) > self.MAX_SHAPE_CACHE_SIZE:
+            self._shape_cache.popitem(last=False)
+        return shape
+
+    def add_silhouette(self, geometry_out):  # Overrides Geometry2D.add_silhouette
         if self.start_angle == self.end_angle:
             return
+        outline, vertices, indices = self.get_shape(self.get_optimal_segments())
+        if self.color[3] != 0.0:
+            geometry_out.setdefault(self.GO_TAG_TRIANGLES, []).append(
+                {self.GO_TAG_OWNER: self, self.GO_TAG_TF_INDICES: indices, self.GO_TAG_TF_VERTICES: vertices})
+        self.add_lines_to_geometry_list(geometry_out, outline)
 
-        segments = self.get_optimal_segments()
-
-        point_list = self.get_arc_points(rad=(self.outer_radius, self.outer_radius), start_degree=self.start_angle,
-                                         end_degree=self.end_angle,
-                                         center=self.center,
-                                         segments=segments,
-                                         backwards=False)
-
-        if self.inner_radius != 0.0:
-            point_list += self.get_arc_points(rad=(self.inner_radius, self.inner_radius),
-                                              start_degree=self.start_angle,
-                                              end_degree=self.end_angle,
-                                              center=self.center,
-                                              segments=segments,
-                                              backwards=True)
-            point_list = point_list + point_list[:2]
-        else:
-            point_list += [self.center[0], self.center[1]]
-            point_list = point_list + point_list[:2]
-
-        transformed = transformation.transform(np.array(point_list).reshape(-1, 2))
-        point_list = transformed.flatten().tolist()
+    def render_to_kivy(self, target, transformation: Transformation2D, parameters={}, geometry_out=None):
+        if self.start_angle == self.end_angle:
+            return
 
-        width_scaling = transformation.get_line_width_scaling()
+        pixels_per_unit = transformation.get_pixels_per_unit()
+        if self.lod_tolerance > 0.0 and self.outer_radius * 2.0 * pixels_per_unit < 1.0:  # Sub pixel sized
+            self.render_dot(target, transformation)
+            return
 
-        if self.color[3] != 0.0:  # Inner filling?
-            # Tessalate polygon to triangles
-            tess = Tesselator()
-            tess.add_contour(point_list)
+        segments = self.get_optimal_segments(pixels_per_unit)
+        outline, vertices, indices = self.get_shape(segments)
 
-            target_list = None
+        transformed = transformation.transform(outline)
+        point_list = transformed.flatten().tolist()
 
+        if self.color[3] != 0.0:  # Inner filling?
+            transformed_vertices = transformation.transform(vertices)
             if geometry_out is not None:
-                if not self.GO_TAG_TRIANGLE_FAN in geometry_out:
-                    target_list = geometry_out[self.GO_TAG_TRIANGLE_FAN] = []
-                else:
-                    target_list = geometry_out[self.GO_TAG_TRIANGLE_FAN]
-
-            if tess.tesselate():
-                target.add(Color(*self.color))
-                for vertices, indices in tess.meshes:  # Iterate tesselated triangles
-                    if target_list is not None:
-                        restacked = np.array(vertices).reshape(-1, 2)
-                        target_list.append({self.GO_TAG_OWNER: self, self.GO_TAG_TF_INDICES: list(indices),
-                                            self.GO_TAG_TF_VERTICES: restacked})
-                    target.add(Mesh(
-                        vertices=vertices,
-                        indices=indices,
-                        mode="triangle_fan"
-                    ))
+                target_list = geometry_out.get(self.GO_TAG_TRIANGLES, None)
+                if target_list is None:
+                    target_list = geometry_out[self.GO_TAG_TRIANGLES] = []
+                target_list.append({self.GO_TAG_OWNER: self, self.GO_TAG_TF_INDICES: indices,
+                                    self.GO_TAG_TF_VERTICES: transformed_vertices})
+            builder = MeshBuilder()
+            builder.add_triangles(transformed_vertices, indices)
+            builder.build(target, self.color)
 
         if self.border_color[3] != 0.0 and self.border_size != 0:  # Border visible?
             line_list = None
@@ -155,15 +228,30 @@ class Arc2D(Geometry2D):
 
             target.add(Color(*self.border_color))
             smooth = parameters.get("smooth", True)
+            width = self.border_size * transformation.get_pixel_size()
             if smooth:
-                target.add(SmoothLine(points=point_list[0:-2], width=int(self.border_size * width_scaling + 0.5)))
-                target.add(SmoothLine(points=point_list[-4:], width=int(self.border_size * width_scaling + 0.5)))
+                target.add(SmoothLine(points=point_list[0:-2], width=width))
+                target.add(SmoothLine(points=point_list[-4:], width=width))
             else:
-                target.add(Line(points=point_list[0:-2], width=int(self.border_size * width_scaling + 0.5)))
-                target.add(Line(points=point_list[-4:], width=int(self.border_size * width_scaling + 0.5)))
+                target.add(Line(points=point_list[0:-2], width=width))
+                target.add(Line(points=point_list[-4:], width=width))
+
+    def render_dot(self, target, transformation: Transformation2D):
+        """
+        Renders the arc as a single pixel, used when it is too small to be visible
+        :param target: The target canvas or instruction group
+        :param transformation: The transformation
+        """
+        color = self.color if self.color[3] != 0.0 else self.border_color
+        if color[3] == 0.0:
+            return
+        builder = MeshBuilder()
+        builder.add_points(transformation.transform(self.center.reshape(1, 2)), transformation.get_pixel_size())
+        builder.build(target, color)
 
     def to_dict(self,  options):  # Overrides Geometry2D to_dict
         result = super().to_dict(options)
+        result['center'] = self.center.tolist()
         result['innerRadius'] = self.inner_radius
         result['outerRadius'] = self.outer_radius
         result['startAngle'] = self.start_angle
@@ -174,3 +262,59 @@ class Arc2D(Geometry2D):
             result['maxSegments'] = self.max_segments
             result['perimeterSegmentRelation'] = self.perimeter_segment_relation
         return result
+
+    @classmethod
+    def from_dict(cls, data):  # Overrides Geometry2D.from_dict
+        geometry = cls(data['center'], inner_radius=data['innerRadius'], outer_radius=data['outerRadius'],
+                       start_angle=data['startAngle'], end_angle=data['endAngle'])
+        geometry.apply_dict(data)
+        geometry.border_color = tuple(data.get('borderColor', geometry.border_color))
+        geometry.border_size = data.get('borderSize', geometry.border_size)
+        geometry.max_segments = data.get('maxSegments', geometry.max_segments)
+        geometry.perimeter_segment_relation = data.get('perimeterSegmentRelation',
+                                                       geometry.perimeter_segment_relation)
+        return geometry
+
+
+class _TestArc2D(TestCase):
+    """
+    Unit tests for class Arc2D
+    """
+
+    def test_shape_cache(self):
+        """
+        Tests that arcs of the same shape share their cached shape
+        """
+        first = Arc2D((10.0, 20.0), inner_radius=5.0, outer_radius=10.0, start_angle=0.0, end_angle=90.0)
+        second = Arc2D((10.0, 20.0), inner_radius=5.0, outer_radius=10.0, start_angle=0.0, end_angle=90.0)
+        shape = first.get_shape(16)
+        self.assertIs(second.get_shape(16), shape)
+        self.assertFalse(shape[0].flags.writeable)
+        self.assertEqual(shape[1].shape, (34, 2))
+        second.end_angle = 180.0
+        self.assertIsNot(second.get_shape(16), shape)
+        self.assertIsNot(first.get_shape(8), shape)
+        self.assertFalse(hasattr(first, '__dict__'))
+
+    def test_move(self):
+        """
+        Tests dragging an arc and rendering its silhouette afterwards
+        """
+        arc = Arc2D((10.0, 20.0), inner_radius=0.0, outer_radius=10.0, start_angle=0.0, end_angle=90.0)
+        self.assertEqual(arc.get_editable_nodes(), [])
+        self.assertEqual(arc.get_bounding_box(), (0.0, 10.0, 20.0, 30.0))
+        silhouette = arc.get_silhouette()
+        version = arc.version
+        arc.move_by(np.array([5.0, 0.0]))
+        self.assertGreater(arc.version, version)
+        self.assertTrue(np.allclose(arc.center, (15.0, 20.0)))
+        self.assertEqual(arc.get_bounding_box(), (5.0, 10.0, 25.0, 30.0))
+        self.assertEqual(arc.get_dirty_bounds(), (0.0, 10.0, 25.0, 30.0))
+        moved_silhouette = arc.get_silhouette()
+        self.assertIsNot(moved_silhouette, silhouette)
+        lines = moved_silhouette[Geometry2D.GO_TAG_LINE_LIST][0][Geometry2D.GO_TAG_LINE_LIST_LINES]
+        self.assertTrue(np.allclose(np.min(lines, axis=0), (15.0, 10.0)))
+        version = arc.version
+        arc.outer_radius = 20.0
+        self.assertGreater(arc.version, version)
+        self.assertEqual(arc.get_bounding_box(), (-5.0, 0.0, 35.0, 40.0))
@@ -6,8 +6,10 @@
 #                                                                                                                      #
 ########################################################################################################################
 
+import math
 import numpy as np
 from typing import Tuple
+from unittest import TestCase
 from kaivy.geometry.transformation2d import Transformation2D
 
 
@@ -19,6 +21,7 @@ class Geometry2D:
     # Tags for a geometry out dictionary
     GO_TAG_LINE_LIST = "lineLists"  # Line list geometry out entry
     GO_TAG_TRIANGLE_FAN = "triangleFans"  # Triangle fans defining a polygon
+    GO_TAG_TRIANGLES = "triangles"  # Triangle lists defining a polygon
     GO_TAG_OWNER = "owner"  # Owner of an geometry out object
     GO_TAG_LINE_LIST_LINES = "lines"  # Lines of a line list object
     GO_TAG_TF_VERTICES = "vertices"  # Vertices defining a triangle fan
@@ -26,6 +29,12 @@ class Geometry2D:
 
     OPTION_VISUAL_DETAILS = 'visualDetails'  # Defines if visual details shall be stored
 
+    node_dtype = np.float64  # The data type of node arrays. Set Geometry2D.node_dtype to np.float32 for large scenes
+
+    __slots__ = ('tag', 'geometry_class_name', 'nodes', 'color', 'version', 'dirty_bounds', '_bounds',
+                 '_bounds_version', 'lod_tolerance', '_lod_cache', '_lod_cache_version', '_silhouette',
+                 '_silhouette_version')
+
     def __init__(self):
         """
         Initializer
@@ -34,6 +43,15 @@ class Geometry2D:
         self.geometry_class_name = 'Geometry2D'  # The geometry's unique class name
         self.nodes: np.ndarray = None  # Defines the geometry's points (list of 2D coordinates)
         self.color: Tuple = (1.0, 1.0, 1.0, 1.0)  # Defines the geometry's color
+        self.version = 0  # Modification counter, increased whenever the geometry was modified
+        self.dirty_bounds = None  # The region covered before modifications since the last clear_dirty_bounds call
+        self._bounds = None  # The cached bounding box
+        self._bounds_version = None  # The version the cached bounding box was computed for
+        self.lod_tolerance = 0.5  # The maximum deviation in screen pixels when rendering simplified. 0 = full detail
+        self._lod_cache = {}  # Dictionary of detail level -> simplified nodes
+        self._lod_cache_version = None  # The version the simplified nodes were computed for
+        self._silhouette = None  # The cached silhouette, see get_silhouette
+        self._silhouette_version = None  # The version the silhouette was computed for
 
     def get_nodes(self, parameters={}):
         """
@@ -43,12 +61,22 @@ class Geometry2D:
         """
         return self.nodes
 
+    @classmethod
+    def as_nodes(cls, points):
+        """
+        Converts points to a node array of the type node_dtype. Arrays of that type are not copied.
+        :param points: The points
+        :return: The nodes as array of the shape (N, 2)
+        """
+        return np.asarray(points, dtype=cls.node_dtype).reshape(-1, 2)
+
     def set_nodes(self, nodes):
         """
         Sets new nodes
-        :param nodes: A new set of nodes
+        :param nodes: A new set of nodes, converted to node_dtype
         """
-        self.nodes = nodes
+        self.nodes = self.as_nodes(nodes) if nodes is not None else None
+        self.mark_modified()
 
     def update_node(self, index, value):
         """
@@ -57,6 +85,16 @@ class Geometry2D:
         :param value: The new value
         """
         self.nodes[index] = value
+        self.mark_modified()
+
+    def move_nodes(self, indices, distance):
+        """
+        Moves a subset of the nodes by given distance
+        :param indices: The node indices
+        :param distance: The movement distance
+        """
+        self.nodes[indices] += distance
+        self.mark_modified()
 
     def move_by(self, distance):
         """
@@ -64,6 +102,131 @@ class Geometry2D:
         :param distance: The movement distance
         """
         self.nodes[:] += distance
+        self.mark_modified()
+
+    def mark_modified(self):
+        """
+        Marks the geometry as modified so viewers re-render it. Call this after modifying the geometry's nodes or
+        visual properties directly.
+        """
+        if self._bounds_version is not None:  # Remember the region covered before the modification
+            self.dirty_bounds = self.get_bounds_union(self.dirty_bounds, self._bounds)
+        self.version += 1
+
+    @staticmethod
+    def get_bounds_union(bounds_a, bounds_b):
+        """
+        Returns the bounding box enclosing two bounding boxes
+        :param bounds_a: The first bounding box or None
+        :param bounds_b: The second bounding box or None
+        :return: The enclosing bounding box, None if both are None
+        """
+        if bounds_a is None:
+            return bounds_b
+        if bounds_b is None:
+            return bounds_a
+        return (min(bounds_a[0], bounds_b[0]), min(bounds_a[1], bounds_b[1]),
+                max(bounds_a[2], bounds_b[2]), max(bounds_a[3], bounds_b[3]))
+
+    def get_dirty_bounds(self):
+        """
+        Returns the region which needs to be redrawn due to modifications since the last clear_dirty_bounds call
+        :return: The region covered before and after the modifications, None if unknown
+        """
+        if self.dirty_bounds is None:
+            return None
+        return self.get_bounds_union(self.dirty_bounds, self.get_bounding_box())
+
+    def clear_dirty_bounds(self):
+        """
+        Resets the dirty region, e.g. after the modification was processed
+        """
+        self.dirty_bounds = None
+
+    def get_bounding_box(self):
+        """
+        Returns the geometry's bounding box. It is cached until the geometry is modified.
+        :return: The bounding box in the form minX, minY, maxX, maxY. None if the geometry has no nodes
+        """
+        if self._bounds_version != self.version:
+            self._bounds = self.compute_bounding_box()
+            self._bounds_version = self.version
+        return self._bounds
+
+    def compute_bounding_box(self):
+        """
+        Computes the geometry's bounding box
+        :return: The bounding box in the form minX, minY, maxX, maxY. None if the geometry has no nodes
+        """
+        if self.nodes is None or len(self.nodes) == 0:
+            return None
+        min_coord = self.nodes.min(axis=0)
+        max_coord = self.nodes.max(axis=0)
+        return float(min_coord[0]), float(min_coord[1]), float(max_coord[0]), float(max_coord[1])
+
+    @staticmethod
+    def simplify_polyline(points, tolerance):
+        """
+        Simplifies a polyline using the Douglas-Peucker algorithm
+        :param points: The points as array of the shape (N, 2)
+        :param tolerance: The maximum distance of a removed point to the simplified polyline
+        :return: A boolean mask of the shape (N,) marking the points to keep
+        """
+        count = len(points)
+        keep = np.zeros(count, dtype=bool)
+        if count == 0:
+            return keep
+        keep[0] = keep[-1] = True
+        tolerance_sqr = tolerance ** 2
+        stack = [(0, count - 1)]
+        while len(stack) > 0:
+            first, last = stack.pop()
+            if last - first < 2:
+                continue
+            start = points[first]
+            direction = points[last] - start
+            inner = points[first + 1:last] - start
+            length_sqr = direction.dot(direction)
+            if length_sqr > 0.0:
+                t = np.clip(inner.dot(direction) / length_sqr, 0.0, 1.0)
+                distances_sqr = ((inner - t[:, np.newaxis] * direction) ** 2).sum(axis=1)
+            else:  # Closed polyline, measure the distance to the start point
+                distances_sqr = (inner ** 2).sum(axis=1)
+            index = int(np.argmax(distances_sqr))
+            if distances_sqr[index] > tolerance_sqr:
+                split = first + 1 + index
+                keep[split] = True
+                stack.append((first, split))
+                stack.append((split, last))
+        return keep
+
+    def get_lod_nodes(self, transformation: Transformation2D):
+        """
+        Returns the nodes to render with given transformation, simplified so that the deviation on screen stays below
+        lod_tolerance. The simplified nodes are cached per power of two tolerance until the geometry is modified.
+        :param transformation: The transformation
+        :return: The nodes. A single node if the geometry does not cover more than a pixel on screen.
+        """
+        nodes = self.nodes
+        pixels_per_unit = transformation.get_pixels_per_unit()
+        if self.lod_tolerance <= 0.0 or nodes is None or len(nodes) < 2 or pixels_per_unit <= 0.0:
+            return nodes
+        if self._lod_cache_version != self.version:
+            self._lod_cache = {}
+            self._lod_cache_version = self.version
+        level = math.floor(math.log2(self.lod_tolerance / pixels_per_unit))
+        simplified = self._lod_cache.get(level, None)
+        if simplified is None:
+            tolerance = 2.0 ** level
+            extent = nodes.max(axis=0) - nodes.min(axis=0)
+            if extent.max() < tolerance * 2.0:  # Sub pixel sized
+                simplified = nodes.mean(axis=0).reshape(1, 2)
+            elif len(nodes) > 2:
+                simplified = nodes[self.simplify_polyline(nodes, tolerance)]
+            else:
+                simplified = nodes
+            self._lod_cache[level] = simplified
+        return simplified
 
     def get_editable_nodes(self):
         """
@@ -81,13 +244,34 @@ class Geometry2D:
         :param geometry_out: The geometry dictionary
         :param points: The points of the line strip
         """
-        if geometry_out is not None:
+        if geometry_out is None:
             return
         line_list = geometry_out.get(self.GO_TAG_LINE_LIST, None)
         if line_list is None:
             line_list = geometry_out[self.GO_TAG_LINE_LIST] = []
         line_list.append({self.GO_TAG_OWNER: self, self.GO_TAG_LINE_LIST_LINES: points})
 
+    def get_silhouette(self):
+        """
+        Returns the lines and triangles outlining the geometry in geometry coordinates, e.g. for hit testing. The
+        silhouette is cached until the geometry is modified.
+        :return: A dictionary in the geometry out format, see render_to_kivy
+        """
+        if self._silhouette_version != self.version:
+            self._silhouette = {}
+            self.add_silhouette(self._silhouette)
+            self._silhouette_version = self.version
+        return self._silhouette
+
+    def add_silhouette(self, geometry_out):
+        """
+        Adds the geometry's silhouette in geometry coordinates to a geometry out dictionary. The default
+        implementation adds the line strip through all nodes.
+        :param geometry_out: The geometry out dictionary, see render_to_kivy
+        """
+        if self.nodes is not None and len(self.nodes) > 0:
+            self.add_lines_to_geometry_list(geometry_out, self.nodes)
+
     def render_to_kivy(self, target, transformation: Transformation2D, parameters={}, geometry_out=None):
         """
         Called when the geometry shall be rendered to kivy.
@@ -118,6 +302,14 @@ class Geometry2D:
                 "vertices": [List of 2D coordinates],
                 "indices": [list of indices pointing to coordinates]
             }
+            ],
+            "triangles":
+            [
+            {
+                "owner": The owning geometry object,
+                "vertices": [List of 2D coordinates],
+                "indices": [list of indices pointing to coordinates, three per triangle]
+            }
             ]
         """
         pass
@@ -128,7 +320,56 @@ class Geometry2D:
         :param options: Storage options, see OPTION_
         :return: The geometry stored in a dictionary
         """
-        result = {'nodes': self.nodes.tolist(), 'tag': self.tag, 'type': self.geometry_class_name}
+        result = {'nodes': self.nodes.tolist() if self.nodes is not None else [], 'tag': self.tag,
+                  'type': self.geometry_class_name}
         if options.get(self.OPTION_VISUAL_DETAILS, True):
             result['color'] = self.color
         return result
+
+    def apply_dict(self, data):
+        """
+        Restores the properties stored by to_dict
+        :param data: The dictionary
+        """
+        self.tag = data.get('tag', '')
+        if 'color' in data:
+            self.color = tuple(data['color'])
+        nodes = data.get('nodes', None)
+        if nodes is not None and len(nodes) > 0:
+            self.set_nodes(np.array(nodes, dtype=self.node_dtype).reshape(-1, 2))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates a geometry from a dictionary created by to_dict
+        :param data: The dictionary
+        :return: The geometry
+        """
+        geometry = cls()
+        geometry.apply_dict(data)
+        return geometry
+
+
+class _TestGeometry2D(TestCase):
+    """
+    Unit tests for class Geometry2D
+    """
+
+    def test_compact_nodes(self):
+        """
+        Tests the float32 node storage and the slot based storage
+        """
+        node_dtype = Geometry2D.node_dtype
+        Geometry2D.node_dtype = np.float32
+        try:
+            geometry = Geometry2D()
+            geometry.set_nodes([(1, 2), (3, 4)])
+            self.assertEqual(geometry.nodes.dtype, np.float32)
+            geometry.move_nodes([1], np.array([0.5, 0.5]))
+            geometry.move_by(np.array([1.0, 1.0]))
+            self.assertEqual(geometry.nodes.dtype, np.float32)
+            self.assertTrue(np.allclose(geometry.nodes, [(2.0, 3.0), (4.5, 5.5)]))
+        finally:
+            Geometry2D.node_dtype = node_dtype
+        self.assertEqual(Geometry2D.as_nodes([(0, 0)]).dtype, np.float64)
+        self.assertFalse(hasattr(Geometry2D(), '__dict__'))
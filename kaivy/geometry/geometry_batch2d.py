@@ -0,0 +1,316 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+import numpy as np
+from unittest import TestCase
+from kaivy.geometry.geometry2d import Geometry2D
+from kaivy.geometry.transformation2d import Transformation2D
+from kaivy.graphics.mesh_builder import MeshBuilder
+
+
+class GeometryBatch2D(Geometry2D):
+    """
+    Stores thousands of polylines, boxes or points of the same primitive type in flat numpy arrays and renders them
+    with one mesh per color instead of one instruction per element.
+
+    All nodes are stored in the nodes array of the shape (N, 2). The elements are defined by the offsets array in
+    which element i owns the nodes offsets[i] to offsets[i + 1]. A box element is defined by two nodes, its lower
+    left and upper right corner, a point element by a single node.
+    """
+
+    PRIMITIVE_POLYLINE = 'polyline'  # Each element is a line strip
+    PRIMITIVE_BOX = 'box'  # Each element is a box defined by two corners
+    PRIMITIVE_POINT = 'point'  # Each element is a point
+
+    GO_TAG_ELEMENT = "element"  # The index of the element a geometry out entry belongs to
+
+    __slots__ = ('primitive', 'width', 'closed', 'offsets', 'colors', 'widths')
+
+    def __init__(self, primitive=PRIMITIVE_POLYLINE, color=(1.0, 1.0, 1.0, 1.0), width=1.0, closed=False):
+        """
+        Initializer
+        :param primitive: The primitive type, see PRIMITIVE_
+        :param color: The default color of new elements
+        :param width: The default line width (or point size) of new elements in pixels
+        :param closed: Defines if polylines shall be closed
+        """
+        super().__init__()
+        self.geometry_class_name = 'GeometryBatch2D'
+        self.primitive = primitive  # The primitive type
+        self.color = color
+        self.width = width  # The default line width of new elements
+        self.closed = closed  # Defines if polylines are closed
+        self.nodes = np.zeros((0, 2), dtype=self.node_dtype)
+        self.offsets = np.zeros(1, dtype=np.int64)  # The node offset of each element plus the total node count
+        self.colors = np.zeros((0, 4))  # The color of each element
+        self.widths = np.zeros(0)  # The line width (or point size) of each element
+
+    def get_element_count(self):
+        """
+        Returns the count of elements
+        :return: The element count
+        """
+        return len(self.offsets) - 1
+
+    def get_element_ids(self):
+        """
+        Returns the element index of each node
+        :return: An array of the shape (N,)
+        """
+        return np.repeat(np.arange(self.get_element_count()), np.diff(self.offsets))
+
+    def set_elements(self, nodes, offsets, colors=None, widths=None):
+        """
+        Replaces all elements at once
+        :param nodes: All nodes as array of the shape (N, 2)
+        :param offsets: The start offset of each element plus the total node count
+        :param colors: The colors as array of the shape (K, 4). None = the default color
+        :param widths: The widths as array of the shape (K,). None = the default width
+        """
+        self.nodes = self.as_nodes(nodes)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        count = self.get_element_count()
+        self.colors = np.array(np.broadcast_to(np.asarray(colors if colors is not None else self.color, dtype=float),
+                                               (count, 4)))
+        self.widths = np.array(np.broadcast_to(np.asarray(widths if widths is not None else self.width, dtype=float),
+                                               (count,)))
+        self.mark_modified()
+
+    def add_element(self, nodes, color=None, width=None):
+        """
+        Adds a single element. Prefer set_elements for adding many elements.
+        :param nodes: The element's nodes
+        :param color: The element's color. None = the default color
+        :param width: The element's width. None = the default width
+        :return: The element's index
+        """
+        self.nodes = np.concatenate([self.nodes, self.as_nodes(nodes)])
+        self.offsets = np.append(self.offsets, len(self.nodes))
+        self.colors = np.concatenate([self.colors, [color if color is not None else self.color]])
+        self.widths = np.append(self.widths, width if width is not None else self.width)
+        self.mark_modified()
+        return self.get_element_count() - 1
+
+    def remove_element(self, index):
+        """
+        Removes a single element
+        :param index: The element's index
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+        self.nodes = np.delete(self.nodes, np.s_[start:end], axis=0)
+        self.offsets = np.delete(self.offsets, index + 1)
+        self.offsets[index + 1:] -= end - start
+        self.colors = np.delete(self.colors, index, axis=0)
+        self.widths = np.delete(self.widths, index)
+        self.mark_modified()
+
+    def get_element_nodes(self, index):
+        """
+        Returns the nodes of a single element
+        :param index: The element's index
+        :return: A view on the element's nodes
+        """
+        return self.nodes[self.offsets[index]:self.offsets[index + 1]]
+
+    def set_element_nodes(self, index, nodes):
+        """
+        Replaces the nodes of a single element
+        :param index: The element's index
+        :param nodes: The new nodes
+        """
+        nodes = self.as_nodes(nodes)
+        start, end = self.offsets[index], self.offsets[index + 1]
+        if len(nodes) == end - start:
+            self.nodes[start:end] = nodes
+        else:
+            self.nodes = np.concatenate([self.nodes[:start], nodes, self.nodes[end:]])
+            self.offsets[index + 1:] += len(nodes) - (end - start)
+        self.mark_modified()
+
+    def move_element_by(self, index, distance):
+        """
+        Moves a single element
+        :param index: The element's index
+        :param distance: The movement distance
+        """
+        self.nodes[self.offsets[index]:self.offsets[index + 1]] += distance
+        self.mark_modified()
+
+    def get_element_bounding_boxes(self):
+        """
+        Returns the bounding boxes of all elements
+        :return: An array of the shape (K, 4) holding minX, minY, maxX, maxY of each element
+        """
+        if len(self.nodes) == 0:
+            return np.zeros((0, 4))
+        starts = self.offsets[:-1]
+        min_coords = np.minimum.reduceat(self.nodes, starts, axis=0)
+        max_coords = np.maximum.reduceat(self.nodes, starts, axis=0)
+        return np.concatenate([min_coords, max_coords], axis=1)
+
+    def get_editable_nodes(self):  # Overrides Geometry2D.get_editable_nodes
+        node_colors = self.colors[self.get_element_ids()]
+        return [(self, index, element, tuple(node_colors[index])) for index, element in enumerate(self.nodes)]
+
+    def get_segments(self, nodes, node_mask=None):
+        """
+        Returns the line segments of all elements
+        :param nodes: The (transformed) nodes
+        :param node_mask: Optional. A boolean mask of the nodes to use, e.g. of simplified elements
+        :return: The start points, end points and element indices of all segments
+        """
+        element_ids = self.get_element_ids()
+        if self.primitive == self.PRIMITIVE_BOX:
+            min_coords, max_coords = nodes[self.offsets[:-1]], nodes[self.offsets[:-1] + 1]
+            lower_right = np.stack([max_coords[:, 0], min_coords[:, 1]], axis=1)
+            upper_left = np.stack([min_coords[:, 0], max_coords[:, 1]], axis=1)
+            starts = np.concatenate([min_coords, lower_right, max_coords, upper_left])
+            ends = np.concatenate([lower_right, max_coords, upper_left, min_coords])
+            segment_ids = np.tile(np.arange(self.get_element_count()), 4)
+            if node_mask is not None:
+                valid = node_mask[self.offsets[:-1]][segment_ids]
+                starts, ends, segment_ids = starts[valid], ends[valid], segment_ids[valid]
+            return starts, ends, segment_ids
+        if node_mask is not None:
+            nodes, element_ids = nodes[node_mask], element_ids[node_mask]
+        valid = element_ids[:-1] == element_ids[1:]  # Segments may not connect two elements
+        starts, ends, segment_ids = nodes[:-1][valid], nodes[1:][valid], element_ids[:-1][valid]
+        if self.closed and len(element_ids) > 0:
+            changes = np.flatnonzero(element_ids[:-1] != element_ids[1:])
+            first = np.concatenate([[0], changes + 1])
+            last = np.concatenate([changes, [len(element_ids) - 1]])
+            starts = np.concatenate([starts, nodes[last]])
+            ends = np.concatenate([ends, nodes[first]])
+            segment_ids = np.concatenate([segment_ids, element_ids[first]])
+        return starts, ends, segment_ids
+
+    def get_lod_node_mask(self, nodes, transformation: Transformation2D):
+        """
+        Selects the nodes to render for given transformation. Elements not covering more than a pixel on screen are
+        excluded completely, polylines drop nodes which are located in the same tolerance sized screen cell as their
+        predecessor.
+        :param nodes: The transformed nodes
+        :param transformation: The transformation
+        :return: A boolean mask of the nodes to use and a boolean mask of the sub pixel sized elements
+        """
+        pixels_per_unit = transformation.get_pixels_per_unit()
+        bounding_boxes = self.get_element_bounding_boxes()
+        extents = np.maximum(bounding_boxes[:, 2] - bounding_boxes[:, 0], bounding_boxes[:, 3] - bounding_boxes[:, 1])
+        tiny = extents * pixels_per_unit < 1.0
+        node_mask = ~tiny[self.get_element_ids()]
+        if self.primitive == self.PRIMITIVE_POLYLINE and len(nodes) > 1:
+            cells = np.floor(nodes / (self.lod_tolerance * transformation.get_pixel_size()))
+            moved = np.ones(len(nodes), dtype=bool)
+            moved[1:] = (cells[1:] != cells[:-1]).any(axis=1)
+            moved[self.offsets[:-1][self.offsets[:-1] < len(nodes)]] = True  # Keep the first and last node
+            moved[self.offsets[1:][self.offsets[1:] > 0] - 1] = True
+            node_mask &= moved
+        return node_mask, tiny
+
+    def render_to_kivy(self, target, transformation: Transformation2D, parameters={}, geometry_out=None):
+        if self.get_element_count() == 0:
+            return
+        nodes = transformation.transform(self.nodes)
+        widths = self.widths * transformation.get_pixel_size()
+        unique_colors, color_ids = np.unique(self.colors, axis=0, return_inverse=True)
+        color_ids = color_ids.reshape(-1)
+
+        if self.primitive == self.PRIMITIVE_POINT:
+            element_ids = self.get_element_ids()
+            for color_index, color in enumerate(unique_colors):
+                selection = color_ids[element_ids] == color_index
+                builder = MeshBuilder()
+                builder.add_points(nodes[selection], widths[element_ids[selection]])
+                builder.build(target, tuple(color))
+            return
+
+        node_mask, tiny = None, np.zeros(self.get_element_count(), dtype=bool)
+        if self.lod_tolerance > 0.0:
+            node_mask, tiny = self.get_lod_node_mask(nodes, transformation)
+        starts, ends, segment_ids = self.get_segments(nodes, node_mask)
+        tiny_indices = np.flatnonzero(tiny)
+        tiny_centers = nodes[self.offsets[:-1][tiny_indices]]
+        for color_index, color in enumerate(unique_colors):
+            selection = color_ids[segment_ids] == color_index
+            builder = MeshBuilder()
+            builder.add_line_segments(starts[selection], ends[selection], widths[segment_ids[selection]])
+            tiny_selection = color_ids[tiny_indices] == color_index  # Sub pixel sized elements are drawn as dots
+            builder.add_points(tiny_centers[tiny_selection], widths[tiny_indices[tiny_selection]])
+            builder.build(target, tuple(color))
+
+        if geometry_out is not None:
+            self.add_element_lines(geometry_out, nodes)
+
+    def add_element_lines(self, geometry_out, nodes):
+        """
+        Adds the outline of each element to a geometry out dictionary
+        :param geometry_out: The geometry out dictionary, see render_to_kivy
+        :param nodes: The (transformed) nodes
+        """
+        line_list = geometry_out.get(self.GO_TAG_LINE_LIST, None)
+        if line_list is None:
+            line_list = geometry_out[self.GO_TAG_LINE_LIST] = []
+        closed = self.closed or self.primitive == self.PRIMITIVE_BOX
+        for index in range(self.get_element_count()):
+            if self.primitive == self.PRIMITIVE_BOX:
+                min_coord, max_coord = nodes[self.offsets[index]], nodes[self.offsets[index] + 1]
+                lines = np.array([min_coord, [max_coord[0], min_coord[1]], max_coord,
+                                  [min_coord[0], max_coord[1]]])
+            else:
+                lines = nodes[self.offsets[index]:self.offsets[index + 1]]
+            if closed:
+                lines = np.concatenate([lines, lines[:1]])
+            line_list.append({self.GO_TAG_OWNER: self, self.GO_TAG_LINE_LIST_LINES: lines,
+                              self.GO_TAG_ELEMENT: index})
+
+    def add_silhouette(self, geometry_out):  # Overrides Geometry2D.add_silhouette
+        if self.get_element_count() > 0:
+            self.add_element_lines(geometry_out, self.nodes)
+
+    def to_dict(self, options):  # Overrides Geometry2D to_dict
+        result = super().to_dict(options)
+        result['primitive'] = self.primitive
+        result['offsets'] = self.offsets.tolist()
+        result['closed'] = self.closed
+        if options.get(self.OPTION_VISUAL_DETAILS, True):
+            result['colors'] = self.colors.tolist()
+            result['widths'] = self.widths.tolist()
+        return result
+
+    @classmethod
+    def from_dict(cls, data):  # Overrides Geometry2D.from_dict
+        geometry = cls(primitive=data.get('primitive', cls.PRIMITIVE_POLYLINE), closed=data.get('closed', False))
+        geometry.tag = data.get('tag', '')
+        if 'color' in data:
+            geometry.color = tuple(data['color'])
+        geometry.set_elements(data['nodes'], data['offsets'],
+                              colors=data.get('colors', None), widths=data.get('widths', None))
+        return geometry
+
+
+class _TestGeometryBatch2D(TestCase):
+    """
+    Unit tests for class GeometryBatch2D
+    """
+
+    def test_compact_nodes(self):
+        """
+        Tests that the element mutators keep float32 nodes and the slot based storage
+        """
+        node_dtype = Geometry2D.node_dtype
+        Geometry2D.node_dtype = np.float32
+        try:
+            batch = GeometryBatch2D()
+            batch.add_element([(0, 0), (1, 1)])
+            batch.set_element_nodes(0, np.array([(0.0, 0.0), (2.0, 2.0), (3.0, 0.0)]))
+            batch.move_element_by(0, np.array([1.0, 0.0]))
+            self.assertEqual(batch.nodes.dtype, np.float32)
+            self.assertTrue(np.allclose(batch.nodes, [(1.0, 0.0), (3.0, 2.0), (4.0, 0.0)]))
+        finally:
+            Geometry2D.node_dtype = node_dtype
+        self.assertFalse(hasattr(batch, '__dict__'))
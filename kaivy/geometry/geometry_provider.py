@@ -7,25 +7,133 @@
 ########################################################################################################################
 
 from kaivy.geometry.geometry2d import Geometry2D
+from kaivy.geometry.geometry_storage import GeometryStorage
 from typing import List
+from unittest import TestCase
+import numpy as np
 
 
 class GeometryProvider:
     """
     The geometry provider is an interface which enables geometry viewers and editors to access geometry data of an
     arbitrary source.
+
+    Every call of add_geometry, remove_geometry and update_geometry increases the provider's version and is recorded
+    in a change log, so consumers such as views, indices or savers can process only what changed since the version
+    they saw last, see get_changes. Listeners registered via add_change_listener are called on every change.
+    Modifying geometry_list directly bypasses the change log, call reset_changes afterwards.
     """
 
+    CHANGE_ADDED = 'added'  # A geometry was added
+    CHANGE_REMOVED = 'removed'  # A geometry was removed
+    CHANGE_MODIFIED = 'modified'  # A geometry was modified
+
     def __init__(self):
         """
         Initializer
         """
         self.geometry_list: List[Geometry2D] = []  # The geometry data
+        self.version = 0  # Increased with every change
+        self.change_log = []  # List of (version, change type, geometry) tuples, see CHANGE_
+        self.change_log_start = 0  # The oldest version the change log can report changes since
+        self.max_change_log_size = 10000  # The maximum count of changes kept
+        self.change_listeners = []  # Callbacks receiving (provider, change type, geometry)
+
+    def add_geometry(self, geometry: Geometry2D):
+        """
+        Adds a geometry
+        :param geometry: The new geometry
+        """
+        self.geometry_list.append(geometry)
+        self.notify_change(self.CHANGE_ADDED, geometry)
+
+    def remove_geometry(self, geometry: Geometry2D):
+        """
+        Removes a geometry
+        :param geometry: The geometry to remove
+        """
+        if geometry in self.geometry_list:
+            self.geometry_list.remove(geometry)
+            self.notify_change(self.CHANGE_REMOVED, geometry)
+
+    def update_geometry(self, geometry: Geometry2D):
+        """
+        Is called after a geometry was modified, e.g. when its nodes were moved
+        :param geometry: The modified geometry
+        """
+        self.notify_change(self.CHANGE_MODIFIED, geometry)
+
+    def add_change_listener(self, listener):
+        """
+        Registers a callback which is called on every change
+        :param listener: The callback, receiving the provider, the change type (see CHANGE_) and the geometry. The
+        geometry is None if the whole content was replaced.
+        """
+        if listener not in self.change_listeners:
+            self.change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        """
+        Unregisters a change callback
+        :param listener: The callback
+        """
+        if listener in self.change_listeners:
+            self.change_listeners.remove(listener)
+
+    def notify_change(self, change_type, geometry: Geometry2D):
+        """
+        Records a change and notifies all listeners
+        :param change_type: The change type, see CHANGE_
+        :param geometry: The geometry affected
+        """
+        self.version += 1
+        self.change_log.append((self.version, change_type, geometry))
+        if len(self.change_log) > self.max_change_log_size:
+            removed = len(self.change_log) - self.max_change_log_size
+            self.change_log_start = self.change_log[removed - 1][0]
+            del self.change_log[:removed]
+        for listener in list(self.change_listeners):
+            listener(self, change_type, geometry)
+
+    def reset_changes(self):
+        """
+        Discards the change log, e.g. after the whole content was replaced. Consumers have to reload everything.
+        """
+        self.version += 1
+        self.change_log = []
+        self.change_log_start = self.version
+        for listener in list(self.change_listeners):
+            listener(self, None, None)
+
+    def get_changes(self, since_version):
+        """
+        Returns the changes since given version. Multiple changes of the same geometry are combined, e.g. a geometry
+        added and removed again is not reported at all.
+        :param since_version: The provider version the consumer is up to date with
+        :return: The lists of added, removed and modified geometries. None if the changes are not known anymore, in
+        this case the consumer has to reload everything.
+        """
+        if since_version < self.change_log_start:
+            return None
+        states = {}  # Dictionary of geometry -> [was present before, is present now]
+        first = len(self.change_log)
+        while first > 0 and self.change_log[first - 1][0] > since_version:  # Find the first change after the version
+            first -= 1
+        for _, change_type, geometry in self.change_log[first:]:
+            state = states.get(geometry, None)
+            if state is None:
+                state = states[geometry] = [change_type != self.CHANGE_ADDED, True]
+            state[1] = change_type != self.CHANGE_REMOVED
+        added = [geometry for geometry, state in states.items() if not state[0] and state[1]]
+        removed = [geometry for geometry, state in states.items() if state[0] and not state[1]]
+        modified = [geometry for geometry, state in states.items() if state[0] and state[1]]
+        return added, removed, modified
 
     def get_geometry(self, region=None) -> List[Geometry2D]:
         """
         Returns the list of all geometries in given region
-        :param region: The region to receive. If None is passed all elements will be returned
+        :param region: The region to receive in the form minX, minY, maxX, maxY. If None is passed all elements will
+        be returned. The base provider ignores the region and always returns all elements.
         :return:
         """
         return self.geometry_list
@@ -39,3 +147,52 @@ class GeometryProvider:
         element_list = [cur_element.to_dict(options) for cur_element in self.geometry_list]
         result = {'elements': element_list}
         return result
+
+    def save_binary(self, path, options={}):
+        """
+        Stores all elements in a compact binary file, see GeometryStorage
+        :param path: The file path
+        :param options: The storage options, see Geometry2D.OPTION_
+        """
+        GeometryStorage.save(self.geometry_list, path, options)
+
+    def load_binary(self, path):
+        """
+        Replaces all elements by the elements stored in a binary file. The elements are only created when they are
+        accessed the first time, see GeometryStorage.load.
+        :param path: The file path
+        """
+        self.geometry_list = GeometryStorage.load(path)
+        self.reset_changes()
+
+
+class _TestGeometryProvider(TestCase):
+    """
+    Unit tests for class GeometryProvider
+    """
+
+    def test_change_feed(self):
+        """
+        Tests the change log, the listeners and the dirty bounds
+        """
+        provider = GeometryProvider()
+        received = []
+        provider.add_change_listener(lambda _, change_type, geometry: received.append(change_type))
+        first, second, third = Geometry2D(), Geometry2D(), Geometry2D()
+        for geometry in (first, second, third):
+            geometry.nodes = np.array([[0.0, 0.0], [1.0, 1.0]])
+            provider.add_geometry(geometry)
+        version = provider.version
+        self.assertEqual(first.get_bounding_box(), (0.0, 0.0, 1.0, 1.0))
+        first.move_by(np.array([5.0, 0.0]))
+        self.assertEqual(first.get_dirty_bounds(), (0.0, 0.0, 6.0, 1.0))
+        provider.update_geometry(first)
+        provider.remove_geometry(second)
+        fourth = Geometry2D()
+        provider.add_geometry(fourth)
+        provider.remove_geometry(fourth)
+        self.assertEqual(provider.get_changes(version), ([], [second], [first]))
+        self.assertEqual(len(received), 7)
+        provider.max_change_log_size = 2
+        provider.update_geometry(third)
+        self.assertIsNone(provider.get_changes(version))
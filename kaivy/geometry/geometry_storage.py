@@ -0,0 +1,265 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+import os
+import json
+import struct
+import tempfile
+from collections.abc import MutableSequence
+from unittest import TestCase
+import numpy as np
+from kaivy.geometry.geometry2d import Geometry2D
+from kaivy.geometry.line2d import Line2D
+from kaivy.geometry.arc2d import Arc2D
+from kaivy.geometry.polygon2d import Polygon2D
+from kaivy.geometry.geometry_batch2d import GeometryBatch2D
+
+
+class LazyGeometryList(MutableSequence):
+    """
+    A list of geometries loaded from a binary geometry file. The stored elements are only converted to Geometry2D
+    objects when they are accessed the first time, until then their nodes stay memory mapped.
+
+    The list can be modified like a regular list. Membership tests and index lookups compare by identity and do not
+    materialize the stored elements. Stored elements can also be accessed by their index within the file via
+    get_stored_geometry, e.g. by a spatial index built from the stored bounds.
+    """
+
+    def __init__(self, nodes, offsets, bounds, metadata_index, metadata):
+        """
+        Initializer
+        :param nodes: All nodes as array of the shape (N, 2)
+        :param offsets: The node offset of each element plus the total node count
+        :param bounds: The bounding box of each element as array of the shape (K, 4), NaN if the element has none
+        :param metadata_index: The index into metadata of each element
+        :param metadata: The list of distinct metadata dictionaries
+        """
+        self.nodes = nodes  # The stored nodes
+        self.offsets = offsets  # The stored node offsets
+        self.bounds = bounds  # The stored bounding boxes
+        self.metadata_index = metadata_index  # The metadata index of each stored element
+        self.metadata = metadata  # The distinct metadata dictionaries
+        self.items = list(range(len(metadata_index)))  # Either a stored element's index or a materialized geometry
+        self.materialized = {}  # Dictionary of stored index -> materialized geometry
+        self.stored_indices = {}  # Dictionary of materialized geometry -> stored index
+
+    def get_stored_nodes(self, stored_index):
+        """
+        Returns the memory mapped nodes of a stored element without materializing it
+        :param stored_index: The element's index within the file
+        :return: A read only view on the nodes
+        """
+        return self.nodes[self.offsets[stored_index]:self.offsets[stored_index + 1]]
+
+    def materialize(self, stored_index) -> Geometry2D:
+        """
+        Creates the geometry object of a stored element
+        :param stored_index: The element's index within the file
+        :return: The geometry
+        """
+        data = dict(self.metadata[self.metadata_index[stored_index]])
+        data['nodes'] = np.array(self.get_stored_nodes(stored_index), dtype=float)  # Copy, the file stays untouched
+        geometry_class = GeometryStorage.GEOMETRY_CLASSES.get(data.get('type', None), Geometry2D)
+        return geometry_class.from_dict(data)
+
+    def get_stored_geometry(self, stored_index) -> Geometry2D:
+        """
+        Returns the geometry of a stored element, materializes it if required. Every element is only materialized once.
+        :param stored_index: The element's index within the file
+        :return: The geometry
+        """
+        geometry = self.materialized.get(stored_index, None)
+        if geometry is None:
+            geometry = self.materialized[stored_index] = self.materialize(stored_index)
+            self.stored_indices[geometry] = stored_index
+        return geometry
+
+    def _get(self, position) -> Geometry2D:
+        """
+        Returns the geometry at given position, materializes it if required
+        :param position: The position within the list
+        :return: The geometry
+        """
+        item = self.items[position]
+        if not isinstance(item, Geometry2D):
+            item = self.items[position] = self.get_stored_geometry(item)
+        return item
+
+    def _is_item(self, item, value):
+        """
+        Returns if a list item refers to given geometry without materializing it
+        :param item: The list item, a stored index or a geometry
+        :param value: The geometry
+        :return: True if the item is or will be materialized to the geometry
+        """
+        if isinstance(item, Geometry2D):
+            return item is value
+        return self.materialized.get(item, None) is value
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(position) for position in range(*index.indices(len(self.items)))]
+        return self._get(index)
+
+    def __setitem__(self, index, value):
+        self.items[index] = value
+
+    def __delitem__(self, index):
+        del self.items[index]
+
+    def insert(self, index, value):
+        self.items.insert(index, value)
+
+    def __contains__(self, value):
+        return any(self._is_item(item, value) for item in self.items)
+
+    def index(self, value, start=0, stop=None):
+        stop = len(self.items) if stop is None else stop
+        for position in range(start, min(stop, len(self.items))):
+            if self._is_item(self.items[position], value):
+                return position
+        raise ValueError('Geometry not in list')
+
+
+class GeometryStorage:
+    """
+    Stores geometry lists in a compact binary file and loads them memory mapped.
+
+    File layout:
+        - 8 bytes magic, 8 bytes header size (unsigned little endian)
+        - The JSON header, holding the array table and the distinct metadata dictionaries
+        - The arrays nodes (N, 2), offsets (K + 1), bounds (K, 4) and metadataIndex (K), each aligned to 64 bytes
+
+    The metadata of an element is its to_dict result without the nodes. Elements sharing the same metadata share a
+    single entry of the metadata table.
+    """
+
+    MAGIC = b'KAIVYGEO'  # The file identifier
+    FORMAT_VERSION = 1  # The current format version
+    ALIGNMENT = 64  # The alignment of the arrays within the file
+    GEOMETRY_CLASSES = {'Geometry2D': Geometry2D, 'Line2D': Line2D, 'Arc2D': Arc2D, 'Polygon2D': Polygon2D,
+                        'GeometryBatch2D': GeometryBatch2D}  # Dictionary of geometry_class_name -> class
+
+    @classmethod
+    def save(cls, geometry_list, path, options={}):
+        """
+        Stores a list of geometries
+        :param geometry_list: The geometries
+        :param path: The target file path
+        :param options: The storage options, see Geometry2D.OPTION_
+        """
+        node_list = []
+        offsets = np.zeros(len(geometry_list) + 1, dtype=np.int64)
+        bounds = np.full((len(geometry_list), 4), np.nan)
+        metadata_index = np.zeros(len(geometry_list), dtype=np.int32)
+        metadata = []
+        metadata_lookup = {}  # Dictionary of serialized metadata -> index
+        for index, geometry in enumerate(geometry_list):
+            data = geometry.to_dict(options)
+            data.pop('nodes', None)
+            nodes = geometry.nodes if geometry.nodes is not None else np.zeros((0, 2))
+            node_list.append(np.asarray(nodes, dtype=np.float64).reshape(-1, 2))
+            offsets[index + 1] = offsets[index] + len(node_list[-1])
+            bounding_box = geometry.get_bounding_box()
+            if bounding_box is not None:
+                bounds[index] = bounding_box
+            key = json.dumps(data, sort_keys=True, default=lambda value: value.tolist())
+            if key not in metadata_lookup:
+                metadata_lookup[key] = len(metadata)
+                metadata.append(data)
+            metadata_index[index] = metadata_lookup[key]
+        nodes = np.concatenate(node_list) if len(node_list) > 0 else np.zeros((0, 2))
+
+        arrays = {'nodes': nodes, 'offsets': offsets, 'bounds': bounds, 'metadataIndex': metadata_index}
+        array_table = {}
+        data_size = 0
+        for name, array in arrays.items():
+            array_table[name] = {'offset': data_size, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            data_size = cls.align(data_size + array.nbytes)
+        header = {'version': cls.FORMAT_VERSION, 'arrays': array_table, 'metadata': metadata}
+        header = json.dumps(header, default=lambda value: value.tolist()).encode('utf-8')
+        data_start = cls.align(16 + len(header))
+
+        with open(path, 'wb') as file:
+            file.write(cls.MAGIC + struct.pack('<Q', len(header)) + header)
+            for name, array in arrays.items():
+                file.write(b'\0' * (data_start + array_table[name]['offset'] - file.tell()))
+                file.write(np.ascontiguousarray(array).tobytes())
+
+    @classmethod
+    def load(cls, path) -> LazyGeometryList:
+        """
+        Loads a list of geometries stored by save. The arrays are memory mapped and the geometries are only created
+        when they are accessed.
+        :param path: The file path
+        :return: The geometry list
+        """
+        with open(path, 'rb') as file:
+            prefix = file.read(16)
+            if len(prefix) != 16 or prefix[0:8] != cls.MAGIC:
+                raise ValueError('{} is no geometry file'.format(path))
+            header_size = struct.unpack('<Q', prefix[8:16])[0]
+            header = json.loads(file.read(header_size).decode('utf-8'))
+        if header.get('version', None) != cls.FORMAT_VERSION:
+            raise ValueError('Unsupported geometry file version {}'.format(header.get('version', None)))
+        data_start = cls.align(16 + header_size)
+        arrays = {}
+        for name, entry in header['arrays'].items():
+            shape = tuple(entry['shape'])
+            if np.prod(shape) == 0:
+                arrays[name] = np.zeros(shape, dtype=entry['dtype'])
+            else:
+                arrays[name] = np.memmap(path, dtype=entry['dtype'], mode='r', offset=data_start + entry['offset'],
+                                         shape=shape)
+        return LazyGeometryList(arrays['nodes'], arrays['offsets'], arrays['bounds'], arrays['metadataIndex'],
+                                header['metadata'])
+
+    @classmethod
+    def align(cls, offset):
+        """
+        Rounds an offset up to the next multiple of ALIGNMENT
+        :param offset: The offset
+        :return: The aligned offset
+        """
+        return (offset + cls.ALIGNMENT - 1) // cls.ALIGNMENT * cls.ALIGNMENT
+
+
+class _TestGeometryStorage(TestCase):
+    """
+    Unit tests for class GeometryStorage
+    """
+
+    def test_round_trip(self):
+        """
+        Tests storing and lazily loading a geometry list
+        """
+        line = Line2D([(0, 0), (10, 5)], width=3.0)
+        line.tag = 'wire'
+        arc = Arc2D((5, 5), 1.0, 4.0, 0.0, 90.0)
+        polygon = Polygon2D([(0, 0), (4, 0), (4, 4)])
+        geometry_list = [line, arc, polygon, Line2D([(1, 1), (2, 2)], width=3.0)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'geometry.kgeo')
+            GeometryStorage.save(geometry_list, path)
+            loaded = GeometryStorage.load(path)
+            self.assertEqual(len(loaded), 4)
+            self.assertEqual(len(loaded.metadata), 4)
+            self.assertTrue(np.allclose(loaded.get_stored_nodes(3), [(1, 1), (2, 2)]))
+            self.assertFalse(any(isinstance(item, Geometry2D) for item in loaded.items))
+            self.assertEqual(loaded[0].tag, 'wire')
+            self.assertEqual(loaded[0].width, 3.0)
+            self.assertTrue(np.allclose(loaded[0].nodes, line.nodes))
+            self.assertTrue(np.allclose(loaded[1].center, arc.center))
+            self.assertAlmostEqual(loaded[2].get_area(), 8.0)
+            first = loaded[0]
+            loaded.remove(first)
+            self.assertEqual(len(loaded), 3)
+            self.assertTrue(np.allclose(loaded.bounds[2], (0, 0, 4, 4)))
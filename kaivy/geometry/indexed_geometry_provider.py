@@ -0,0 +1,167 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+import os
+import tempfile
+from typing import List
+from unittest import TestCase
+import numpy as np
+from kaivy.geometry.geometry2d import Geometry2D
+from kaivy.geometry.geometry_provider import GeometryProvider
+from kaivy.geometry.line2d import Line2D
+from kaivy.geometry.geometry_storage import GeometryStorage, LazyGeometryList
+from kaivy.geometry.spatial_grid2d import SpatialGrid2D
+
+
+class IndexedGeometryProvider(GeometryProvider):
+    """
+    A geometry provider which indexes all geometries by their bounding box in a uniform grid, so get_geometry(region)
+    only returns the elements intersecting the region without walking the whole geometry list.
+
+    Use add_geometry and remove_geometry to modify the content and update_geometry after a geometry was modified. If
+    geometry_list is modified directly rebuild_index has to be called.
+
+    Geometries loaded via load_binary are indexed by their stored bounds under their index within the file and are
+    only materialized when a query returns them or when they are modified.
+    """
+
+    def __init__(self, cell_size=256.0):
+        """
+        Initializer
+        :param cell_size: The edge length of a grid cell in geometry coordinates
+        """
+        super().__init__()
+        self.index = SpatialGrid2D(cell_size=cell_size)  # The spatial index of geometries and stored indices
+        self.order = {}  # Dictionary of index key -> serial number, used to keep the rendering order on queries
+        self.next_serial = 0  # The serial number of the next geometry added
+
+    def rebuild_index(self):
+        """
+        Rebuilds the index from geometry_list
+        """
+        self.index.clear()
+        self.order.clear()
+        self.next_serial = 0
+        if not isinstance(self.geometry_list, LazyGeometryList):
+            for geometry in self.geometry_list:
+                self._index_geometry(geometry)
+            return
+        stored_bounds = self.geometry_list.bounds
+        for item in self.geometry_list.items:  # Index the stored elements without materializing them
+            if isinstance(item, Geometry2D):
+                self._index_geometry(item)
+                continue
+            self.order[item] = self.next_serial
+            self.next_serial += 1
+            bounds = stored_bounds[item]
+            if not np.isnan(bounds[0]):
+                self.index.insert(item, tuple(bounds.tolist()))
+
+    def _index_geometry(self, geometry: Geometry2D):
+        """
+        Adds a geometry to the index
+        :param geometry: The geometry
+        """
+        self.order[geometry] = self.next_serial
+        self.next_serial += 1
+        bounds = geometry.get_bounding_box()
+        if bounds is not None:
+            self.index.insert(geometry, bounds)
+
+    def _resolve_key(self, key) -> Geometry2D:
+        """
+        Returns the geometry of an index key, a stored element is materialized and indexed by its geometry from now on
+        :param key: The index key, a geometry or the index of a stored element
+        :return: The geometry
+        """
+        if isinstance(key, Geometry2D):
+            return key
+        geometry = self.geometry_list.get_stored_geometry(key)
+        self.order[geometry] = self.order.pop(key)
+        bounds = self.index.key_bounds.get(key, None)
+        if bounds is not None:
+            self.index.remove(key)
+            self.index.insert(geometry, bounds)
+        return geometry
+
+    def _claim_key(self, geometry: Geometry2D):
+        """
+        Ensures a geometry is indexed by itself, e.g. if it was materialized by accessing geometry_list
+        :param geometry: The geometry
+        :return: True if the geometry is indexed
+        """
+        if geometry in self.order:
+            return True
+        stored_index = getattr(self.geometry_list, 'stored_indices', {}).get(geometry, None)
+        if stored_index is None or stored_index not in self.order:
+            return False
+        self._resolve_key(stored_index)
+        return True
+
+    def add_geometry(self, geometry: Geometry2D):  # Overrides GeometryProvider.add_geometry
+        super().add_geometry(geometry)
+        self._index_geometry(geometry)
+
+    def remove_geometry(self, geometry: Geometry2D):  # Overrides GeometryProvider.remove_geometry
+        self._claim_key(geometry)
+        super().remove_geometry(geometry)
+        self.index.remove(geometry)
+        self.order.pop(geometry, None)
+
+    def update_geometry(self, geometry: Geometry2D):  # Overrides GeometryProvider.update_geometry
+        if not self._claim_key(geometry):
+            return
+        bounds = geometry.get_bounding_box()
+        if bounds is None:
+            self.index.remove(geometry)
+        else:
+            self.index.update(geometry, bounds)
+        super().update_geometry(geometry)
+
+    def load_binary(self, path):  # Overrides GeometryProvider.load_binary
+        self.geometry_list = GeometryStorage.load(path)
+        self.rebuild_index()
+        self.reset_changes()
+
+    def get_geometry(self, region=None) -> List[Geometry2D]:  # Overrides GeometryProvider.get_geometry
+        if region is None:
+            return self.geometry_list
+        keys = list(self.index.query(region))
+        keys.sort(key=self.order.__getitem__)
+        return [self._resolve_key(key) for key in keys]
+
+
+class _TestIndexedGeometryProvider(TestCase):
+    """
+    Unit tests for class IndexedGeometryProvider
+    """
+
+    def test_lazy_index(self):
+        """
+        Tests that geometries loaded from a binary file are indexed without being materialized
+        """
+        lines = [Line2D([(index * 10.0, 0.0), (index * 10.0 + 5.0, 5.0)]) for index in range(100)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'geometry.kgeo')
+            GeometryStorage.save(lines, path)
+            provider = IndexedGeometryProvider(cell_size=50.0)
+            provider.load_binary(path)
+            self.assertEqual(len(provider.geometry_list.materialized), 0)
+            result = provider.get_geometry((200.0, 0.0, 228.0, 1.0))
+            self.assertEqual([geometry.nodes[0][0] for geometry in result], [200.0, 210.0, 220.0])
+            self.assertEqual(len(provider.geometry_list.materialized), 3)
+            self.assertIs(provider.get_geometry((200.0, 0.0, 201.0, 1.0))[0], result[0])
+            moved = provider.geometry_list[50]  # Materialized by the list, still indexed by its stored index
+            moved.move_by((1000.0, 0.0))
+            provider.update_geometry(moved)
+            self.assertEqual(provider.get_geometry((1500.0, 0.0, 1501.0, 1.0)), [moved])
+            self.assertEqual(provider.get_geometry((500.0, 0.0, 501.0, 1.0)), [])
+            provider.remove_geometry(result[1])
+            self.assertEqual(len(provider.geometry_list), 99)
+            self.assertEqual(provider.get_geometry((200.0, 0.0, 228.0, 1.0)), [result[0], result[2]])
+            self.assertEqual(len(provider.geometry_list.materialized), 4)
@@ -7,9 +7,12 @@
 ########################################################################################################################
 
 import numpy as np
+from unittest import TestCase
 from kaivy.geometry.geometry2d import Geometry2D
 from kaivy.geometry.transformation2d import Transformation2D
-from kivy.graphics import Line, SmoothLine, Color
+from kaivy.geometry.ray2d import Ray2D
+from kaivy.geometry.spatial_grid2d import SpatialGrid2D
+from kivy.graphics import Line, SmoothLine, Color, Rectangle
 
 
 class Line2D(Geometry2D):
@@ -17,6 +20,8 @@ class Line2D(Geometry2D):
     Defines a simple line defined by two points
     """
 
+    __slots__ = ('smooth', 'width')
+
     def __init__(self, points, width=1.0, color=(1.0, 1.0, 1.0, 1.0)):
         """
         Initializer
@@ -24,7 +29,7 @@ class Line2D(Geometry2D):
         """
         super().__init__()
         self.geometry_class_name = 'Line2D'
-        self.set_nodes(np.array(points))
+        self.set_nodes(np.array(points, dtype=self.node_dtype))
         self.smooth = True
         self.color = color
         self.width = width
@@ -32,19 +37,23 @@ class Line2D(Geometry2D):
     def render_to_kivy(self, target, transformation: Transformation2D, parameters={}, geometry_out=None):
         color = parameters.get('color', self.color)
         target.add(Color(*color))
-        nodes = transformation.transform(self.nodes)
+        nodes = transformation.transform(self.get_lod_nodes(transformation))
 
         if geometry_out is not None:
             if self.GO_TAG_LINE_LIST not in geometry_out:  # add line array if still missing
                 geometry_out[self.GO_TAG_LINE_LIST] = []
             geometry_out[self.GO_TAG_LINE_LIST].append({self.GO_TAG_OWNER: self, self.GO_TAG_LINE_LIST_LINES: nodes})
 
+        width = self.width * transformation.get_pixel_size()
+        if len(nodes) == 1:  # Smaller than a pixel, draw a dot
+            target.add(Rectangle(pos=(nodes[0][0] - width * 0.5, nodes[0][1] - width * 0.5), size=(width, width)))
+            return
         nodes = nodes.flatten().tolist()
 
         if self.smooth:
-            target.add(SmoothLine(points=nodes, width=self.width))
+            target.add(SmoothLine(points=nodes, width=width))
         else:
-            target.add(Line(points=nodes, width=self.width))
+            target.add(Line(points=nodes, width=width))
 
     def distance_to_point(self, point, ray=False):
         """
@@ -78,9 +87,112 @@ class Line2D(Geometry2D):
         # d = (np.cross(ap, n) ** 2).sum()**0.5
         return ((point - x) ** 2).sum() ** 0.5, x
 
+    @staticmethod
+    def segments_distance_to_point(segments, point, ray=False):
+        """
+        Returns the distances between many line segments and a given point in a single vectorized pass
+        :param segments: The segments as numpy array of the shape (M, 2, 2), each holding a start and an end point
+        :param point: A 2D coordinate
+        :param ray: Defines if the segments define unbound rays
+        :return: The distances as array of the shape (M,) and the nearest points as array of the shape (M, 2).
+        Degenerated segments (start equal to end) are treated as single points.
+        """
+        starts = segments[:, 0, :]
+        directions = segments[:, 1, :] - starts
+        length_sqr = (directions ** 2).sum(axis=1)
+        ap = np.asarray(point, dtype=float) - starts
+        valid = length_sqr > 0.0
+        t = np.zeros(len(segments))
+        t[valid] = (ap[valid] * directions[valid]).sum(axis=1) / length_sqr[valid]
+        if not ray:
+            t = np.clip(t, 0.0, 1.0)
+        nearest = starts + directions * t[:, np.newaxis]
+        return (((point - nearest) ** 2).sum(axis=1)) ** 0.5, nearest
+
+    @staticmethod
+    def points_segments_distance(points, segments, ray=False):
+        """
+        Returns the distances between many points and many line segments in a single vectorized pass
+        :param points: The points as numpy array of the shape (P, 2)
+        :param segments: The segments as numpy array of the shape (M, 2, 2), each holding a start and an end point
+        :param ray: Defines if the segments define unbound rays
+        :return: The distances as array of the shape (P, M) and the nearest points as array of the shape (P, M, 2)
+        """
+        points = np.asarray(points, dtype=float)[:, np.newaxis, :]
+        starts = segments[np.newaxis, :, 0, :]
+        directions = segments[np.newaxis, :, 1, :] - starts
+        length_sqr = (directions ** 2).sum(axis=2)
+        valid = length_sqr > 0.0
+        t = ((points - starts) * directions).sum(axis=2) / np.where(valid, length_sqr, 1.0)
+        t = np.where(valid, t, 0.0)
+        if not ray:
+            t = np.clip(t, 0.0, 1.0)
+        nearest = starts + directions * t[:, :, np.newaxis]
+        return (((points - nearest) ** 2).sum(axis=2)) ** 0.5, nearest
+
+    @staticmethod
+    def segments_segments_intersection(segments_a, segments_b, cell_size=None):
+        """
+        Finds all intersections between two sets of line segments, e.g. of tracks and trip wires. Collinear segments
+        are not reported.
+        :param segments_a: The first set of segments as numpy array of the shape (N, 2, 2)
+        :param segments_b: The second set of segments as numpy array of the shape (M, 2, 2)
+        :param cell_size: Optional. If provided only segments sharing a grid cell of this size are tested, see
+        SpatialGrid2D.get_candidate_pairs. Otherwise every segment of A is tested against every segment of B.
+        :return: The indices into segments_a, the indices into segments_b and the intersection points (K, 2)
+        """
+        segments_a = np.asarray(segments_a, dtype=float).reshape(-1, 2, 2)
+        segments_b = np.asarray(segments_b, dtype=float).reshape(-1, 2, 2)
+        if cell_size is not None:
+            bounds_a = np.concatenate([segments_a.min(axis=1), segments_a.max(axis=1)], axis=1)
+            bounds_b = np.concatenate([segments_b.min(axis=1), segments_b.max(axis=1)], axis=1)
+            indices_a, indices_b = SpatialGrid2D.get_candidate_pairs(bounds_a, bounds_b, cell_size)
+        else:
+            indices_a, indices_b = [indices.reshape(-1) for indices in
+                                    np.meshgrid(np.arange(len(segments_a)), np.arange(len(segments_b)),
+                                                indexing='ij')]
+        starts_a = segments_a[indices_a, 0]
+        directions_a = segments_a[indices_a, 1] - starts_a
+        starts_b = segments_b[indices_b, 0]
+        directions_b = segments_b[indices_b, 1] - starts_b
+        u, v = Ray2D.ray_ray_intersections(starts_a, directions_a, starts_b, directions_b, pairwise=True)
+        with np.errstate(invalid='ignore'):
+            hit = (u >= 0.0) & (u <= 1.0) & (v >= 0.0) & (v <= 1.0)
+        return indices_a[hit], indices_b[hit], starts_a[hit] + directions_a[hit] * u[hit, np.newaxis]
+
     def to_dict(self,  options):  # Overrides Geometry2D to_dict
         result = super().to_dict(options)
         if options.get(self.OPTION_VISUAL_DETAILS, True):
             result['width'] = self.width
             result['smooth'] = self.smooth
         return result
+
+    @classmethod
+    def from_dict(cls, data):  # Overrides Geometry2D.from_dict
+        geometry = cls(data['nodes'], width=data.get('width', 1.0))
+        geometry.apply_dict(data)
+        geometry.smooth = data.get('smooth', True)
+        return geometry
+
+
+class _TestLine2D(TestCase):
+    """
+    Unit tests for class Line2D
+    """
+
+    def test_compact_nodes(self):
+        """
+        Tests the float32 node storage and the slot based storage
+        """
+        node_dtype = Geometry2D.node_dtype
+        Geometry2D.node_dtype = np.float32
+        try:
+            line = Line2D([(0.0, 0.0), (10.0, 5.0), (20.0, 0.0)])
+            self.assertEqual(line.nodes.dtype, np.float32)
+            line.move_by(np.array([1.0, 1.0]))
+            self.assertEqual(line.nodes.dtype, np.float32)
+            self.assertTrue(np.allclose(line.nodes[1], (11.0, 6.0)))
+        finally:
+            Geometry2D.node_dtype = node_dtype
+        self.assertEqual(Line2D([(0, 0), (1, 1)]).nodes.dtype, np.float64)
+        self.assertFalse(hasattr(line, '__dict__'))
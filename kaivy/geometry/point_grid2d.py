@@ -0,0 +1,165 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+import numpy as np
+from unittest import TestCase
+
+
+class PointGrid2D:
+    """
+    A uniform grid over a point array for nearest point and region queries.
+
+    The points are sorted by their cell once, every query only tests the points of the cells it touches. Moving
+    points within their cell just updates their coordinates, the cell order is only rebuilt when a point changed its
+    cell.
+    """
+
+    def __init__(self, points=None, cell_size=None):
+        """
+        Initializer
+        :param points: Optional. The points as array of the shape (N, 2)
+        :param cell_size: The edge length of a single cell. None = choose automatically, see build
+        """
+        self.points = np.zeros((0, 2))  # The indexed points
+        self.cell_size = 1.0  # The edge length of a single cell
+        self.point_cells = np.zeros((0, 2), dtype=np.int64)  # The cell coordinate of each point
+        self.order = np.zeros(0, dtype=np.int64)  # The point indices sorted by cell
+        self.cell_coords = np.zeros((0, 2), dtype=np.int64)  # The coordinate of each occupied cell
+        self.cell_starts = np.zeros(0, dtype=np.int64)  # The first position of each occupied cell within order
+        self.cell_counts = np.zeros(0, dtype=np.int64)  # The count of points in each occupied cell
+        self.dirty = False  # Defines if the cell order has to be rebuilt
+        if points is not None:
+            self.build(points, cell_size)
+
+    def __len__(self):
+        """
+        Returns the count of points
+        :return: The count of points
+        """
+        return len(self.points)
+
+    def build(self, points, cell_size=None):
+        """
+        Indexes a new set of points
+        :param points: The points as array of the shape (N, 2)
+        :param cell_size: The edge length of a single cell. None = choose it so that a cell holds about four points
+        of an evenly distributed point set
+        """
+        self.points = np.array(points, dtype=float).reshape(-1, 2)
+        if cell_size is None:
+            extent = np.ptp(self.points, axis=0) if len(self.points) > 0 else np.ones(2)
+            area = max(float(extent[0]), 1e-9) * max(float(extent[1]), 1e-9)
+            cell_size = max((area * 4.0 / max(len(self.points), 1)) ** 0.5, 1e-9)
+        self.cell_size = cell_size
+        self.point_cells = self.get_cells(self.points)
+        self.rebuild()
+
+    def get_cells(self, points):
+        """
+        Returns the cells containing given points
+        :param points: The points as array of the shape (N, 2)
+        :return: The cell coordinates as integer array of the shape (N, 2)
+        """
+        return np.floor(points / self.cell_size).astype(np.int64)
+
+    def rebuild(self):
+        """
+        Sorts the points by their cell
+        """
+        self.dirty = False
+        self.order = np.lexsort((self.point_cells[:, 1], self.point_cells[:, 0]))
+        sorted_cells = self.point_cells[self.order]
+        if len(sorted_cells) == 0:
+            self.cell_coords = np.zeros((0, 2), dtype=np.int64)
+            self.cell_starts = np.zeros(0, dtype=np.int64)
+            self.cell_counts = np.zeros(0, dtype=np.int64)
+            return
+        changes = np.any(sorted_cells[1:] != sorted_cells[:-1], axis=1)
+        self.cell_starts = np.flatnonzero(np.concatenate([[True], changes]))
+        self.cell_coords = sorted_cells[self.cell_starts]
+        self.cell_counts = np.diff(np.append(self.cell_starts, len(sorted_cells)))
+
+    def update_points(self, indices, points):
+        """
+        Moves a subset of the points
+        :param indices: The point indices
+        :param points: The new coordinates as array of the shape (len(indices), 2)
+        """
+        self.points[indices] = points
+        cells = self.get_cells(self.points[indices])
+        if np.any(cells != self.point_cells[indices]):
+            self.point_cells[indices] = cells
+            self.dirty = True
+
+    def get_candidates(self, region):
+        """
+        Returns the indices of all points within the cells touched by a region
+        :param region: The region in the form minX, minY, maxX, maxY
+        :return: The point indices
+        """
+        if self.dirty:
+            self.rebuild()
+        min_cell = np.floor(np.array(region[0:2], dtype=float) / self.cell_size)
+        max_cell = np.floor(np.array(region[2:4], dtype=float) / self.cell_size)
+        mask = np.all((self.cell_coords >= min_cell) & (self.cell_coords <= max_cell), axis=1)
+        starts, counts = self.cell_starts[mask], self.cell_counts[mask]
+        if len(counts) == 0:
+            return np.zeros(0, dtype=np.int64)
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return self.order[positions]
+
+    def query_region(self, region):
+        """
+        Returns all points within a region
+        :param region: The region in the form minX, minY, maxX, maxY
+        :return: The point indices
+        """
+        candidates = self.get_candidates(region)
+        points = self.points[candidates]
+        inside = (points[:, 0] >= region[0]) & (points[:, 1] >= region[1]) & \
+                 (points[:, 0] <= region[2]) & (points[:, 1] <= region[3])
+        return candidates[inside]
+
+    def query_nearest(self, point, max_distance, exclude=None):
+        """
+        Returns the point next to a given position
+        :param point: The position
+        :param max_distance: The maximum distance
+        :param exclude: Optional. Point indices to ignore, e.g. the points being dragged
+        :return: The point index, None if no point is closer than max_distance
+        """
+        candidates = self.get_candidates((point[0] - max_distance, point[1] - max_distance,
+                                          point[0] + max_distance, point[1] + max_distance))
+        if exclude is not None and len(candidates) > 0:
+            candidates = candidates[~np.isin(candidates, exclude)]
+        if len(candidates) == 0:
+            return None
+        distances_sqr = ((self.points[candidates] - point) ** 2).sum(axis=1)
+        nearest = int(np.argmin(distances_sqr))
+        return int(candidates[nearest]) if distances_sqr[nearest] < max_distance ** 2 else None
+
+
+class _TestPointGrid2D(TestCase):
+    """
+    Unit tests for class PointGrid2D
+    """
+
+    def test_query(self):
+        """
+        Tests region and nearest point queries before and after moving points
+        """
+        points = np.stack(np.meshgrid(np.arange(100.0), np.arange(50.0)), axis=2).reshape(-1, 2)
+        grid = PointGrid2D(points)
+        self.assertEqual(sorted(grid.query_region((10.5, 20.0, 12.0, 21.0)).tolist()), [2011, 2012, 2111, 2112])
+        self.assertEqual(grid.query_nearest((30.2, 40.1), 1.0), 4030)
+        self.assertEqual(grid.query_nearest((30.2, 40.1), 1.0, exclude=[4030]), 4031)
+        self.assertIsNone(grid.query_nearest((300.0, 40.0), 5.0))
+        grid.update_points([0, 1], [(300.0, 40.0), (0.5, 0.5)])
+        self.assertTrue(grid.dirty)
+        self.assertEqual(grid.query_nearest((300.0, 41.0), 5.0), 0)
+        self.assertEqual(grid.query_region((0.0, 0.0, 0.9, 0.9)).tolist(), [1])
@@ -7,15 +7,42 @@
 ########################################################################################################################
 
 import numpy as np
+from unittest import TestCase
+from kivy.graphics import Line, SmoothLine, Color
+from kivy.graphics.tesselator import Tesselator, WINDING_ODD, TYPE_POLYGONS
+from kaivy.geometry.geometry2d import Geometry2D
+from kaivy.geometry.transformation2d import Transformation2D
+from kaivy.graphics.mesh_builder import MeshBuilder
 
 
-class Polygon2D:
+class Polygon2D(Geometry2D):
     """
     Defines a two dimensional polygon
 
-    In progress.
+    The polygon is closed implicitly, so the last node is connected to the first one. The triangulation used for
+    filling is computed once in geometry coordinates and cached until the nodes are modified.
     """
 
+    __slots__ = ('border_color', 'border_size', 'smooth', '_triangulation', '_triangulation_version')
+
+    def __init__(self, points, color=(1.0, 1.0, 1.0, 0.0), border_color=(1.0, 1.0, 1.0, 1.0), border_size=1.0):
+        """
+        Initializer
+        :param points: The polygon's corner points
+        :param color: The filling color
+        :param border_color: The border color
+        :param border_size: The border size in pixels
+        """
+        super().__init__()
+        self.geometry_class_name = 'Polygon2D'
+        self.set_nodes(np.array(points, dtype=self.node_dtype))
+        self.color = color  # The filling color
+        self.border_color = border_color  # The border color
+        self.border_size = border_size  # The border size in pixels
+        self.smooth = True  # Defines if the border shall be drawn smooth
+        self._triangulation = None  # The cached vertices and triangle indices
+        self._triangulation_version = None  # The version the triangulation was computed for
+
     @staticmethod
     def get_bounding_coords(points):
         """
@@ -26,3 +53,191 @@ class Polygon2D:
         if points is None or len(points) == 0:
             return None
         return np.min(points[:, 0]), np.min(points[:, 1]), np.max(points[:, 0]), np.max(points[:, 1])
+
+    def get_signed_area(self):
+        """
+        Returns the polygon's area using the shoelace formula
+        :return: The area, positive if the nodes are ordered counter clockwise
+        """
+        x, y = self.nodes[:, 0], self.nodes[:, 1]
+        return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+    def get_area(self):
+        """
+        Returns the polygon's area
+        :return: The area
+        """
+        return abs(self.get_signed_area())
+
+    def get_centroid(self):
+        """
+        Returns the polygon's center of mass
+        :return: The centroid as 2D coordinate. The mean of the nodes for degenerated polygons without area.
+        """
+        x, y = self.nodes[:, 0], self.nodes[:, 1]
+        next_x, next_y = np.roll(x, -1), np.roll(y, -1)
+        cross = x * next_y - next_x * y
+        area = cross.sum() * 0.5
+        if area == 0.0:
+            return self.nodes.mean(axis=0)
+        return np.array([((x + next_x) * cross).sum(), ((y + next_y) * cross).sum()]) / (6.0 * area)
+
+    def contains_points(self, points):
+        """
+        Tests which of the given points are located inside the polygon using the even-odd rule
+        :param points: The points as array of the shape (M, 2)
+        :return: A boolean array of the shape (M,)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        result = np.zeros(len(points), dtype=bool)
+        if self.nodes is None or len(self.nodes) < 3:
+            return result
+        bounds = self.get_bounding_box()
+        candidates = np.flatnonzero((points[:, 0] >= bounds[0]) & (points[:, 0] <= bounds[2]) &
+                                    (points[:, 1] >= bounds[1]) & (points[:, 1] <= bounds[3]))
+        if len(candidates) == 0:
+            return result
+        px = points[candidates, 0:1]
+        py = points[candidates, 1:2]
+        x0, y0 = self.nodes[:, 0], self.nodes[:, 1]
+        x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+        spans = (y0 > py) != (y1 > py)  # Edges crossing the horizontal line through each point, (M, N)
+        dy = np.where(y1 != y0, y1 - y0, 1.0)
+        crossing_x = x0 + (py - y0) * (x1 - x0) / dy
+        crossings = (spans & (px < crossing_x)).sum(axis=1)
+        result[candidates] = crossings % 2 == 1
+        return result
+
+    def contains_point(self, point):
+        """
+        Tests if a single point is located inside the polygon
+        :param point: The 2D coordinate
+        :return: True if the point is located inside
+        """
+        return bool(self.contains_points(np.asarray(point).reshape(1, 2))[0])
+
+    def get_triangulation(self):
+        """
+        Returns the polygon's triangulation. It is cached until the polygon is modified.
+        :return: The vertices as array of the shape (V, 2) and the triangle indices as array of the shape (T * 3)
+        """
+        if self._triangulation is not None and self._triangulation_version == self.version:
+            return self._triangulation
+        vertices = []
+        indices = []
+        vertex_count = 0
+        tess = Tesselator()
+        tess.add_contour(self.nodes.reshape(-1).tolist())
+        if len(self.nodes) >= 3 and tess.tesselate(WINDING_ODD, TYPE_POLYGONS):
+            for mesh_vertices, _ in tess.meshes:  # Each mesh is a convex polygon, convert its fan to triangles
+                mesh_vertices = np.array(mesh_vertices, dtype=float).reshape(-1, 4)[:, 0:2]
+                steps = np.arange(1, len(mesh_vertices) - 1)
+                indices.append(np.stack([np.zeros(len(steps), dtype=np.int64), steps, steps + 1],
+                                        axis=1).reshape(-1) + vertex_count)
+                vertices.append(mesh_vertices)
+                vertex_count += len(mesh_vertices)
+        if vertex_count > 0:
+            self._triangulation = (np.concatenate(vertices), np.concatenate(indices))
+        else:
+            self._triangulation = (np.zeros((0, 2)), np.zeros(0, dtype=np.int64))
+        self._triangulation_version = self.version
+        return self._triangulation
+
+    def add_silhouette(self, geometry_out):  # Overrides Geometry2D.add_silhouette
+        if self.nodes is None or len(self.nodes) < 2:
+            return
+        if self.color[3] != 0.0:
+            vertices, indices = self.get_triangulation()
+            geometry_out.setdefault(self.GO_TAG_TRIANGLES, []).append(
+                {self.GO_TAG_OWNER: self, self.GO_TAG_TF_INDICES: indices, self.GO_TAG_TF_VERTICES: vertices})
+        self.add_lines_to_geometry_list(geometry_out, np.concatenate([self.nodes, self.nodes[:1]]))
+
+    def render_to_kivy(self, target, transformation: Transformation2D, parameters={}, geometry_out=None):
+        if self.nodes is None or len(self.nodes) < 2:
+            return
+
+        if self.color[3] != 0.0:  # Inner filling?
+            vertices, indices = self.get_triangulation()
+            transformed_vertices = transformation.transform(vertices)
+            if geometry_out is not None:
+                target_list = geometry_out.get(self.GO_TAG_TRIANGLES, None)
+                if target_list is None:
+                    target_list = geometry_out[self.GO_TAG_TRIANGLES] = []
+                target_list.append({self.GO_TAG_OWNER: self, self.GO_TAG_TF_INDICES: indices,
+                                    self.GO_TAG_TF_VERTICES: transformed_vertices})
+            builder = MeshBuilder()
+            builder.add_triangles(transformed_vertices, indices)
+            builder.build(target, self.color)
+
+        nodes = transformation.transform(self.get_lod_nodes(transformation))
+        outline = np.concatenate([nodes, nodes[:1]])
+        if geometry_out is not None:
+            if self.GO_TAG_LINE_LIST not in geometry_out:  # add line array if still missing
+                geometry_out[self.GO_TAG_LINE_LIST] = []
+            geometry_out[self.GO_TAG_LINE_LIST].append({self.GO_TAG_OWNER: self, self.GO_TAG_LINE_LIST_LINES: outline})
+
+        if self.border_color[3] != 0.0 and self.border_size != 0 and len(nodes) > 1:  # Border visible?
+            target.add(Color(*self.border_color))
+            width = self.border_size * transformation.get_pixel_size()
+            if self.smooth:
+                target.add(SmoothLine(points=outline.reshape(-1).tolist(), width=width))
+            else:
+                target.add(Line(points=outline.reshape(-1).tolist(), width=width))
+
+    def to_dict(self, options):  # Overrides Geometry2D to_dict
+        result = super().to_dict(options)
+        if options.get(self.OPTION_VISUAL_DETAILS, True):
+            result['borderColor'] = self.border_color
+            result['borderSize'] = self.border_size
+            result['smooth'] = self.smooth
+        return result
+
+    @classmethod
+    def from_dict(cls, data):  # Overrides Geometry2D.from_dict
+        geometry = cls(data['nodes'])
+        geometry.apply_dict(data)
+        geometry.border_color = tuple(data.get('borderColor', geometry.border_color))
+        geometry.border_size = data.get('borderSize', geometry.border_size)
+        geometry.smooth = data.get('smooth', True)
+        return geometry
+
+
+class _TestPolygon2D(TestCase):
+    """
+    Unit tests for class Polygon2D
+    """
+
+    def test_compact_nodes(self):
+        """
+        Tests the float32 node storage and the slot based storage
+        """
+        node_dtype = Geometry2D.node_dtype
+        Geometry2D.node_dtype = np.float32
+        try:
+            polygon = Polygon2D([(0, 0), (4, 0), (4, 4)])
+            self.assertEqual(polygon.nodes.dtype, np.float32)
+        finally:
+            Geometry2D.node_dtype = node_dtype
+        self.assertFalse(hasattr(polygon, '__dict__'))
+
+    def test_measurement(self):
+        """
+        Tests the containment test, area, centroid and triangulation of a concave polygon
+        """
+        polygon = Polygon2D([(0, 0), (10, 0), (10, 10), (5, 2), (0, 10)])
+        inside = polygon.contains_points([(1, 1), (5, 5), (9, 8), (20, 1), (5, 1)])
+        self.assertEqual(inside.tolist(), [True, False, True, False, True])
+        self.assertAlmostEqual(polygon.get_area(), 60.0)
+        square = Polygon2D([(0, 0), (4, 0), (4, 4), (0, 4)])
+        self.assertTrue(np.allclose(square.get_centroid(), (2.0, 2.0)))
+        vertices, indices = polygon.get_triangulation()
+        triangles = vertices[indices.reshape(-1, 3)]
+        edges_a, edges_b = triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+        self.assertAlmostEqual(np.abs(edges_a[:, 0] * edges_b[:, 1] - edges_a[:, 1] * edges_b[:, 0]).sum() * 0.5, 60.0)
+        self.assertIs(polygon.get_triangulation()[0], vertices)
+        silhouette = polygon.get_silhouette()
+        self.assertEqual(len(silhouette[Polygon2D.GO_TAG_LINE_LIST][0][Polygon2D.GO_TAG_LINE_LIST_LINES]), 6)
+        self.assertIs(polygon.get_silhouette(), silhouette)
+        polygon.update_node(3, np.array([5.0, 5.0]))
+        self.assertIsNot(polygon.get_triangulation()[0], vertices)
+        self.assertIsNot(polygon.get_silhouette(), silhouette)
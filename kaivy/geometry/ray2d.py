@@ -14,8 +14,12 @@ from kaivy.geometry.vector2d import Vector2D
 class Ray2D:
     """
     Defines a two dimensional ray with a given start point and direction
+
+    Uses __slots__, so rays do not carry an attribute dictionary.
     """
 
+    __slots__ = ('start', 'direction', 'length')
+
     def __init__(self, start, direction: Vector2D = None, end=None) -> None:
         """
         Creates a ray with given start and direction or end
@@ -23,9 +27,9 @@ class Ray2D:
         :param direction: Direction
         :param end: End point (alternatively to end)
         """
-        self.start = np.array(start)
+        self.start = np.array(start, dtype=float)  # The start point
         if end is not None:
-            self.direction: Vector2D = Vector2D.get_vector(start=np.array(start), end=np.array(end))
+            self.direction: Vector2D = Vector2D.get_vector(start=start, end=end)
         else:
             self.direction: Vector2D = Vector2D(direction) if not isinstance(direction, Vector2D) else direction
         self.length = self.direction.get_length()
@@ -49,10 +53,8 @@ class Ray2D:
         :param distance: The distance from the starting point, may also be negative
         :return: The point on the ray
         """
-        if self.length == 1.0:
-            return self.start + self.direction.value * distance
-        else:
-            return self.start + self.direction.value * distance / self.length
+        scaling = distance if self.length == 1.0 else distance / self.length
+        return self.start + self.direction.value * scaling
 
     def parallel(self, other, tolerance=1E-5) -> bool:
         """
@@ -71,8 +73,8 @@ class Ray2D:
             """
             return x_dirs[0] * y_dirs[1] - x_dirs[1] * y_dirs[0]
 
-        x_diff = (self.direction.value[0], other.direction.value[0])
-        y_diff = (self.direction.value[1], other.direction.value[1])
+        x_diff = (self.direction.x, other.direction.x)
+        y_diff = (self.direction.y, other.direction.y)
         div = det(x_diff, y_diff)
         return abs(div) < tolerance
 
@@ -99,6 +101,30 @@ class Ray2D:
         v = (dy * rad[0] - dx * rad[1]) / det
         return (ras + u * rad, u, v) if return_coordinate else (u, v)
 
+    @staticmethod
+    def ray_ray_intersections(ras, rad, rbs, rbd, pairwise=False):
+        """
+        Calculates the intersections of many 2D rays in a single vectorized pass, see ray_ray_intersection
+        :param ras: The start coordinates of the rays A as array of the shape (N, 2)
+        :param rad: The directions of the rays A as array of the shape (N, 2)
+        :param rbs: The start coordinates of the rays B as array of the shape (M, 2)
+        :param rbd: The directions of the rays B as array of the shape (M, 2)
+        :param pairwise: If True ray A[i] is only intersected with ray B[i] (N has to equal M), otherwise every ray A
+        is intersected with every ray B
+        :return: U and V as arrays of the shape (N,) if pairwise, otherwise (N, M). NaN for parallel rays.
+        """
+        ras, rad, rbs, rbd = [np.asarray(values, dtype=float) for values in (ras, rad, rbs, rbd)]
+        if not pairwise:
+            ras, rad = ras[:, np.newaxis, :], rad[:, np.newaxis, :]
+        dx = rbs[..., 0] - ras[..., 0]
+        dy = rbs[..., 1] - ras[..., 1]
+        det = rbd[..., 0] * rad[..., 1] - rbd[..., 1] * rad[..., 0]
+        parallel = det == 0
+        det = np.where(parallel, 1.0, det)
+        u = np.where(parallel, np.nan, (dy * rbd[..., 0] - dx * rbd[..., 1]) / det)
+        v = np.where(parallel, np.nan, (dy * rad[..., 0] - dx * rad[..., 1]) / det)
+        return u, v
+
     def intersection(self, other: 'Ray2D', return_coordinate=False):
         """
         Tests if this ray intersects with another
@@ -122,6 +148,19 @@ class _TestRay2D(TestCase):
     rayD = Ray2D(start=[300, 80], direction=Vector2D([-100, -800]))  # Parallel to B&C, inverse
     rayE = Ray2D(start=[200, 300], direction=Vector2D([100, 500]))  # Ray below Ray A which would hit it "backwards"
 
+    def test_storage(self):
+        """
+        Tests the slot based storage and in place modifications of the start point
+        """
+        ray = Ray2D(start=(1, 2), end=(4, 6))
+        self.assertFalse(hasattr(ray, '__dict__'))
+        self.assertEqual(ray.start.dtype, np.float64)
+        self.assertTrue(np.array_equal(ray.direction.value, np.array([3.0, 4.0])))
+        self.assertAlmostEqual(ray.length, 5.0)
+        ray.start += (1.0, 1.0)
+        ray.start[0] = 0.0
+        self.assertTrue(np.allclose(ray.point_on_ray(5.0), (3.0, 7.0)))
+
     def test_basic_function(self):
         """
         Tests the basic functionality
@@ -173,3 +212,21 @@ class _TestRay2D(TestCase):
         self.assertAlmostEqual(coordinate_from_v[1], coordinate[1])
         self.assertAlmostEqual(coordinate_from_point_on_ray[0], coordinate[0])
         self.assertAlmostEqual(coordinate_from_point_on_ray[1], coordinate[1])
+
+    def test_batch_intersection(self):
+        """
+        Tests the vectorized intersection function against the single ray version
+        """
+        rays = [self.rayA, self.rayB, self.rayC, self.rayE]
+        starts = np.array([ray.start for ray in rays])
+        directions = np.array([ray.direction.value for ray in rays])
+        u, v = Ray2D.ray_ray_intersections(starts, directions, starts, directions)
+        self.assertEqual(u.shape, (4, 4))
+        self.assertTrue(np.isnan(u[1, 2]), "Parallel rays should not intersect")
+        single_u, single_v = self.rayA.intersection(self.rayE)
+        self.assertAlmostEqual(u[0, 3], single_u)
+        self.assertAlmostEqual(v[0, 3], single_v)
+        pair_u, pair_v = Ray2D.ray_ray_intersections(starts[:2], directions[:2], starts[2:], directions[2:],
+                                                     pairwise=True)
+        self.assertAlmostEqual(pair_u[0], u[0, 2])
+        self.assertAlmostEqual(pair_v[1], v[1, 3])
@@ -0,0 +1,228 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+import math
+import numpy as np
+from unittest import TestCase
+
+
+class SpatialGrid2D:
+    """
+    A uniform grid indexing arbitrary keys by their bounding box. Each key is stored in every cell its bounding box
+    touches, so region queries only have to visit the cells covered by the region.
+
+    Bounding boxes and regions are defined in the form minX, minY, maxX, maxY.
+    """
+
+    def __init__(self, cell_size=256.0, max_cells_per_key=256):
+        """
+        Initializer
+        :param cell_size: The edge length of a single cell
+        :param max_cells_per_key: Keys covering more cells are not stored in the grid but tested on every query
+        """
+        self.cell_size = cell_size  # The edge length of a single cell
+        self.max_cells_per_key = max_cells_per_key  # Limit of cells a single key may occupy
+        self.cells = {}  # Dictionary of cell coordinate (x, y) -> set of keys
+        self.key_bounds = {}  # Dictionary of key -> bounding box
+        self.key_cells = {}  # Dictionary of key -> cell range (min x, min y, max x, max y), None for large keys
+        self.large_keys = set()  # Keys which are too large to be stored in the grid
+
+    def __len__(self):
+        """
+        Returns the count of keys stored
+        :return: The count of keys
+        """
+        return len(self.key_bounds)
+
+    def get_cell_range(self, bounds):
+        """
+        Returns the range of cells covered by given bounding box
+        :param bounds: The bounding box
+        :return: The cell range (min x, min y, max x, max y)
+        """
+        return (math.floor(bounds[0] / self.cell_size), math.floor(bounds[1] / self.cell_size),
+                math.floor(bounds[2] / self.cell_size), math.floor(bounds[3] / self.cell_size))
+
+    def insert(self, key, bounds):
+        """
+        Inserts a key. If the key is already stored it is updated.
+        :param key: The key, e.g. a geometry object
+        :param bounds: The key's bounding box
+        """
+        if key in self.key_bounds:
+            self.remove(key)
+        self.key_bounds[key] = bounds
+        cell_range = self.get_cell_range(bounds)
+        cell_count = (cell_range[2] - cell_range[0] + 1) * (cell_range[3] - cell_range[1] + 1)
+        if cell_count > self.max_cells_per_key:
+            self.key_cells[key] = None
+            self.large_keys.add(key)
+            return
+        self.key_cells[key] = cell_range
+        for cell_x in range(cell_range[0], cell_range[2] + 1):
+            for cell_y in range(cell_range[1], cell_range[3] + 1):
+                cell = self.cells.get((cell_x, cell_y), None)
+                if cell is None:
+                    cell = self.cells[(cell_x, cell_y)] = set()
+                cell.add(key)
+
+    def update(self, key, bounds):
+        """
+        Updates a key's bounding box. Only the cells which actually changed are touched.
+        :param key: The key
+        :param bounds: The new bounding box
+        """
+        old_range = self.key_cells.get(key, None)
+        if old_range is None or key not in self.key_bounds:
+            self.insert(key, bounds)
+            return
+        new_range = self.get_cell_range(bounds)
+        self.key_bounds[key] = bounds
+        if new_range == old_range:
+            return
+        self.insert(key, bounds)
+
+    def remove(self, key):
+        """
+        Removes a key
+        :param key: The key
+        """
+        if key not in self.key_bounds:
+            return
+        del self.key_bounds[key]
+        cell_range = self.key_cells.pop(key)
+        if cell_range is None:
+            self.large_keys.discard(key)
+            return
+        for cell_x in range(cell_range[0], cell_range[2] + 1):
+            for cell_y in range(cell_range[1], cell_range[3] + 1):
+                cell = self.cells[(cell_x, cell_y)]
+                cell.discard(key)
+                if len(cell) == 0:
+                    del self.cells[(cell_x, cell_y)]
+
+    def clear(self):
+        """
+        Removes all keys
+        """
+        self.cells.clear()
+        self.key_bounds.clear()
+        self.key_cells.clear()
+        self.large_keys.clear()
+
+    @staticmethod
+    def intersects(bounds_a, bounds_b):
+        """
+        Returns if two bounding boxes intersect
+        :param bounds_a: The first bounding box
+        :param bounds_b: The second bounding box
+        :return: True if they intersect (or touch)
+        """
+        return bounds_a[0] <= bounds_b[2] and bounds_b[0] <= bounds_a[2] and \
+            bounds_a[1] <= bounds_b[3] and bounds_b[1] <= bounds_a[3]
+
+    def query(self, region):
+        """
+        Returns all keys whose bounding box intersects given region
+        :param region: The region, None for all keys
+        :return: A set of keys
+        """
+        if region is None:
+            return set(self.key_bounds.keys())
+        cell_range = self.get_cell_range(region)
+        cell_count = (cell_range[2] - cell_range[0] + 1) * (cell_range[3] - cell_range[1] + 1)
+        if cell_count >= len(self.cells):  # Region covers more cells than are in use, test all keys directly
+            candidates = self.key_bounds.keys()
+        else:
+            candidates = set(self.large_keys)
+            for cell_x in range(cell_range[0], cell_range[2] + 1):
+                for cell_y in range(cell_range[1], cell_range[3] + 1):
+                    cell = self.cells.get((cell_x, cell_y), None)
+                    if cell is not None:
+                        candidates.update(cell)
+        key_bounds = self.key_bounds
+        return {key for key in candidates if self.intersects(key_bounds[key], region)}
+
+    @staticmethod
+    def get_candidate_pairs(bounds_a, bounds_b, cell_size):
+        """
+        Vectorized broad phase: Returns all pairs of two sets of bounding boxes which share at least one grid cell.
+        The result is a superset of the intersecting pairs, so the pairs still have to be tested exactly.
+        :param bounds_a: The first set of bounding boxes as array of the shape (N, 4)
+        :param bounds_b: The second set of bounding boxes as array of the shape (M, 4)
+        :param cell_size: The edge length of a single cell. Should be about the size of the typical bounding box.
+        :return: The indices into bounds_a and the indices into bounds_b of all candidate pairs, each sorted by a
+        """
+        bounds_a = np.asarray(bounds_a, dtype=float).reshape(-1, 4)
+        bounds_b = np.asarray(bounds_b, dtype=float).reshape(-1, 4)
+        if len(bounds_a) == 0 or len(bounds_b) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        cells_a = np.floor(bounds_a / cell_size).astype(np.int64)
+        cells_b = np.floor(bounds_b / cell_size).astype(np.int64)
+        min_cell = np.minimum(cells_a.min(axis=0), cells_b.min(axis=0))
+        grid_height = max(cells_a[:, 3].max(), cells_b[:, 3].max()) - min_cell[1] + 1
+
+        def get_cell_keys(cells):
+            """
+            Lists every cell covered by each bounding box
+            :param cells: The cell ranges of the bounding boxes
+            :return: The index of the bounding box and the key of the cell for each entry
+            """
+            widths = cells[:, 2] - cells[:, 0] + 1
+            counts = widths * (cells[:, 3] - cells[:, 1] + 1)
+            indices = np.repeat(np.arange(len(cells)), counts)
+            local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            cell_x = cells[indices, 0] + local % widths[indices] - min_cell[0]
+            cell_y = cells[indices, 1] + local // widths[indices] - min_cell[1]
+            return indices, cell_x * grid_height + cell_y
+
+        indices_a, keys_a = get_cell_keys(cells_a)
+        indices_b, keys_b = get_cell_keys(cells_b)
+        order = np.argsort(keys_b, kind='stable')
+        indices_b, keys_b = indices_b[order], keys_b[order]
+        first = np.searchsorted(keys_b, keys_a, side='left')  # The range of entries of B in each entry's cell
+        counts = np.searchsorted(keys_b, keys_a, side='right') - first
+        pair_a = np.repeat(indices_a, counts)
+        pair_b = indices_b[np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                                                          counts)]
+        pair_keys = np.unique(pair_a * len(bounds_b) + pair_b)  # Remove pairs sharing multiple cells
+        return pair_keys // len(bounds_b), pair_keys % len(bounds_b)
+
+
+class _TestSpatialGrid2D(TestCase):
+    """
+    Unit tests for class SpatialGrid2D
+    """
+
+    def test_query(self):
+        """
+        Tests inserting, moving and removing keys
+        """
+        grid = SpatialGrid2D(cell_size=10.0, max_cells_per_key=16)
+        grid.insert('a', (0, 0, 5, 5))
+        grid.insert('b', (100, 100, 105, 120))
+        grid.insert('huge', (-1000, -1000, 1000, 1000))
+        self.assertEqual(grid.query((1, 1, 2, 2)), {'a', 'huge'})
+        self.assertEqual(grid.query((90, 90, 100, 100)), {'b', 'huge'})
+        self.assertEqual(grid.query(None), {'a', 'b', 'huge'})
+        grid.update('a', (200, 200, 201, 201))
+        self.assertEqual(grid.query((1, 1, 2, 2)), {'huge'})
+        self.assertEqual(grid.query((195, 195, 200, 200)), {'a', 'huge'})
+        grid.remove('huge')
+        grid.remove('b')
+        self.assertEqual(grid.query((-5000, -5000, 5000, 5000)), {'a'})
+        self.assertEqual(len(grid.cells), 1)
+
+    def test_candidate_pairs(self):
+        """
+        Tests the vectorized broad phase
+        """
+        bounds_a = [(0, 0, 5, 5), (50, 50, 80, 52), (200, 200, 201, 201)]
+        bounds_b = [(4, 4, 6, 6), (75, 40, 76, 60), (-100, -100, -90, -90)]
+        pairs_a, pairs_b = SpatialGrid2D.get_candidate_pairs(bounds_a, bounds_b, cell_size=10.0)
+        self.assertEqual(list(zip(pairs_a.tolist(), pairs_b.tolist())), [(0, 0), (1, 1)])
@@ -6,24 +6,114 @@
 #                                                                                                                      #
 ########################################################################################################################
 
+import math
 import numpy as np
+from unittest import TestCase
 
 
 class Transformation2D:
     """
     Defines a two dimensional point transformation
+
+    The transformation is stored as 3x3 affine matrix. Points are scaled first, then rotated around the pivot and
+    finally moved by the offset.
     """
 
-    def __init__(self, offset=(0.0, 0.0), scaling=1.0, rotation=0.0):
+    def __init__(self, offset=(0.0, 0.0), scaling=1.0, rotation=0.0, screen_scaling=1.0, pivot=(0.0, 0.0),
+                 matrix=None):
         """
         Initializer
         :param offset: The offset
         :param scaling: The scaling
-        :param rotation: The rotation in degree
+        :param rotation: The rotation in degree, counter clockwise
+        :param screen_scaling: The count of screen pixels per transformed unit. Differs from 1.0 if the transformed
+        geometry is scaled once more on the GPU, e.g. by a Scale instruction
+        :param pivot: The (scaled) point around which the rotation is applied
+        :param matrix: Optional. A 3x3 affine matrix replacing offset, scaling, rotation and pivot
         """
         self.offset = offset      # The offset (X,Y)
         self.scaling = np.array(scaling if isinstance(scaling, tuple) else (scaling, scaling))    # The size scaling for each axis (X,Y)
-        self.rotation = rotation  # The rotation, not yet used
+        self.rotation = rotation  # The rotation in degree
+        self.screen_scaling = screen_scaling  # Screen pixels per transformed unit
+        if matrix is None:
+            angle = math.radians(rotation)
+            cv, sv = math.cos(angle), math.sin(angle)
+            rotation_matrix = np.array([[cv, -sv], [sv, cv]])
+            matrix = np.identity(3)
+            matrix[0:2, 0:2] = rotation_matrix * self.scaling[np.newaxis, :]
+            matrix[0:2, 2] = np.asarray(offset, dtype=float) + pivot - rotation_matrix.dot(pivot)
+        self.matrix = np.array(matrix, dtype=float)  # The affine matrix, shall not be modified after construction
+        self.line_width_scaling = abs(np.linalg.det(self.matrix[0:2, 0:2])) ** 0.5  # Cached line width scaling
+        self._matrix_cache = {}  # Dictionary of dtype -> (linear part, offset) converted to this type
+
+    @classmethod
+    def from_matrix(cls, matrix, screen_scaling=1.0) -> 'Transformation2D':
+        """
+        Creates a transformation from an affine matrix
+        :param matrix: The 3x3 matrix
+        :param screen_scaling: The count of screen pixels per transformed unit
+        :return: The transformation
+        """
+        matrix = np.asarray(matrix, dtype=float)
+        scaling = (float(np.hypot(matrix[0, 0], matrix[1, 0])), float(np.hypot(matrix[0, 1], matrix[1, 1])))
+        rotation = math.degrees(math.atan2(matrix[1, 0], matrix[0, 0]))
+        result = cls(offset=(float(matrix[0, 2]), float(matrix[1, 2])), scaling=scaling, rotation=rotation,
+                     screen_scaling=screen_scaling, matrix=matrix)
+        return result
+
+    def compose(self, other: 'Transformation2D') -> 'Transformation2D':
+        """
+        Combines two transformations
+        :param other: The transformation to apply before this one
+        :return: A transformation applying other first and then this one
+        """
+        return Transformation2D.from_matrix(self.matrix.dot(other.matrix), screen_scaling=self.screen_scaling)
+
+    def inverse(self) -> 'Transformation2D':
+        """
+        Returns the inverse transformation, e.g. to map screen coordinates back into image coordinates
+        :return: The inverse transformation
+        """
+        return Transformation2D.from_matrix(np.linalg.inv(self.matrix))
+
+    def is_axis_aligned(self):
+        """
+        Returns if the transformation does neither rotate nor shear
+        :return: True if only scaling and offset are applied
+        """
+        return self.matrix[0, 1] == 0.0 and self.matrix[1, 0] == 0.0
+
+    def _get_matrix_parts(self, dtype):
+        """
+        Returns the linear part and the offset of the matrix converted to given type
+        :param dtype: The numpy data type
+        :return: The transposed linear part (2, 2) and the offset (2,)
+        """
+        parts = self._matrix_cache.get(dtype, None)
+        if parts is None:
+            parts = self._matrix_cache[dtype] = (self.matrix[0:2, 0:2].T.astype(dtype),
+                                                 self.matrix[0:2, 2].astype(dtype))
+        return parts
+
+    def apply(self, points, out=None, translate=True):
+        """
+        Transforms a large set of points without temporary copies where possible
+        :param points: The points as array of the shape (N, 2), e.g. of type float32
+        :param out: Optional. The output buffer of the same shape. May be points itself to transform in place.
+        :param translate: Defines if the offset shall be applied. Pass False to transform directions.
+        :return: The transformed points (out if provided)
+        """
+        points = np.asarray(points)
+        if out is None:
+            out = np.empty(points.shape, dtype=points.dtype if points.dtype.kind == 'f' else float)
+        linear, offset = self._get_matrix_parts(out.dtype)
+        if self.is_axis_aligned():
+            np.multiply(points, np.diagonal(linear), out=out)
+        else:
+            out[...] = points.dot(linear)
+        if translate:
+            out += offset
+        return out
 
     def transform(self, nodes):
         """
@@ -31,11 +121,58 @@ class Transformation2D:
         :param nodes: The nodes
         :return: The transformed nodes
         """
-        return nodes*self.scaling + self.offset
+        return self.apply(nodes)
+
+    def get_gl_matrix(self):
+        """
+        Returns the transformation as 4x4 matrix in column major order, e.g. for kivy.graphics.transformation.Matrix
+        :return: A list of 16 values
+        """
+        m = self.matrix
+        return [m[0, 0], m[1, 0], 0.0, 0.0,
+                m[0, 1], m[1, 1], 0.0, 0.0,
+                0.0, 0.0, 1.0, 0.0,
+                m[0, 2], m[1, 2], 0.0, 1.0]
 
     def get_line_width_scaling(self):
         """
         Returns the required scaling of lines
         :return: The scaling value
         """
-        return np.mean(self.scaling)
+        return self.line_width_scaling
+
+    def get_pixels_per_unit(self):
+        """
+        Returns the count of screen pixels covered by a single untransformed unit, e.g. to choose a level of detail
+        :return: The count of pixels
+        """
+        return self.line_width_scaling * self.screen_scaling
+
+    def get_pixel_size(self):
+        """
+        Returns the size of a single screen pixel in transformed units. Multiply sizes which shall be constant on
+        screen, such as line widths defined in pixels, with this value.
+        :return: The size of a pixel
+        """
+        return 1.0 / self.screen_scaling
+
+
+class _TestTransformation2D(TestCase):
+    """
+    Unit tests for class Transformation2D
+    """
+
+    def test_transformation(self):
+        """
+        Tests rotation, composition, inversion and in place application
+        """
+        rotation = Transformation2D(rotation=90.0, pivot=(10.0, 0.0))
+        self.assertTrue(np.allclose(rotation.transform(np.array([[11.0, 0.0]])), [[10.0, 1.0]]))
+        scaling = Transformation2D(offset=(5.0, 5.0), scaling=(2.0, -2.0))
+        self.assertAlmostEqual(scaling.get_line_width_scaling(), 2.0)
+        combined = scaling.compose(rotation)
+        points = np.array([[11.0, 0.0], [3.0, 4.0]], dtype=np.float32)
+        expected = scaling.transform(rotation.transform(points))
+        self.assertTrue(np.allclose(combined.apply(points, out=points), expected))
+        self.assertEqual(points.dtype, np.float32)
+        self.assertTrue(np.allclose(combined.inverse().transform(expected), [[11.0, 0.0], [3.0, 4.0]], atol=1e-5))
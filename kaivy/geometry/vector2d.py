@@ -7,20 +7,54 @@
 ########################################################################################################################
 
 
+import math
 import numpy as np
+from unittest import TestCase
 
 
 class Vector2D:
     """
     Two vector functions
+
+    Uses __slots__, so vectors do not carry an attribute dictionary.
     """
 
+    __slots__ = ('value',)
+
     def __init__(self, value):
         """
         Initializer
         :param value: The vector's direction value
         """
-        self.value = np.array(value)
+        self.value = np.array(value, dtype=float)  # The vector as numpy array of the shape (2,)
+
+    @property
+    def x(self) -> float:
+        """
+        Returns the x component
+        :return: The x component
+        """
+        return float(self.value[0])
+
+    @property
+    def y(self) -> float:
+        """
+        Returns the y component
+        :return: The y component
+        """
+        return float(self.value[1])
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return self.value[index]
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __repr__(self):
+        return 'Vector2D({}, {})'.format(self.x, self.y)
 
     @staticmethod
     def get_vector(start, end):
@@ -30,8 +64,7 @@ class Vector2D:
         :param end: The vector's end
         :return: The vector
         """
-        diff = end - start
-        return Vector2D(diff)
+        return Vector2D((end[0] - start[0], end[1] - start[1]))
 
     def get_length(self):
         """
@@ -55,4 +88,26 @@ class Vector2D:
         :param vector: The vector
         :return: The length
         """
-        return (vector.value[0] ** 2 + vector.value[1] ** 2) ** 0.5
+        return math.hypot(vector.x, vector.y)
+
+
+class _TestVector2D(TestCase):
+    """
+    Unit tests for class Vector2D
+    """
+
+    def test_value(self):
+        """
+        Tests the stored value, in place modifications and the slot based storage
+        """
+        vector = Vector2D([3, 4])
+        self.assertFalse(hasattr(vector, '__dict__'))
+        self.assertEqual(vector.value.dtype, np.float64)
+        self.assertTrue(np.array_equal(vector.value, np.array([3.0, 4.0])))
+        self.assertIsInstance(vector.x, float)
+        self.assertAlmostEqual(vector.get_length(), 5.0)
+        vector.value[0] = 6.0
+        vector.value += (0.0, 4.0)
+        self.assertEqual((vector.x, vector.y), (6.0, 8.0))
+        self.assertAlmostEqual(vector.get_length(), 10.0)
+        self.assertTrue(np.allclose(vector.normalized().value, (0.6, 0.8)))
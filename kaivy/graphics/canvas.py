@@ -7,20 +7,31 @@
 ########################################################################################################################
 
 
+from kivy.clock import Clock
 from kivy.graphics import Color, Line, SmoothLine, Rectangle, Ellipse
-from kivy.uix.label import Label
 import numpy as np
 from kaivy.geometry.arc2d import Arc2D
 from kaivy.geometry.transformation2d import Transformation2D
+from kaivy.graphics.text_cache import TextTextureCache, TextHandle
+from kaivy.graphics.mesh_builder import MeshBuilder
 
 class KaivyCanvas:
     """
     Rendering command wrapping class for Kivy (and potential alternative future renderers)
 
     Converts simple canvas command such as draw_line into appropriate Kivy instruction group commands.
+
+    In batching mode non-smooth lines, polygons, rectangles and ellipses of the same color are collected and emitted
+    as a few Mesh instructions when the color changes, an unbatched primitive is drawn or flush is called. Primitives
+    still collected are flushed automatically before the next frame or when leaving a with block on the canvas.
     """
 
-    def __init__(self, instruction_group, size, offset=(0.0, 0.0), scaling=1.0, y_top_down=True, cache={}):
+    ELLIPSE_SEGMENTS_PER_PIXEL = 0.25  # The count of segments per pixel of an ellipse's perimeter when batching
+    MIN_ELLIPSE_SEGMENTS = 12  # The minimum count of segments of a batched ellipse
+    MAX_ELLIPSE_SEGMENTS = 128  # The maximum count of segments of a batched ellipse
+
+    def __init__(self, instruction_group, size, offset=(0.0, 0.0), scaling=1.0, y_top_down=True,
+                 cache: TextTextureCache = None, batching=False):
         """
         Initializer
         :param instruction_group: The target Kivy instruction group
@@ -28,7 +39,8 @@ class KaivyCanvas:
         :param offset: The panning offset
         :param scaling: The scaling factor
         :param y_top_down: Defines if y 0 shall be at the top (like in Window GDI) instead of at bottom (Kivy)
-        :param cache: A dictionary which enables this canvas to cache specific elements
+        :param cache: The cache for rendered texts. None = the cache shared by all canvases
+        :param batching: Defines if primitives shall be batched, see flush
         """
         self.font_scale = False  # Defines if text output shall be scaled in size automatically too
         self.instruction_group = instruction_group  # The kivy instruction group
@@ -40,11 +52,29 @@ class KaivyCanvas:
         self.y_top_down: bool = False  # Defines if y is at top
         self.update_transformation(offset, scaling, y_top_down=y_top_down)
         self.y_top_down = y_top_down  # Remember if y 0 is at top
-        self.cache = cache  # Cache e.g. for text output textures
+        self.cache = cache if cache is not None else TextTextureCache.get_shared()  # Cache for text output textures
+        self.use_glyph_atlas = False  # Defines if texts shall be drawn through the cache's glyph atlas
         self.main_color = (1.0, 1.0, 1.0, 1.0)  # Main color
         self.secondary_color = (1.0, 1.0, 1.0, 1.0)  # Secondary color, e.g. border
         self.selected_color = self.main_color  # The currently selected painting color
         self.transformation_stack = []  # Stack holding backuped transformations
+        self.batching = batching  # Defines if primitives are collected in batch til the next flush
+        self.batch = MeshBuilder()  # The primitives collected of the current batch color
+        self.batch_color = None  # The color of the collected primitives
+        self.flush_trigger = Clock.create_trigger(lambda dt: self.flush())  # Flushes the batch before the next frame
+
+    def __enter__(self):
+        """
+        Enters a block of drawing commands
+        :return: The canvas
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Flushes the primitives collected within the block
+        """
+        self.flush()
 
     def update_transformation(self, offset=None, scaling=None, y_top_down=True):
         self.y_top_down = y_top_down  # Defines if y is at top
@@ -119,10 +149,54 @@ class KaivyCanvas:
         Selects a new color in Kivy (and adds it to the instruction group)
         :param color: The new color, an RGBA tuple from 0 to 1
         """
+        self.flush()
         if self.selected_color != color:
             self.instruction_group.add(Color(*color))
             self.selected_color = color
 
+    def _get_batch(self, color) -> MeshBuilder:
+        """
+        Returns the batch collecting primitives of given color, previously collected primitives of another color are
+        flushed first
+        :param color: The color, an RGBA tuple from 0 to 1
+        :return: The mesh builder of the batch
+        """
+        if self.batch_color != color:
+            self.flush()
+            self.batch_color = color
+        self.flush_trigger()
+        return self.batch
+
+    def flush(self):
+        """
+        Emits all primitives collected in batching mode
+        """
+        if self.batch.is_empty():
+            return
+        if self.selected_color != self.batch_color:
+            self.instruction_group.add(Color(*self.batch_color))
+            self.selected_color = self.batch_color
+        self.batch.build(self.instruction_group)
+        self.batch.clear()
+        self.flush_trigger.cancel()
+
+    def _add_batch_lines(self, points, line_width, color, closed=False):
+        """
+        Adds a line strip to the batch
+        :param points: The transformed points as array of the shape (N, 2)
+        :param line_width: The line width in pixels as passed to Kivy's Line
+        :param color: The line color
+        :param closed: Defines if the last point shall be connected to the first one
+        """
+        if closed and len(points) > 2:
+            points = np.concatenate([points, points[:1]])
+        # Kivy's Line extends wider lines by the width on each side, lines up to 1 pixel are drawn 1 pixel thick
+        thickness = 2.0 * line_width if line_width > 1.0 else line_width
+        batch = self._get_batch(color)
+        batch.add_line_segments(points[:-1], points[1:], thickness)
+        if thickness > 1.5 and len(points) > 2:  # Close the gaps at the joints
+            batch.add_points(points[1:-1] if not closed else points[:-1], thickness)
+
     def set_color(self, color):
         """
         Defines the current main output color
@@ -146,9 +220,11 @@ class KaivyCanvas:
         :param line_width: The line's width
         :param smooth: Defines if the line shall be drawn smooth
         """
-        if self.selected_color != self.main_color:
-            self._select_color(self.main_color)
         points = self.transform_coordinates(np.array(points if points is not None else [start, end]))
+        if self.batching and not smooth:
+            self._add_batch_lines(points.reshape(-1, 2), line_width, self.main_color)
+            return
+        self._select_color(self.main_color)  # Flushes the batch first to keep the drawing order
         points = points.flatten().tolist()
 
         if not smooth:
@@ -164,21 +240,17 @@ class KaivyCanvas:
         :param line_width: Defines the border's width in pixels
         :param smooth: Defines if the outer border shall be smoothened
         """
-        if len(points) < 2:
+        if len(points) <= 2:  # A polygon needs at least three points
             return
-        if self.selected_color != self.main_color:
-            self._select_color(self.main_color)
-        points = self.transform_coordinates(points)
-        is_line = len(points) <= 2
-        # draw points+1 lines if it defines an area. draw just a line if has just two points
-        line_count = len(points) if not is_line else 0
-        if isinstance(points, np.ndarray):
-            points = points.flatten().tolist()
-        for index in range(line_count):
-            cindex = index * 2
-            nindex = ((index + 1) * 2) % len(points)
-            self.instruction_group.add(
-                Line(points=(*points[cindex:cindex + 2], *points[nindex:nindex + 2]), width=line_width, smooth=smooth))
+        points = self.transform_coordinates(points).reshape(-1, 2)
+        if self.batching and not smooth:
+            self._add_batch_lines(points, line_width, self.main_color, closed=True)
+            return
+        self._select_color(self.main_color)  # Flushes the batch first to keep the drawing order
+        if smooth:
+            self.instruction_group.add(SmoothLine(points=points.flatten().tolist(), width=line_width, close=True))
+        else:
+            self.instruction_group.add(Line(points=points.flatten().tolist(), width=line_width, close=True))
 
     def draw_rectangle(self, pos, size, filled=True, border=0, pixel_size=False):
         """
@@ -193,6 +265,17 @@ class KaivyCanvas:
         pos = self.transform_coordinates(pos)
         size = self.transform_size_pixel(size) if pixel_size else self.transform_size(size)
 
+        if self.batching:
+            if filled:
+                self._get_batch(self.main_color).add_rectangles(pos.reshape(1, 2), (pos + size).reshape(1, 2))
+            if border > 0:
+                min_coords = np.array([pos, (pos[0], pos[1] + border), (pos[0] + size[0] - border, pos[1] + border),
+                                       (pos[0], pos[1] + size[1] - border)])
+                sizes = np.array([(size[0], border), (border, size[1] - 2 * border), (border, size[1] - 2 * border),
+                                  (size[0], border)])
+                self._get_batch(self.secondary_color).add_rectangles(min_coords, min_coords + sizes)
+            return
+
         if filled:
             self._select_color(self.main_color)
             self.instruction_group.add(Rectangle(pos=pos, size=size))
@@ -220,7 +303,18 @@ class KaivyCanvas:
         else:
             pos = self.transform_coordinates(pos)
 
-        if filled:
+        if filled and self.batching:
+            center = pos + size * 0.5
+            perimeter = np.pi * (abs(size[0]) + abs(size[1])) * 0.5
+            segments = int(min(max(perimeter * self.ELLIPSE_SEGMENTS_PER_PIXEL, self.MIN_ELLIPSE_SEGMENTS),
+                               self.MAX_ELLIPSE_SEGMENTS))
+            angles = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False)
+            vertices = np.concatenate([center.reshape(1, 2),
+                                       center + np.stack([np.cos(angles), np.sin(angles)], axis=1) * size * 0.5])
+            steps = np.arange(1, segments + 1)
+            indices = np.stack([np.zeros(segments, dtype=np.int64), steps, steps % segments + 1], axis=1)
+            self._get_batch(self.main_color).add_triangles(vertices, indices.reshape(-1))
+        elif filled:
             self._select_color(self.main_color)
             self.instruction_group.add(Ellipse(pos=pos, size=size))
         if border > 0:
@@ -248,52 +342,38 @@ class KaivyCanvas:
         displ_arc.color = self.main_color
         displ_arc.border_color = self.secondary_color
         displ_arc.border_size = border_size
+        self.flush()
         displ_arc.render_to_kivy(self.instruction_group, transformation)
+        self.selected_color = None  # The arc selected colors of its own
 
     @staticmethod
-    def get_text_handle_static(text, font_settings={}, cache={}, cache_id=None):
+    def get_text_handle_static(text, font_settings={}, cache: TextTextureCache = None, cache_id=None,
+                               use_glyph_atlas=False) -> TextHandle:
         """
         Creates a font label in form of a texture which can be rendered using functions such as draw_text
         :param text: The text
         :param font_settings: The font settings such as fontName, fontSize, textColor, bold and italic
-        :param cache: The cache dictionary
-        :param cache_id: A cache id which can be used to backup the rendered texture for multiple frames as long as
-        none of the properties changes.
-        """
-        cached_label: Label = None
-        italic = font_settings.get('italic', False)
-        bold = font_settings.get('bold', False)
-        font_name = font_settings.get('fontName', 'Roboto')
-        font_size = font_settings.get('fontSize', 14)
-        text_color = font_settings.get('textColor', (0.0, 0.0, 0.0, 1.0))
-        if cache_id is not None:  # If cachable try to fetch from cache
-            cached_label = cache.get(cache_id, None)
-        if cached_label is not None and cached_label.text == text and cached_label.font_size == font_size and \
-                cached_label.bold == bold and cached_label.italic == italic and cached_label.font_name == font_name:
-            return cached_label
-        else:
-            temp_label = Label(text=text, color=text_color, pos_hint=(0, 0),
-                               font_size=font_size, bold=bold, italic=italic)
-            if cache_id is not None:  # Cache if possible
-                cache[cache_id] = temp_label
-            if font_name is not None:
-                temp_label.font_name = font_name
-            temp_label.texture_update()
-            temp_label.size = temp_label.texture_size
-            return temp_label
+        :param cache: The text cache. None = the cache shared by all canvases
+        :param cache_id: Deprecated and ignored, the textures are cached by text and font settings
+        :param use_glyph_atlas: Defines if the text shall be drawn through the cache's glyph atlas
+        """
+        cache = cache if cache is not None else TextTextureCache.get_shared()
+        return cache.get_text_handle(text, font_settings, use_glyph_atlas=use_glyph_atlas)
 
     def get_text_handle(self, text, font_settings={}, cache_id=None):
         """
         Creates a font label in form of a texture which can be rendered using functions such as draw_text
         :param text: The text to be printed
         :param font_settings: The font settings such as fontName, fontSize, italic and bold
-        :param cache_id: An id to recycle the text image between frames. Needs to be unique for this canvas and stable.
+        :param cache_id: Deprecated and ignored, the textures are cached by text and font settings
         :return: The handle
         """
         if self.font_scale:
-            font_settings['fontSize'] = font_settings.get('fontSize', 14.0) * self.scaling[0] + 0.5
+            font_settings = dict(font_settings)
+            font_settings['fontSize'] = int(font_settings.get('fontSize', 14.0) * self.scaling[0] + 0.5)
 
-        return self.get_text_handle_static(text=text, font_settings=font_settings, cache_id=cache_id, cache=self.cache)
+        return self.get_text_handle_static(text=text, font_settings=font_settings, cache=self.cache,
+                                           use_glyph_atlas=self.use_glyph_atlas)
 
     def draw_text(self, position, text_handle):
         """
@@ -302,7 +382,10 @@ class KaivyCanvas:
         :param text_handle: The text handle
         """
         position = (self.transform_coordinates(position)).tolist()
-        text_handle.pos = position
         if self.y_top_down:
-            text_handle.y -= text_handle.texture_size[1]
-        self.instruction_group.add(text_handle.canvas)
+            position[1] -= text_handle.texture_size[1]
+        instruction = text_handle.image.create_instruction(position)
+        if instruction is None:  # Empty text
+            return
+        self._select_color(text_handle.color)
+        self.instruction_group.add(instruction)
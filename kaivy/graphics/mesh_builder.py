@@ -0,0 +1,183 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+import numpy as np
+from kivy.graphics import Color, Mesh
+
+
+class MeshBuilder:
+    """
+    Collects the triangles of many primitives in numpy arrays and emits them as few Kivy Mesh instructions.
+
+    Kivy's default shader has no per vertex color, so a builder holds the triangles of a single color. Kivy meshes
+    use 16 bit indices, so a new mesh is started whenever a mesh would exceed MAX_VERTICES.
+    """
+
+    MAX_VERTICES = 65535  # The maximum count of vertices of a single Kivy mesh
+    QUAD_INDICES = np.array([0, 1, 2, 2, 3, 0], dtype=np.int64)  # Two triangles per quad
+
+    def __init__(self):
+        """
+        Initializer
+        """
+        self.vertex_chunks = []  # List of vertex arrays of the shape (K, 2)
+        self.index_chunks = []  # List of index arrays of the shape (T * 3), relative to their vertex chunk
+
+    def is_empty(self):
+        """
+        Returns if no triangles were added yet
+        :return: True if the builder is empty
+        """
+        return len(self.vertex_chunks) == 0
+
+    def clear(self):
+        """
+        Removes all triangles
+        """
+        self.vertex_chunks = []
+        self.index_chunks = []
+
+    def add_triangles(self, vertices, indices):
+        """
+        Adds a set of triangles
+        :param vertices: The vertices as array of the shape (K, 2)
+        :param indices: Three indices per triangle, relative to vertices
+        """
+        if len(vertices) == 0 or len(indices) == 0:
+            return
+        self.vertex_chunks.append(np.asarray(vertices, dtype=np.float32).reshape(-1, 2))
+        self.index_chunks.append(np.asarray(indices, dtype=np.int64).reshape(-1))
+
+    def add_quads(self, corners):
+        """
+        Adds a set of quads, each defined by its four corners in drawing order
+        :param corners: The corners as array of the shape (Q, 4, 2)
+        """
+        if len(corners) == 0:
+            return
+        max_quads = self.MAX_VERTICES // 4
+        for first in range(0, len(corners), max_quads):  # Keep single chunks small enough for one mesh
+            block = corners[first:first + max_quads]
+            indices = (self.QUAD_INDICES[np.newaxis, :] + 4 * np.arange(len(block))[:, np.newaxis]).reshape(-1)
+            self.add_triangles(block.reshape(-1, 2), indices)
+
+    def add_line_segments(self, starts, ends, width):
+        """
+        Adds line segments as quads of the given width
+        :param starts: The start points as array of the shape (S, 2)
+        :param ends: The end points as array of the shape (S, 2)
+        :param width: The line width, a single value or one value per segment
+        """
+        if len(starts) == 0:
+            return
+        directions = ends - starts
+        lengths = np.sqrt((directions ** 2).sum(axis=1))
+        lengths[lengths == 0.0] = 1.0
+        half_width = np.asarray(width, dtype=float).reshape(-1, 1) * 0.5
+        normals = np.stack([-directions[:, 1], directions[:, 0]], axis=1) / lengths[:, np.newaxis] * half_width
+        corners = np.stack([starts + normals, ends + normals, ends - normals, starts - normals], axis=1)
+        self.add_quads(corners)
+
+    def add_rectangles(self, min_coords, max_coords):
+        """
+        Adds filled, axis aligned rectangles
+        :param min_coords: The lower left corners as array of the shape (R, 2)
+        :param max_coords: The upper right corners as array of the shape (R, 2)
+        """
+        if len(min_coords) == 0:
+            return
+        corners = np.stack([min_coords,
+                            np.stack([max_coords[:, 0], min_coords[:, 1]], axis=1),
+                            max_coords,
+                            np.stack([min_coords[:, 0], max_coords[:, 1]], axis=1)], axis=1)
+        self.add_quads(corners)
+
+    def add_rectangle_outlines(self, min_coords, max_coords, width):
+        """
+        Adds the outlines of axis aligned rectangles
+        :param min_coords: The lower left corners as array of the shape (R, 2)
+        :param max_coords: The upper right corners as array of the shape (R, 2)
+        :param width: The line width, a single value or one value per rectangle
+        """
+        if len(min_coords) == 0:
+            return
+        width = np.broadcast_to(np.asarray(width, dtype=float), (len(min_coords),))
+        lower_right = np.stack([max_coords[:, 0], min_coords[:, 1]], axis=1)
+        upper_left = np.stack([min_coords[:, 0], max_coords[:, 1]], axis=1)
+        starts = np.concatenate([min_coords, lower_right, max_coords, upper_left])
+        ends = np.concatenate([lower_right, max_coords, upper_left, min_coords])
+        self.add_line_segments(starts, ends, np.tile(width, 4))
+
+    def add_points(self, points, size):
+        """
+        Adds square points
+        :param points: The point centers as array of the shape (P, 2)
+        :param size: The edge length, a single value or one value per point
+        """
+        if len(points) == 0:
+            return
+        half_size = np.asarray(size, dtype=float).reshape(-1, 1) * 0.5
+        self.add_rectangles(points - half_size, points + half_size)
+
+    def get_meshes(self):
+        """
+        Combines all chunks to Kivy meshes
+        :return: A list of Mesh instructions
+        """
+        meshes = []
+        vertices = []
+        indices = []
+        vertex_count = 0
+        chunks = []
+        for chunk_vertices, chunk_indices in zip(self.vertex_chunks, self.index_chunks):
+            if len(chunk_vertices) <= self.MAX_VERTICES:
+                chunks.append((chunk_vertices, chunk_indices))
+                continue
+            # Split oversized chunks by their triangles and only keep the vertices actually used
+            triangles_per_block = self.MAX_VERTICES // 3
+            for first in range(0, len(chunk_indices), triangles_per_block * 3):
+                block = chunk_indices[first:first + triangles_per_block * 3]
+                used, remapped = np.unique(block, return_inverse=True)
+                chunks.append((chunk_vertices[used], remapped.reshape(-1)))
+        for chunk_vertices, chunk_indices in chunks:
+            if vertex_count + len(chunk_vertices) > self.MAX_VERTICES:
+                meshes.append(self._create_mesh(vertices, indices))
+                vertices, indices, vertex_count = [], [], 0
+            vertices.append(chunk_vertices)
+            indices.append(chunk_indices + vertex_count)
+            vertex_count += len(chunk_vertices)
+        if vertex_count > 0:
+            meshes.append(self._create_mesh(vertices, indices))
+        return meshes
+
+    @staticmethod
+    def _create_mesh(vertices, indices):
+        """
+        Creates a single Kivy mesh
+        :param vertices: A list of vertex arrays of the shape (K, 2)
+        :param indices: A list of index arrays
+        :return: The mesh
+        """
+        vertices = np.concatenate(vertices)
+        mesh_vertices = np.zeros((len(vertices), 4), dtype=np.float32)  # Position and texture coordinate
+        mesh_vertices[:, 0:2] = vertices
+        return Mesh(vertices=mesh_vertices.reshape(-1).tolist(), indices=np.concatenate(indices).tolist(),
+                    mode='triangles')
+
+    def build(self, target, color=None):
+        """
+        Adds the collected triangles to a Kivy canvas or instruction group
+        :param target: The target canvas or instruction group
+        :param color: The color to select before. None = keep the current color
+        """
+        if self.is_empty():
+            return
+        if color is not None:
+            target.add(Color(*color))
+        for mesh in self.get_meshes():
+            target.add(mesh)
@@ -0,0 +1,353 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+from collections import OrderedDict
+from unittest import TestCase
+import numpy as np
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Rectangle, Mesh
+from kivy.graphics.texture import Texture
+
+
+class TextImage:
+    """
+    A rendered text, either as texture of its own or as glyph quads referring to a glyph atlas
+    """
+
+    def __init__(self, texture, size, quads=None):
+        """
+        Initializer
+        :param texture: The text's texture or the glyph atlas' texture
+        :param size: The text's size in pixels
+        :param quads: Optional. The glyph quads as array of the shape (Q, 4, 4) holding x, y, u and v of each corner,
+        relative to the text's lower left corner. None = the texture holds the whole text.
+        """
+        self.texture = texture  # The texture
+        self.size = size  # The size in pixels
+        self.quads = quads  # The glyph quads when drawn through a glyph atlas
+
+    def get_pixel_count(self):
+        """
+        Returns the count of texture pixels held exclusively by this text
+        :return: The count of pixels, 0 for texts drawn through a glyph atlas
+        """
+        return 0 if self.quads is not None else int(self.size[0] * self.size[1])
+
+    def create_instruction(self, pos):
+        """
+        Creates the Kivy instruction drawing the text
+        :param pos: The position of the lower left corner
+        :return: The instruction, None if there is nothing to draw
+        """
+        if self.quads is None:
+            return Rectangle(texture=self.texture, pos=pos, size=self.size)
+        if len(self.quads) == 0:
+            return None
+        vertices = self.quads.copy()
+        vertices[:, :, 0:2] += pos
+        indices = (np.array([0, 1, 2, 2, 3, 0])[np.newaxis, :] +
+                   4 * np.arange(len(vertices))[:, np.newaxis]).reshape(-1)
+        return Mesh(vertices=vertices.reshape(-1).tolist(), indices=indices.tolist(), mode='triangles',
+                    texture=self.texture)
+
+
+class TextHandle:
+    """
+    A text ready to be drawn via KaivyCanvas.draw_text
+    """
+
+    def __init__(self, image: TextImage, color):
+        """
+        Initializer
+        :param image: The (shared) rendered text
+        :param color: The text color as RGBA tuple
+        """
+        self.image = image  # The rendered text
+        self.color = color  # The text color
+        self.texture_size = image.size  # The size in pixels
+
+
+class GlyphAtlas:
+    """
+    Stores the glyphs of all fonts used in a single texture, so changing texts such as numbers reuse the glyphs
+    already rendered instead of rendering a new texture for each string.
+
+    The glyphs are placed line by line. When the atlas is full a new texture is started, texts laid out before keep
+    referring to the old one. The glyphs are placed side by side without kerning, which suits numeric labels.
+    """
+
+    def __init__(self, size=1024):
+        """
+        Initializer
+        :param size: The edge length of the atlas texture in pixels
+        """
+        self.size = size  # The edge length of the atlas texture
+        self.texture = None  # The current atlas texture
+        self.glyphs = {}  # Dictionary of (font key, character) -> (x, y, width, height) within the texture
+        self.cursor = [0, 0]  # The position of the next glyph
+        self.row_height = 0  # The height of the current row of glyphs
+
+    def clear(self):
+        """
+        Starts a new, empty atlas texture
+        """
+        self.texture = Texture.create(size=(self.size, self.size), colorfmt='rgba')
+        self.glyphs = {}
+        self.cursor = [0, 0]
+        self.row_height = 0
+
+    def add_glyph(self, char, font_key):
+        """
+        Renders a single glyph into the atlas
+        :param char: The character
+        :param font_key: The font settings, see TextTextureCache.get_font_key
+        :return: The glyph's rectangle (x, y, width, height). None if the glyph does not fit into an empty atlas.
+        """
+        texture = TextTextureCache.render_texture(char, font_key)
+        width, height = texture.size
+        if width > self.size or height > self.size:
+            return None
+        if self.cursor[0] + width > self.size:  # Start a new row
+            self.cursor = [0, self.cursor[1] + self.row_height]
+            self.row_height = 0
+        if self.cursor[1] + height > self.size:  # Full, start a new atlas
+            self.clear()
+        rect = (self.cursor[0], self.cursor[1], width, height)
+        self.texture.blit_buffer(texture.pixels, pos=rect[0:2], size=rect[2:4], colorfmt='rgba', bufferfmt='ubyte')
+        self.cursor[0] += width
+        self.row_height = max(self.row_height, height)
+        self.glyphs[(font_key, char)] = rect
+        return rect
+
+    def layout(self, text, font_key):
+        """
+        Lays out a text using the atlas' glyphs, missing glyphs are added
+        :param text: The text
+        :param font_key: The font settings, see TextTextureCache.get_font_key
+        :return: The text image
+        """
+        if self.texture is None:
+            self.clear()
+        rects = []
+        for char in text:
+            rect = self.glyphs.get((font_key, char), None)
+            texture = self.texture
+            if rect is None:
+                rect = self.add_glyph(char, font_key)
+                if rect is None:
+                    continue
+                if texture is not self.texture:  # The atlas was full, lay out the whole text again
+                    return self.layout(text, font_key)
+            rects.append(rect)
+        if len(rects) == 0:  # Nothing to draw, e.g. an empty label
+            return TextImage(self.texture, (0.0, 0.0), quads=np.zeros((0, 4, 4)))
+        rects = np.array(rects, dtype=float).reshape(-1, 4)
+        advances = np.concatenate([[0.0], np.cumsum(rects[:, 2])[:-1]])
+        x0, x1 = advances, advances + rects[:, 2]
+        y1 = rects[:, 3]
+        # The glyphs' pixels are stored top row first, so the upper edge of a glyph maps to its lower v coordinate
+        u0, v_top = rects[:, 0] / self.size, rects[:, 1] / self.size
+        u1, v_bottom = (rects[:, 0] + rects[:, 2]) / self.size, (rects[:, 1] + rects[:, 3]) / self.size
+        zeros = np.zeros(len(rects))
+        quads = np.stack([np.stack([x0, zeros, u0, v_bottom], axis=1), np.stack([x1, zeros, u1, v_bottom], axis=1),
+                          np.stack([x1, y1, u1, v_top], axis=1), np.stack([x0, y1, u0, v_top], axis=1)], axis=1)
+        size = (float(rects[:, 2].sum()), float(rects[:, 3].max()))
+        return TextImage(self.texture, size, quads=quads)
+
+
+class TextTextureCache:
+    """
+    A size bounded least recently used cache of rendered texts, keyed by the text and the font settings.
+
+    The least recently used texts are released as soon as either the count of texts or the count of texture pixels
+    exceeds its limit. Texts are rendered in white and colored when drawn, so all colors share the same texture.
+    """
+
+    _shared = None  # The cache shared by all canvases not providing their own one
+
+    def __init__(self, max_entries=1024, max_pixels=16 * 1024 * 1024, glyph_atlas: GlyphAtlas = None):
+        """
+        Initializer
+        :param max_entries: The maximum count of cached texts
+        :param max_pixels: The maximum count of texture pixels of all cached texts
+        :param glyph_atlas: Optional. The glyph atlas to use for texts requested with use_glyph_atlas
+        """
+        self.max_entries = max_entries  # The maximum count of cached texts
+        self.max_pixels = max_pixels  # The maximum count of texture pixels
+        self.glyph_atlas = glyph_atlas if glyph_atlas is not None else GlyphAtlas()  # The glyph atlas
+        self.entries = OrderedDict()  # Dictionary of key -> TextImage, least recently used first
+        self.pixel_count = 0  # The count of texture pixels of all cached texts
+
+    @classmethod
+    def get_shared(cls) -> 'TextTextureCache':
+        """
+        Returns the cache shared by all canvases not providing their own one
+        :return: The cache
+        """
+        if cls._shared is None:
+            cls._shared = TextTextureCache()
+        return cls._shared
+
+    @staticmethod
+    def get_font_key(font_settings):
+        """
+        Returns the font settings affecting the rendered texture
+        :param font_settings: The font settings such as fontName, fontSize, bold and italic
+        :return: A tuple of font name, font size, bold and italic
+        """
+        return (font_settings.get('fontName', 'Roboto'), font_settings.get('fontSize', 14),
+                font_settings.get('bold', False), font_settings.get('italic', False))
+
+    @staticmethod
+    def render_texture(text, font_key):
+        """
+        Renders a text into a new texture
+        :param text: The text
+        :param font_key: The font settings, see get_font_key
+        :return: The texture
+        """
+        font_name, font_size, bold, italic = font_key
+        label = CoreLabel(text=text, font_size=font_size, bold=bold, italic=italic)
+        if font_name is not None:
+            label.options['font_name'] = font_name
+        label.refresh()
+        return label.texture
+
+    def render_text(self, text, font_key, use_glyph_atlas):
+        """
+        Renders a text which is not cached yet
+        :param text: The text
+        :param font_key: The font settings, see get_font_key
+        :param use_glyph_atlas: Defines if the text shall be drawn through the glyph atlas
+        :return: The text image
+        """
+        if use_glyph_atlas:
+            return self.glyph_atlas.layout(text, font_key)
+        texture = self.render_texture(text, font_key)
+        return TextImage(texture, tuple(texture.size))
+
+    def get_image(self, text, font_settings={}, use_glyph_atlas=False) -> TextImage:
+        """
+        Returns a rendered text, rendering it if it is not cached yet
+        :param text: The text
+        :param font_settings: The font settings such as fontName, fontSize, bold and italic
+        :param use_glyph_atlas: Defines if the text shall be drawn through the glyph atlas
+        :return: The text image
+        """
+        key = (text, use_glyph_atlas) + self.get_font_key(font_settings)
+        image = self.entries.get(key, None)
+        if image is not None:
+            self.entries.move_to_end(key)
+            return image
+        image = self.render_text(text, key[2:], use_glyph_atlas)
+        self.entries[key] = image
+        self.pixel_count += image.get_pixel_count()
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.pixel_count > self.max_pixels):
+            _, evicted = self.entries.popitem(last=False)
+            self.pixel_count -= evicted.get_pixel_count()
+        return image
+
+    def get_text_handle(self, text, font_settings={}, use_glyph_atlas=False) -> TextHandle:
+        """
+        Returns a text handle which can be drawn via KaivyCanvas.draw_text
+        :param text: The text
+        :param font_settings: The font settings such as fontName, fontSize, textColor, bold and italic
+        :param use_glyph_atlas: Defines if the text shall be drawn through the glyph atlas
+        :return: The handle
+        """
+        return TextHandle(self.get_image(text, font_settings, use_glyph_atlas),
+                          font_settings.get('textColor', (0.0, 0.0, 0.0, 1.0)))
+
+    def clear(self):
+        """
+        Releases all cached texts
+        """
+        self.entries.clear()
+        self.pixel_count = 0
+
+
+class _TestTextTextureCache(TestCase):
+    """
+    Unit tests for class TextTextureCache
+    """
+
+    class _SizeTexture:
+        """
+        Stands in for a rendered texture, sized by the text length
+        """
+
+        def __init__(self, text):
+            self.size = (len(text) * 10, 10)
+
+    def test_eviction(self):
+        """
+        Tests the least recently used eviction by count and by pixels
+        """
+        cache = TextTextureCache(max_entries=3, max_pixels=1000)
+        cache.render_texture = lambda text, font_key: self._SizeTexture(text)
+        first = cache.get_image('a')
+        cache.get_image('b')
+        cache.get_image('c')
+        self.assertIs(cache.get_image('a'), first)
+        self.assertIsNot(cache.get_image('a', {'fontSize': 20}), first)
+        self.assertEqual([key[0] for key in cache.entries], ['c', 'a', 'a'])
+        cache.get_image('x' * 8)
+        self.assertEqual(len(cache.entries), 3)
+        self.assertEqual(cache.pixel_count, 1000)
+        cache.get_image('y' * 5)
+        self.assertEqual(cache.pixel_count, 500)
+        self.assertEqual([key[0] for key in cache.entries], ['y' * 5])
+
+
+class _TestGlyphAtlas(TestCase):
+    """
+    Unit tests for class GlyphAtlas
+    """
+
+    class _GlyphTexture:
+        """
+        Stands in for a rendered glyph or the atlas texture, records the glyphs blitted into it
+        """
+
+        def __init__(self, text=''):
+            self.size = (4 if text == '1' else 6, 10)
+            self.pixels = b'\xff' * (self.size[0] * self.size[1] * 4)
+            self.blits = []
+
+        def blit_buffer(self, pixels, pos, size, colorfmt, bufferfmt):
+            self.blits.append((pos, size))
+
+    def test_layout(self):
+        """
+        Tests the quad sizes, the advances, the texture coordinates and the reuse of glyphs
+        """
+        atlas = GlyphAtlas(size=64)
+        atlas.texture = self._GlyphTexture()
+        render_texture = TextTextureCache.__dict__['render_texture']
+        TextTextureCache.render_texture = staticmethod(lambda text, font_key: self._GlyphTexture(text))
+        try:
+            image = atlas.layout('121', ('Roboto', 14, False, False))
+            self.assertEqual(image.size, (14.0, 10.0))
+            self.assertEqual(image.quads[:, 0, 0].tolist(), [0.0, 4.0, 10.0])
+            self.assertEqual((image.quads[:, 2, 0:2] - image.quads[:, 0, 0:2]).tolist(),
+                             [[4.0, 10.0], [6.0, 10.0], [4.0, 10.0]])
+            self.assertEqual(image.quads[0, :, 2:4].tolist(), [[0.0, 10 / 64], [4 / 64, 10 / 64], [4 / 64, 0.0],
+                                                                [0.0, 0.0]])
+            self.assertEqual(image.quads[0, :, 2:4].tolist(), image.quads[2, :, 2:4].tolist())
+            self.assertEqual(atlas.texture.blits, [((0, 0), (4, 10)), ((4, 0), (6, 10))])
+            image = atlas.layout('21', ('Roboto', 14, False, False))
+            self.assertEqual(image.quads[:, 0, 0].tolist(), [0.0, 6.0])
+            self.assertEqual(len(atlas.texture.blits), 2)
+            atlas.layout('1', ('Roboto', 20, False, False))
+            self.assertEqual(len(atlas.texture.blits), 3)
+            image = atlas.layout('', ('Roboto', 14, False, False))
+            self.assertEqual(image.size, (0.0, 0.0))
+            self.assertEqual(image.quads.shape, (0, 4, 4))
+            self.assertEqual(image.get_pixel_count(), 0)
+        finally:
+            TextTextureCache.render_texture = render_texture
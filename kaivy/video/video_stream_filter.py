@@ -32,8 +32,8 @@ class VideoStreamFilter(VideoStreamProto):
         self.sources = []
         self.last_image_times = []
         self.last_images = []
-        self.images_received = [None for _ in self.sources]
-        self.images_received_count = 0
+        self.images_received = []  # The images pushed by each source since the last filtered image
+        self.images_received_count = 0  # The count of sources which pushed an image since the last filtered image
         self.still_image_filters = []
         self.set_sources(sources)
 
@@ -42,9 +42,18 @@ class VideoStreamFilter(VideoStreamProto):
         Sets the new source list
         :param sources: The new source list
         """
+        for source in self.sources:
+            source.remove_image_listener(self.on_image_received)
         self.sources = sources
         self.last_image_times = [0.0 for _ in self.sources]
         self.last_images = [None for _ in self.sources]
+        self.images_received = [None for _ in self.sources]
+        self.images_received_count = 0
+        # Push the filtered image if all sources push their images
+        self.push_capable = len(self.sources) > 0 and all(source.push_capable for source in self.sources)
+        if self.push_capable:
+            for source in self.sources:
+                source.add_image_listener(self.on_image_received)
 
     def set_still_image_filter(self, new_filter):
         """
@@ -110,15 +119,22 @@ class VideoStreamFilter(VideoStreamProto):
 
     def on_image_received(self, stream, image):
         """
-        Is called when the newest image has been received.
-        :return:
+        Is called when one of the sources received a new image. As soon as all sources provided a new image the
+        filtered image is created and pushed to this stream's listeners.
+        :param stream: The source which received the image
+        :param image: The new image
         """
         for index, source in enumerate(self.sources):  # forward commands
             if stream == source:
+                if self.images_received[index] is None:
+                    self.images_received_count += 1
                 self.images_received[index] = image
-                self.images_received += 1
-                if self.images_received == len(self.sources):
-                    super.on_image_received(self.read_image())
+        if self.images_received_count == len(self.sources):
+            self.images_received = [None for _ in self.sources]
+            self.images_received_count = 0
+            stamp, filtered_image = self.read_image()
+            if filtered_image is not None:
+                super().on_image_received(self, filtered_image)
 
     def start(self):
         """
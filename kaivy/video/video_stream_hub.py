@@ -0,0 +1,255 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+"""
+  This file defines VideoStreamHub - distributes the frames of a single source to multiple subscribers
+"""
+
+import time
+import cv2
+from typing import List
+from kivy.clock import Clock
+from kaivy.video.video_stream_proto import VideoStreamProto
+
+
+class VideoStreamHubSubscription(VideoStreamProto):
+    """
+    A single subscriber of a VideoStreamHub. It behaves like a normal video stream and can be selected in any
+    VideoStreamView. Each subscription may define its own frame rate, resolution and filter tail which are only
+    applied when the subscription's image is actually read.
+    """
+
+    def __init__(self, hub, fps=None, resolution=None, filters=None):
+        """
+        Initializer
+        :param hub: The owning VideoStreamHub
+        :param fps: The maximum frame rate of this subscription. None = the source's frame rate
+        :param resolution: The target resolution as (width, height) tuple. None = the source's resolution
+        :param filters: An optional list of still image filters applied after the resizing
+        """
+        super().__init__()
+        self.hub: VideoStreamHub = hub  # The hub providing the frames
+        self.unique_name = hub.source.unique_name
+        self.identifier = hub.source.identifier
+        self.vendor = hub.source.vendor
+        self.model = hub.source.model
+        self.fps = fps if fps is not None else hub.source.fps
+        self.resolution = resolution  # The target resolution (width, height) or None
+        self.still_image_filters = list(filters) if filters is not None else []  # The subscription's filter tail
+        self.active = False  # Defines if this subscription is currently started
+        self.push_capable = True  # The hub pushes each new frame, listening views need no polling
+        self.source_frame = (None, None)  # The newest, still unprocessed frame (time stamp, image) from the hub
+        self.last_processing_time = 0.0  # Time (time.time) of the last processed image
+
+    def set_still_image_filter(self, new_filter):
+        """
+        Sets given filter as new (and only) still image filter
+        :param new_filter: The filter
+        """
+        self.still_image_filters = [new_filter]
+
+    def add_still_image_filter(self, new_filter):
+        """
+        Add given filter
+        :param new_filter: The filter
+        """
+        self.still_image_filters.append(new_filter)
+
+    def start(self):
+        """
+        Starts this subscription (and the hub's source if it is the first active subscription)
+        """
+        self.active = True
+        self.hub.handle_subscription_state_changed(self)
+
+    def pause(self):
+        """
+        Pauses this subscription (and the hub's source if no other subscription is active anymore)
+        """
+        self.active = False
+        self.hub.handle_subscription_state_changed(self)
+
+    def stop(self):
+        """
+        Stops this subscription
+        """
+        self.pause()
+        self.source_frame = (None, None)
+
+    def rewind(self):
+        """
+        Rewinds the shared source. Note that this affects all subscriptions of the hub.
+        """
+        self.hub.source.rewind()
+
+    def available(self):
+        """
+        Returns if the hub's source is available
+        :return: True if the source is ready
+        """
+        return self.hub.source.available()
+
+    def get_resolution(self):
+        """
+        Returns the subscription's resolution (width, height)
+        :return: The resolution as width, height
+        """
+        if self.resolution is not None:
+            return self.resolution
+        return super().get_resolution()
+
+    def on_image_received(self, stream, image):
+        """
+        Is called by the hub when ever a new frame was read from the source. Notifies all image listeners.
+        :param stream: The hub
+        :param image: The new image
+        """
+        self.source_frame = (stream.last_image_time, image)
+        self.notify_image_listeners(image)
+
+    def read_image(self, time_stamp=None, parameters=None):
+        """
+        Returns the newest processed image. The resizing and filter tail are only applied if a new frame arrived and
+        the subscription's frame rate allows it.
+        :param time_stamp: The time stamp of the previous update (if available)
+        :param parameters: Optional parameters
+        :return: (Updated time stamp, New Image) if available. If not (0, None)
+        """
+        source_time, source_image = self.source_frame
+        if source_image is not None and source_time != self.last_image_time:
+            cur_time = time.time()
+            if self.fps == 0.0 or cur_time >= self.last_processing_time + 1.0 / self.fps:
+                self.last_processing_time = cur_time
+                self.last_image = self.apply_filter(source_image)
+                self.last_image_time = source_time
+        if self.last_image is None:
+            return 0, None
+        return self.last_image_time, self.last_image
+
+    def apply_filter(self, image):
+        """
+        Resizes the image to the subscription's resolution and applies the filter tail
+        :param image: The source image
+        :return: The processed image
+        """
+        if self.resolution is not None and (image.shape[1] != self.resolution[0] or
+                                            image.shape[0] != self.resolution[1]):
+            downscaling = self.resolution[0] < image.shape[1]
+            image = cv2.resize(image, tuple(self.resolution),
+                               interpolation=cv2.INTER_AREA if downscaling else cv2.INTER_LINEAR)
+        for cur_filter in self.still_image_filters:
+            image = cur_filter.process_images([image])
+        return image
+
+
+class VideoStreamHub:
+    """
+    The video stream hub owns a single video source, reads each of its frames exactly once and pushes it to all
+    active subscriptions. Push capable sources are listened to, all others are polled with poll_fps. Use the hub if
+    the same source shall be shown in multiple VideoStreamViews:
+
+        hub = VideoStreamHub(camera)
+        main_view.select_stream(hub.subscribe())
+        thumbnail_view.select_stream(hub.subscribe(fps=10, resolution=(320, 180)))
+    """
+
+    DEFAULT_POLL_FPS = 30.0  # The polling frequency used if the source does not report its frame rate
+
+    def __init__(self, source: VideoStreamProto, poll_fps=None):
+        """
+        Initializer
+        :param source: The video source to distribute
+        :param poll_fps: The frequency with which the source is polled. None = the source's frame rate or
+        DEFAULT_POLL_FPS if the source reports none
+        """
+        self.source: VideoStreamProto = source  # The shared source
+        self.subscriptions: List[VideoStreamHubSubscription] = []  # All subscriptions
+        self.poll_fps = poll_fps  # The polling frequency, None = the source's frame rate
+        self.last_image = None  # The newest image read from the source
+        self.last_image_time = None  # The time stamp of the newest image read from the source
+        self.timer = None  # The polling timer, only active while at least one subscription is active
+        self.running = False  # Defines if the source is currently started
+
+    def subscribe(self, fps=None, resolution=None, filters=None) -> VideoStreamHubSubscription:
+        """
+        Creates a new subscription. The subscription is paused until it is started, e.g. by a VideoStreamView.
+        :param fps: The maximum frame rate of this subscription. None = the source's frame rate
+        :param resolution: The target resolution as (width, height) tuple. None = the source's resolution
+        :param filters: An optional list of still image filters applied after the resizing
+        :return: The subscription which can be used like any other video stream
+        """
+        subscription = VideoStreamHubSubscription(self, fps=fps, resolution=resolution, filters=filters)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: VideoStreamHubSubscription):
+        """
+        Removes given subscription
+        :param subscription: The subscription to remove
+        """
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+            self.handle_subscription_state_changed(subscription)
+
+    def get_active_subscriptions(self) -> List[VideoStreamHubSubscription]:
+        """
+        Returns all currently active subscriptions
+        :return: The list of subscriptions
+        """
+        return [cur_sub for cur_sub in self.subscriptions if cur_sub.active]
+
+    def handle_subscription_state_changed(self, subscription):
+        """
+        Is called when ever a subscription was started or paused. Starts or pauses the source and polling timer
+        accordingly.
+        :param subscription: The modified subscription
+        """
+        if len(self.get_active_subscriptions()) > 0:
+            if not self.running:
+                self.running = True
+                if self.source.push_capable:
+                    self.source.add_image_listener(self.handle_image_pushed)
+                else:
+                    poll_fps = self.poll_fps if self.poll_fps is not None else self.source.fps
+                    if poll_fps is None or poll_fps <= 0.0:  # Frame rate unknown
+                        poll_fps = self.DEFAULT_POLL_FPS
+                    self.timer = Clock.schedule_interval(self.update, 1.0 / poll_fps)
+                self.source.start()
+            if subscription.active and self.last_image is not None:  # Provide the newest frame directly
+                subscription.on_image_received(self, self.last_image)
+        elif self.running:
+            self.running = False
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.source.remove_image_listener(self.handle_image_pushed)
+            self.source.pause()
+
+    def handle_image_pushed(self, stream, image):
+        """
+        Is called by push capable sources (from an arbitrary thread) when ever a new image is available
+        :param stream: The source
+        :param image: The new image
+        """
+        self.update(0.0)
+
+    def update(self, dt):
+        """
+        Reads the newest frame from the source and pushes it to all active subscriptions
+        :param dt: The time passed since the last call
+        """
+        if not self.source.available():
+            return
+        stamp, image = self.source.read_image(time_stamp=self.last_image_time)
+        if image is None or stamp == self.last_image_time:  # continue if nothing was updated
+            return
+        self.last_image_time = stamp
+        self.last_image = image
+        for subscription in self.subscriptions:
+            if subscription.active:
+                subscription.on_image_received(self, image)
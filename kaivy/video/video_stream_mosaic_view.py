@@ -0,0 +1,195 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+"""
+  This file defines VideoStreamMosaicView - shows many small video streams through a single shared texture
+"""
+
+import math
+from typing import List
+import cv2
+import numpy as np
+from kivy.clock import Clock
+from kivy.uix.widget import Widget
+from kivy.graphics import Color, Mesh
+from kivy.graphics.texture import Texture
+from kaivy.video.video_stream_proto import VideoStreamProto
+
+
+class VideoStreamMosaicView(Widget):
+    """
+    The mosaic view shows multiple video streams as a horizontal strip of tiles, e.g. as thumbnails. All tiles are
+    packed into one atlas texture which is updated sub-rectangle wise and the whole strip is drawn as a single mesh.
+
+    Events:
+        on_tile_selected(index, stream) - Called when a tile was clicked
+    """
+
+    def __init__(self, tile_width=320, tile_height=180, **kwargs):
+        """
+        Initializer
+        :param tile_width: The width of a single tile in pixels
+        :param tile_height: The height of a single tile in pixels
+        :param kwargs:
+        """
+        super().__init__(**kwargs)
+        self.tile_width = tile_width  # The width of a single tile
+        self.tile_height = tile_height  # The height of a single tile
+        self.streams: List[VideoStreamProto] = []  # The streams shown
+        self.fps = 15  # The frequency with which the streams are polled
+        self.last_time_stamps = []  # The time stamp of each tile's last image
+        self.atlas_columns = 1  # The count of tile columns within the atlas texture
+        self.atlas_texture: Texture = None  # The texture holding all tiles
+        self.timer = None  # The polling timer
+        self.running = False  # Defines if the view is currently started
+        with self.canvas:
+            Color(1.0, 1.0, 1.0, 1.0)
+            self.mesh = Mesh(mode='triangles')
+        self.bind(pos=self.update_mesh, size=self.update_mesh)
+        self.register_event_type('on_tile_selected')
+
+    def select_streams(self, streams: List[VideoStreamProto]):
+        """
+        Defines the streams to be shown and (re)creates the atlas texture
+        :param streams: The list of streams
+        """
+        running = self.running
+        if running:
+            self.pause()
+        self.streams = list(streams)
+        self.last_time_stamps = [None for _ in self.streams]
+        self.atlas_columns = max(1, math.ceil(math.sqrt(len(self.streams))))
+        atlas_rows = max(1, math.ceil(len(self.streams) / self.atlas_columns))
+        self.atlas_texture = Texture.create(size=(self.atlas_columns * self.tile_width, atlas_rows * self.tile_height),
+                                            colorfmt='bgr')
+        self.mesh.texture = self.atlas_texture
+        self.size = (self.tile_width * len(self.streams), self.tile_height)
+        self.update_mesh()
+        if running:
+            self.start()
+
+    def get_tile_atlas_pos(self, index):
+        """
+        Returns the position of given tile within the atlas texture
+        :param index: The tile's index
+        :return: The position in pixels
+        """
+        return (index % self.atlas_columns) * self.tile_width, (index // self.atlas_columns) * self.tile_height
+
+    def update_mesh(self, *args):
+        """
+        Updates the mesh's vertices, one quad per tile
+        :param args: Unused event arguments
+        """
+        if self.atlas_texture is None:
+            return
+        vertices = []
+        indices = []
+        atlas_width, atlas_height = self.atlas_texture.size
+        for index in range(len(self.streams)):
+            x = self.x + index * self.tile_width
+            y = self.y
+            atlas_x, atlas_y = self.get_tile_atlas_pos(index)
+            u0, v0 = atlas_x / atlas_width, atlas_y / atlas_height
+            u1, v1 = (atlas_x + self.tile_width) / atlas_width, (atlas_y + self.tile_height) / atlas_height
+            vertices += [x, y, u0, v0,
+                         x + self.tile_width, y, u1, v0,
+                         x + self.tile_width, y + self.tile_height, u1, v1,
+                         x, y + self.tile_height, u0, v1]
+            base = index * 4
+            indices += [base, base + 1, base + 2, base + 2, base + 3, base]
+        self.mesh.vertices = vertices
+        self.mesh.indices = indices
+
+    def update_tile(self, index, image):
+        """
+        Scales the image to the tile size and copies it into the atlas texture
+        :param index: The tile's index
+        :param image: The new image
+        """
+        if image.shape[1] != self.tile_width or image.shape[0] != self.tile_height:
+            image = cv2.resize(image, (self.tile_width, self.tile_height), interpolation=cv2.INTER_AREA)
+        if image.dtype != np.uint8:  # Floating point images are expected in range 0.0 to 1.0
+            scale = 255.0 if np.issubdtype(image.dtype, np.floating) else 255.0 / np.iinfo(image.dtype).max
+            image = np.clip(image * scale, 0.0, 255.0).astype(np.uint8)
+        if len(image.shape) == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        buf = cv2.flip(image, 0).tobytes()
+        self.atlas_texture.blit_buffer(buf, pos=self.get_tile_atlas_pos(index),
+                                       size=(self.tile_width, self.tile_height), colorfmt='bgr', bufferfmt='ubyte')
+
+    def update(self, dt):
+        """
+        Polls all streams and updates the tiles which received a new image
+        :param dt: The time passed since the last update
+        """
+        modified = False
+        for index, stream in enumerate(self.streams):
+            if not stream.available():
+                continue
+            stamp, image = stream.read_image(time_stamp=self.last_time_stamps[index])
+            if image is None or stamp == self.last_time_stamps[index]:
+                continue
+            self.last_time_stamps[index] = stamp
+            self.update_tile(index, image)
+            modified = True
+        if modified:
+            self.canvas.ask_update()
+
+    def start(self):
+        """
+        Starts all streams and the polling
+        """
+        if not self.running:
+            self.running = True
+            self.timer = Clock.schedule_interval(self.update, 1.0 / self.fps)
+        for stream in self.streams:
+            stream.start()
+
+    def pause(self):
+        """
+        Pauses all streams and the polling
+        """
+        self.running = False
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        for stream in self.streams:
+            stream.pause()
+
+    def get_tile_at(self, pos):
+        """
+        Returns the index of the tile at given position
+        :param pos: The position in window coordinates
+        :return: The tile index, None if no tile is located there
+        """
+        if not self.collide_point(*pos):
+            return None
+        index = int((pos[0] - self.x) // self.tile_width)
+        return index if 0 <= index < len(self.streams) else None
+
+    def on_touch_down(self, touch):
+        """
+        Kivy touch down handler, dispatches on_tile_selected for the clicked tile
+        :param touch: The touch event
+        """
+        index = self.get_tile_at(touch.pos)
+        if index is None:
+            return super().on_touch_down(touch)
+        self.dispatch('on_tile_selected', index, self.streams[index])
+        return True
+
+    def on_tile_selected(self, index, stream):
+        """
+        Called when a tile was clicked
+        :param index: The tile's index
+        :param stream: The tile's stream
+        """
+        pass
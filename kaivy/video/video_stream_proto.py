@@ -28,6 +28,8 @@ class VideoStreamProto:
         self.resolution_x = 640  # The camera's horizontal resolution
         self.resolution_y = 480  # The camera's vertical resolution
         self.fps = 60  # Defines the cameras count of frames per second
+        self.push_capable = False  # Defines if the stream calls on_image_received for every new frame
+        self.image_listeners = []  # Callbacks receiving (stream, image) when ever a new image was received
 
     def start(self):
         """
@@ -82,11 +84,39 @@ class VideoStreamProto:
         """
         return 0, None
 
+    def add_image_listener(self, callback):
+        """
+        Registers a callback which is notified about each new image of a push capable stream. The callback may be
+        called from an arbitrary thread and has to return quickly.
+        :param callback: The callback receiving (stream, image)
+        """
+        if callback not in self.image_listeners:
+            self.image_listeners.append(callback)
+
+    def remove_image_listener(self, callback):
+        """
+        Removes a callback registered via add_image_listener
+        :param callback: The callback
+        """
+        if callback in self.image_listeners:
+            self.image_listeners.remove(callback)
+
+    def notify_image_listeners(self, image):
+        """
+        Notifies all image listeners about a new image
+        :param image: The new image
+        """
+        for listener in list(self.image_listeners):
+            listener(self, image)
+
     def on_image_received(self, stream, image):
         """
-        Is called when the newest image has been received e.g. from a camera.
+        Is called when the newest image has been received e.g. from a camera. Push capable streams call this function
+        (from any thread) for each new image, by default all image listeners are notified.
+        :param stream: The stream which received the image
+        :param image: The new image
         """
-        pass
+        self.notify_image_listeners(image)
 
     def handle_post_processing(self, image):
         """
@@ -0,0 +1,137 @@
+########################################################################################################################
+#                                                                                                                      #
+#                                             This file is part of kAIvy                                               #
+#                                                                                                                      #
+#                                      Copyright (c) 2019-2021 by the kAIvy team and contributors                                      #
+#                                                                                                                      #
+########################################################################################################################
+
+"""
+  This file defines VideoStreamScheduler - distributes the work of multiple stream views across frames
+"""
+
+import time
+from kivy.clock import Clock
+from kivy.event import EventDispatcher
+
+
+class VideoStreamScheduler(EventDispatcher):
+    """
+    The video stream scheduler takes over the updates of all VideoStreamViews assigned to it (see
+    VideoStreamView.set_scheduler). Once per frame it reads, filters and uploads the images of the views which are due,
+    ordered by priority, until the frame's time budget is used up. The remaining work is continued in the next frame.
+    Views which had to wait gain priority over time so that low priority views can not starve.
+
+    A scheduler can be used for a single VideoStreamScreen or be shared by the whole application.
+
+    Events:
+        on_budget_exceeded(work_time) - Called when the work of a frame took longer than the frame budget
+    """
+
+    PRIORITY_THUMBNAIL = 0  # Priority of thumbnail views
+    PRIORITY_DEFAULT = 5  # Priority of secondary views
+    PRIORITY_MAIN = 10  # Priority of the main view
+
+    def __init__(self, frame_budget=0.008, **kwargs):
+        """
+        Initializer
+        :param frame_budget: The time in seconds which may be spent on video updates per frame
+        """
+        super().__init__(**kwargs)
+        self.frame_budget = frame_budget  # The time in seconds which may be spent per frame
+        self.aging_rate = 1.0  # The priority a waiting view gains per frame it had to wait
+        self.views = []  # All views managed by this scheduler
+        self.timer = None  # The per frame update timer, only active while there is work to do
+        self.wake_trigger = Clock.create_trigger(self.handle_wake)  # Starts the timer from arbitrary threads
+        self.last_work_time = 0.0  # The time spent in the last frame
+        self.budget_exceeded_count = 0  # The count of frames in which the budget was exceeded
+        self.deferred_count = 0  # The count of view updates which had to be moved to a later frame
+        self.register_event_type('on_budget_exceeded')
+
+    def add_view(self, view):
+        """
+        Adds a view to the scheduler
+        :param view: The VideoStreamView
+        """
+        if view not in self.views:
+            self.views.append(view)
+            view.scheduler_waiting_frames = 0
+            self.request_update()
+
+    def remove_view(self, view):
+        """
+        Removes a view from the scheduler
+        :param view: The VideoStreamView
+        """
+        if view in self.views:
+            self.views.remove(view)
+
+    def request_update(self):
+        """
+        Requests an update in the next frame. May be called from an arbitrary thread.
+        """
+        self.wake_trigger()
+
+    def handle_wake(self, dt):
+        """
+        Starts the per frame timer if it is not running yet
+        :param dt: The time passed since the request
+        """
+        if self.timer is None:
+            self.timer = Clock.schedule_interval(self.update, 0)
+
+    def get_effective_priority(self, view):
+        """
+        Returns the priority of a view including the priority it gained while waiting
+        :param view: The view
+        :return: The priority
+        """
+        return view.scheduler_priority + view.scheduler_waiting_frames * self.aging_rate
+
+    def update(self, dt):
+        """
+        Is called once per frame and processes the views which are due within the frame budget
+        :param dt: The time passed since the last frame
+        :return: False if there is no more work, so the timer is stopped
+        """
+        frame_start = time.perf_counter()
+        deadline = frame_start + self.frame_budget
+        due_views = [view for view in self.views if view.is_frame_due()]
+        due_views.sort(key=self.get_effective_priority, reverse=True)
+
+        remaining_work = False
+        served_count = 0
+        for view in due_views:
+            if served_count > 0 and time.perf_counter() >= deadline:  # Serve at least one view per frame
+                view.scheduler_waiting_frames += 1
+                self.deferred_count += 1
+                remaining_work = True
+                continue
+            if view.pending_frame is None:
+                view.fetch_frame()
+            if view.pending_frame is not None:
+                if served_count > 0 and time.perf_counter() >= deadline:  # Upload in the next frame
+                    view.scheduler_waiting_frames += 1
+                    self.deferred_count += 1
+                    remaining_work = True
+                    continue
+                view.upload_frame()
+            view.scheduler_waiting_frames = 0
+            served_count += 1
+
+        self.last_work_time = time.perf_counter() - frame_start
+        if self.last_work_time > self.frame_budget:
+            self.budget_exceeded_count += 1
+            self.dispatch('on_budget_exceeded', self.last_work_time)
+
+        if remaining_work or any(view.is_polling() or view.frame_pending for view in self.views):
+            return True
+        self.timer = None
+        return False
+
+    def on_budget_exceeded(self, work_time):
+        """
+        Called when the work of a frame took longer than the frame budget
+        :param work_time: The time spent in seconds
+        """
+        pass
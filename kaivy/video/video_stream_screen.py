@@ -11,20 +11,26 @@
   This file defines a video stream live view screen
 """
 
+import math
 from typing import List
 from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
 from kivy.uix.anchorlayout import AnchorLayout
 from kivy.uix.floatlayout import FloatLayout
 from kaivy.video.video_stream_proto import VideoStreamProto
 from kaivy.video.video_stream_view import VideoStreamOverlayView
 from kaivy.video.video_stream_view import VideoStreamView
+from kaivy.video.video_stream_scheduler import VideoStreamScheduler
+from kaivy.video.video_stream_mosaic_view import VideoStreamMosaicView
 from kaivy.common.pan_and_zoom_view import PanAndZoomView
 
 
 class VideoStreamScreen(Screen):
     """
-    This screen type shows up to four video streams separately
+    This screen type shows up to four video streams separately. Larger stream counts are shown in a paged grid in which
+    only the views of the visible page exist. They are recycled when the page changes and all streams which are not
+    visible are paused.
     """
 
     def __init__(self, **kwargs):
@@ -43,8 +49,16 @@ class VideoStreamScreen(Screen):
         self.thumbnail_width = 1920 // 6  # Size of a single thumbnail
         self.thumbnail_height = 1080 // 6  # Height of a single thumbnail
         self.thumbnail_stream_count = 0  # Count of thumbnail stream views
+        self.use_thumbnail_mosaic = False  # Defines if all thumbnails shall be drawn by a single mosaic view
+        self.thumbnail_mosaic_view: VideoStreamMosaicView = None  # The thumbnail mosaic view (if in use)
         self.use_pan_and_zoom_views = False  # Define if advanced, pannable views shall be used
         self.screen_active = False  # Defines if the screen is currently visible
+        self.paged_layout = False  # Enforces the paged grid. It is used automatically for more than four streams.
+        self.page_columns = 3  # The count of columns of a single page of the paged grid
+        self.page_rows = 3  # The count of rows of a single page of the paged grid
+        self.page_index = 0  # The currently visible page of the paged grid
+        self.page_grid: GridLayout = None  # The grid layout of the paged grid (if in use)
+        self.scheduler: VideoStreamScheduler = None  # Optional scheduler updating all views within a frame budget
 
         self.padding = [0, 0, 0, 0]
         self.size_hint = (1.0, 1.0)
@@ -115,6 +129,8 @@ class VideoStreamScreen(Screen):
         """
         self.stream_list = streams
 
+        for view in self.stream_views:  # Detach the old views from the scheduler
+            view.set_scheduler(None)
         self.stream_views.clear()
         self.stream_overlay_views.clear()
         self.pan_and_zoom_views.clear()
@@ -128,6 +144,19 @@ class VideoStreamScreen(Screen):
                 gridded_stream_count = self.thumbnail_start
                 self.thumbnail_stream_count = prev_count - gridded_stream_count
 
+        # Remove all old views
+        self.video_stream_region.clear_widgets()
+        self.thumbnail_region.clear_widgets()
+        if self.thumbnail_mosaic_view is not None:
+            self.thumbnail_mosaic_view.pause()
+            self.thumbnail_mosaic_view = None
+        self.page_grid = None
+
+        if self.paged_layout or gridded_stream_count > 4:
+            self.setup_paged_grid()
+            self.assign_scheduler()
+            return
+
         # Define camera positioning
         if gridded_stream_count >= 4:
             columns = [2, 2]
@@ -138,10 +167,6 @@ class VideoStreamScreen(Screen):
         else:
             columns = [1]
 
-        # Remove all old views
-        self.video_stream_region.clear_widgets()
-        self.thumbnail_region.clear_widgets()
-
         total_index = 0
 
         # Setup all camera views
@@ -149,31 +174,23 @@ class VideoStreamScreen(Screen):
             v_box_layout = BoxLayout(orientation='vertical', size_hint=(1.0, 1.0))
             self.video_stream_region.add_widget(v_box_layout)
             for _ in range(row_count):  # for all rows
-
                 current_stream = streams[total_index] if total_index < len(streams) else None
-                if self.use_pan_and_zoom_views:
-                    pan_and_zoom_view = \
-                        self.handle_create_pan_and_zoom_view(total_index, current_stream)
-                    self.pan_and_zoom_views.append(pan_and_zoom_view)
-                    cam_view = VideoStreamOverlayView(center=(0.5, 0.5), pos=(0, 0), size_hint=(None, None))
-                    pan_and_zoom_view.set_dynamic_widget(cam_view)
-                    cam_view.pause()
-                    pan_and_zoom_view.add_widget(cam_view)
-                    v_box_layout.add_widget(pan_and_zoom_view)
-                else:
-                    cam_view = self.handle_create_view(total_index, current_stream)
-                    cam_view.pause()
-                    v_box_layout.add_widget(cam_view)
-
-                self.stream_views.append(cam_view.stream_view)
-                self.stream_overlay_views.append(cam_view)
-
+                v_box_layout.add_widget(self.create_stream_cell(total_index, current_stream))
                 total_index += 1
 
         # Setup thumbnails
         self.thumbnail_region.size_hint = (None, None)
         self.thumbnail_region.size = (self.thumbnail_width * self.thumbnail_stream_count, self.thumbnail_height)
-        for thumb_index in range(self.thumbnail_stream_count):
+        if self.use_thumbnail_mosaic and self.thumbnail_stream_count > 0:
+            first_thumbnail = len(self.stream_views)
+            self.thumbnail_mosaic_view = VideoStreamMosaicView(tile_width=self.thumbnail_width,
+                                                               tile_height=self.thumbnail_height,
+                                                               size_hint=(None, None))
+            self.thumbnail_mosaic_view.select_streams(
+                streams[first_thumbnail:first_thumbnail + self.thumbnail_stream_count])
+            self.thumbnail_mosaic_view.bind(on_tile_selected=self.handle_thumbnail_selected)
+            self.thumbnail_region.add_widget(self.thumbnail_mosaic_view)
+        for thumb_index in range(self.thumbnail_stream_count if self.thumbnail_mosaic_view is None else 0):
             cam_view = VideoStreamOverlayView(size_hint=(None, None),
                                               size=(self.thumbnail_width, self.thumbnail_height))
             cam_view.pause()
@@ -187,6 +204,133 @@ class VideoStreamScreen(Screen):
                 break
             self.stream_views[index].select_stream(self.stream_list[index])
 
+        self.assign_scheduler()
+
+    def set_scheduler(self, scheduler: VideoStreamScheduler):
+        """
+        Assigns a scheduler which updates all stream views of this screen within a per frame time budget
+        :param scheduler: The scheduler. It may be shared with other screens. None = views update independently.
+        """
+        self.scheduler = scheduler
+        self.assign_scheduler()
+
+    def assign_scheduler(self):
+        """
+        Assigns the scheduler to all stream views. The main view receives the highest priority, thumbnails the lowest.
+        """
+        thumbnail_view_count = self.thumbnail_stream_count if self.thumbnail_mosaic_view is None else 0
+        first_thumbnail = len(self.stream_views) - thumbnail_view_count
+        for index, view in enumerate(self.stream_views):
+            if self.scheduler is None:
+                view.set_scheduler(None)
+            elif index == 0:
+                view.set_scheduler(self.scheduler, VideoStreamScheduler.PRIORITY_MAIN)
+            elif index >= first_thumbnail:
+                view.set_scheduler(self.scheduler, VideoStreamScheduler.PRIORITY_THUMBNAIL)
+            else:
+                view.set_scheduler(self.scheduler, VideoStreamScheduler.PRIORITY_DEFAULT)
+
+    def create_stream_cell(self, index, stream):
+        """
+        Creates the (paused) view for a single grid cell and registers it in the view lists
+        :param index: The cell's index
+        :param stream: The stream which will be assigned to this view
+        :return: The widget to be added to the layout
+        """
+        if self.use_pan_and_zoom_views:
+            pan_and_zoom_view = self.handle_create_pan_and_zoom_view(index, stream)
+            self.pan_and_zoom_views.append(pan_and_zoom_view)
+            cam_view = VideoStreamOverlayView(center=(0.5, 0.5), pos=(0, 0), size_hint=(None, None))
+            pan_and_zoom_view.set_dynamic_widget(cam_view)
+            cam_view.pause()
+            pan_and_zoom_view.add_widget(cam_view)
+            cell_widget = pan_and_zoom_view
+        else:
+            cam_view = self.handle_create_view(index, stream)
+            cam_view.pause()
+            cell_widget = cam_view
+
+        self.stream_views.append(cam_view.stream_view)
+        self.stream_overlay_views.append(cam_view)
+        return cell_widget
+
+    def get_page_capacity(self) -> int:
+        """
+        Returns the count of streams shown on a single page of the paged grid
+        :return: The count of cells per page
+        """
+        return self.page_columns * self.page_rows
+
+    def get_page_count(self) -> int:
+        """
+        Returns the count of pages of the paged grid
+        :return: The page count
+        """
+        return max(1, math.ceil(len(self.stream_list) / self.get_page_capacity()))
+
+    def setup_paged_grid(self):
+        """
+        Creates the paged grid. Only one view per visible cell is created, the views are recycled on page changes.
+        """
+        self.thumbnail_stream_count = 0
+        capacity = min(self.get_page_capacity(), len(self.stream_list))
+        columns = min(self.page_columns, max(1, math.ceil(math.sqrt(capacity))))
+        self.page_grid = GridLayout(cols=columns, size_hint=(1.0, 1.0))
+        self.video_stream_region.add_widget(self.page_grid)
+        for cell_index in range(capacity):
+            self.page_grid.add_widget(self.create_stream_cell(cell_index, self.stream_list[cell_index]))
+        self.page_index = min(self.page_index, self.get_page_count() - 1)
+        self.set_page(self.page_index, force=True)
+
+    def set_page(self, page_index, force=False):
+        """
+        Shows given page of the paged grid. Streams leaving the visible area are paused, the ones entering it are
+        started if the screen is active.
+        :param page_index: The new page's index
+        :param force: Defines if the streams shall be reassigned even if the page did not change
+        """
+        if self.page_grid is None:
+            return
+        page_index = max(0, min(page_index, self.get_page_count() - 1))
+        if page_index == self.page_index and not force:
+            return
+        self.page_index = page_index
+        first_index = page_index * self.get_page_capacity()
+        visible_streams = self.get_visible_streams()
+        for stream in self.stream_list:  # Pause all streams which are not visible anymore
+            if stream not in visible_streams:
+                stream.pause()
+        for cell_index, stream_view in enumerate(self.stream_views):  # Recycle the views
+            stream_index = first_index + cell_index
+            stream = self.stream_list[stream_index] if stream_index < len(self.stream_list) else None
+            if stream_view.device is stream:
+                continue
+            stream_view.select_stream(stream)
+            if stream is None:
+                stream_view.texture = None
+
+    def get_visible_streams(self) -> List[VideoStreamProto]:
+        """
+        Returns the streams which are currently visible
+        :return: The list of streams
+        """
+        if self.page_grid is None:
+            return self.stream_list[:len(self.stream_views)]
+        first_index = self.page_index * self.get_page_capacity()
+        return self.stream_list[first_index:first_index + self.get_page_capacity()]
+
+    def next_page(self):
+        """
+        Shows the next page of the paged grid (if available)
+        """
+        self.set_page(self.page_index + 1)
+
+    def previous_page(self):
+        """
+        Shows the previous page of the paged grid (if available)
+        """
+        self.set_page(self.page_index - 1)
+
     def handle_create_pan_and_zoom_view(self, index, stream) -> PanAndZoomView:
         """
         Handler which is called to create a panning view. May be overwritten to create a customized view.
@@ -211,6 +355,8 @@ class VideoStreamScreen(Screen):
         """
         for view in self.stream_views:
             view.start()
+        if self.thumbnail_mosaic_view is not None:
+            self.thumbnail_mosaic_view.start()
 
     def pause_streams(self):
         """
@@ -218,6 +364,17 @@ class VideoStreamScreen(Screen):
         """
         for view in self.stream_views:
             view.pause()
+        if self.thumbnail_mosaic_view is not None:
+            self.thumbnail_mosaic_view.pause()
+
+    def handle_thumbnail_selected(self, mosaic_view, index, stream):
+        """
+        Handler which is called when a tile of the thumbnail mosaic was clicked. May be overwritten.
+        :param mosaic_view: The mosaic view
+        :param index: The thumbnail's index
+        :param stream: The thumbnail's stream
+        """
+        pass
 
     def on_enter(self, *args):
         """
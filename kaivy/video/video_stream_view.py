@@ -19,6 +19,10 @@ class VideoStreamView(AdvancedImage, EventDispatcher):
     """
     The VideoStreamView displays a VideoStream from an arbitrary source.
 
+    If the stream is push capable the view does not poll it. Instead each pushed image triggers (at most) one update in
+    the next frame, an idle stream causes no updates at all. Other streams are polled with max_fps. If a
+    VideoStreamScheduler is assigned it takes over all updates.
+
     Events:
         on_image_data_changed(new_image) - Called upon each image update
     """
@@ -38,6 +42,17 @@ class VideoStreamView(AdvancedImage, EventDispatcher):
         self.timer = None  # The automatic image update timer to fetch the next frame
         self.image_texture = None  # The last image received
         self.allow_stretch = True  # Scale the image to the view's full area
+        self.running = False  # Defines if the view is currently started
+        self.push_enabled = True  # Defines if push capable streams shall deliver their images instead of polling
+        self.push_device: VideoStreamProto = None  # The device this view is listening to (if any)
+        self.last_update_time = 0.0  # The time (time.time) of the last image update
+        self.frame_deferred = False  # Defines if a delayed update (due to the fps limit) is already scheduled
+        self.frame_trigger = Clock.create_trigger(self.handle_frame_trigger)  # Coalesces pushed images per frame
+        self.scheduler = None  # An optional VideoStreamScheduler taking over the updates
+        self.scheduler_priority = 0  # This view's priority within the scheduler
+        self.scheduler_waiting_frames = 0  # The count of frames this view's update was postponed by the scheduler
+        self.frame_pending = False  # Defines if an image was pushed which was not read yet
+        self.pending_frame = None  # An image which was read but not uploaded yet
         self.register_event_type('on_image_data_changed')
         # Sender and Image, has to return Image (and may manipulate it)
 
@@ -62,21 +77,73 @@ class VideoStreamView(AdvancedImage, EventDispatcher):
         Selects a new camera device
         :param device: The new device type
         """
-        self.device = device
+        self.select_stream(device)
 
     def select_stream(self, stream):
         """
-        Selects a new video stream
+        Selects a new video stream. If the view is currently running the new stream is started as well.
         :param stream: The new stream
         """
         self.device = stream
+        self.last_time_stamp = None
+        if self.running:
+            self.connect_delivery()
+            if self.device is not None:
+                self.device.start()
+
+    def set_scheduler(self, scheduler, priority=0):
+        """
+        Assigns a VideoStreamScheduler which takes over this view's updates
+        :param scheduler: The scheduler. None = update independently
+        :param priority: The view's priority, see VideoStreamScheduler.PRIORITY_
+        """
+        if self.scheduler is not None:
+            self.scheduler.remove_view(self)
+        self.scheduler = scheduler
+        self.scheduler_priority = priority
+        if self.scheduler is not None:
+            self.scheduler.add_view(self)
+        if self.running:
+            self.connect_delivery()
+
+    def connect_delivery(self):
+        """
+        Connects the view to its device, either by listening to pushed images or by polling it
+        """
+        self.disconnect_delivery()
+        if self.device is not None and self.push_enabled and self.device.push_capable:
+            self.push_device = self.device
+            self.push_device.add_image_listener(self.handle_image_pushed)
+            self.handle_image_pushed(self.device, None)  # Show the newest image available
+        elif self.scheduler is None:
+            self.timer = Clock.schedule_interval(self.update, 1.0 / self.max_fps)
+        else:
+            self.scheduler.request_update()
+
+    def disconnect_delivery(self):
+        """
+        Stops polling or listening to the device
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.push_device is not None:
+            self.push_device.remove_image_listener(self.handle_image_pushed)
+            self.push_device = None
+        self.frame_trigger.cancel()
+        self.frame_pending = False
+        self.pending_frame = None
+        if self.frame_deferred:
+            Clock.unschedule(self.handle_deferred_frame)
+            self.frame_deferred = False
 
     def start(self):
         """
         Starts the image capturing of the camera device
         """
-        if self.timer is None:
-            self.timer = Clock.schedule_interval(self.update, 1.0 / self.max_fps)
+        if not self.running:
+            self.running = True
+            self.connect_delivery()
 
         if self.device is not None:
             self.device.start()
@@ -89,16 +156,16 @@ class VideoStreamView(AdvancedImage, EventDispatcher):
         self.fps = new_fps
         if self.timer is not None:
             self.timer.cancel()
-        if self.fps!=0.0:
+            self.timer = None
+        if self.fps != 0.0 and self.running and self.push_device is None and self.scheduler is None:
             self.timer = Clock.schedule_interval(self.update, 1.0 / self.fps)
 
     def pause(self):
         """
         Pauses the image capturing
         """
-        if self.timer is not None:
-            Clock.unschedule(self.timer)
-            self.timer = None
+        self.running = False
+        self.disconnect_delivery()
 
         if self.device is not None:
             self.device.pause()
@@ -117,6 +184,65 @@ class VideoStreamView(AdvancedImage, EventDispatcher):
         if self.device is not None:
             self.device.rewind()
 
+    def handle_image_pushed(self, stream, image):
+        """
+        Is called by push capable streams (from an arbitrary thread) when ever a new image is available
+        :param stream: The stream
+        :param image: The new image
+        """
+        if self.scheduler is not None:
+            self.frame_pending = True
+            self.scheduler.request_update()
+        else:
+            self.frame_trigger()
+
+    def is_polling(self):
+        """
+        Returns if the view has to poll its device
+        :return: True if the device is not push capable
+        """
+        return self.running and self.device is not None and self.push_device is None
+
+    def is_frame_due(self):
+        """
+        Returns if the view should be updated, used by the VideoStreamScheduler
+        :return: True if the view shall be updated
+        """
+        if not self.running or self.device is None:
+            return False
+        if self.pending_frame is not None:
+            return True
+        if self.fps == 0.0 or time.time() < self.last_update_time + 1.0 / self.fps:
+            return False
+        if self.push_device is not None and not self.frame_pending:
+            return False
+        return self.device.available()
+
+    def handle_frame_trigger(self, dt):
+        """
+        Is called in the frame following one or multiple pushed images and displays the newest one
+        :param dt: The time passed since the trigger was set
+        """
+        if self.frame_deferred:  # A delayed update is already scheduled
+            return
+        if not self.running or self.device is None or not self.device.available():
+            return
+        if self.fps != 0.0:  # Respect the fps limit, defer the update if required
+            remaining = self.last_update_time + 1.0 / self.fps - time.time()
+            if remaining > 0.0:
+                self.frame_deferred = True
+                Clock.schedule_once(self.handle_deferred_frame, remaining)
+                return
+        self.update_frame()
+
+    def handle_deferred_frame(self, dt):
+        """
+        Is called when an update which was delayed due to the fps limit is due
+        :param dt: The time passed since the update was scheduled
+        """
+        self.frame_deferred = False
+        self.handle_frame_trigger(dt)
+
     def update(self, dt):
         """
         Updates the preview image in a defined interval
@@ -126,14 +252,43 @@ class VideoStreamView(AdvancedImage, EventDispatcher):
         if self.device is not None and self.device.available():  # Camera attached and available ?
             if self.last_time_stamp is not None and not time.time() > self.last_time_stamp + 1.0 / self.fps:  # if too few time spent since last time stamp skip
                 return
-            stamp, frame = self.device.read_image(time_stamp=self.last_time_stamp)
-            if frame is None or stamp == self.last_time_stamp:  # continue if nothing was updated
-                return
-            self.last_time_stamp = stamp  # Remember last time stamp to prevent highspeed-nothing
-            if len(self.get_property_observers(
-                    'on_image_data_changed')) > 0:  # If a handler is set, call it when ever the image data changed
-                frame = self.dispatch('on_image_data_changed', frame)
-            self.set_image_data(frame)
+            self.update_frame()
+
+    def update_frame(self):
+        """
+        Reads the device's newest image and displays it
+        :return: True if the image was updated
+        """
+        return self.fetch_frame() and self.upload_frame()
+
+    def fetch_frame(self):
+        """
+        Reads and filters the device's newest image. The image is kept as pending frame until upload_frame is called.
+        :return: True if a new image was read
+        """
+        self.frame_pending = False
+        stamp, frame = self.device.read_image(time_stamp=self.last_time_stamp)
+        if frame is None or stamp == self.last_time_stamp:  # continue if nothing was updated
+            return False
+        self.last_time_stamp = stamp  # Remember last time stamp to prevent highspeed-nothing
+        self.last_update_time = time.time()
+        if len(self.get_property_observers(
+                'on_image_data_changed')) > 0:  # If a handler is set, call it when ever the image data changed
+            frame = self.dispatch('on_image_data_changed', frame)
+        self.pending_frame = frame
+        return True
+
+    def upload_frame(self):
+        """
+        Uploads the pending frame read by fetch_frame into the view's texture
+        :return: True if a frame was uploaded
+        """
+        if self.pending_frame is None:
+            return False
+        frame = self.pending_frame
+        self.pending_frame = None
+        self.set_image_data(frame)
+        return True
 
     def on_image_data_changed(self, image):
         """